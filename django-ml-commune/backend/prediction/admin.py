@@ -3,6 +3,6 @@ from .models import Prediction
 
 @admin.register(Prediction)
 class PredictionAdmin(admin.ModelAdmin):
-    list_display = ('commune', 'year', 'predicted_revenue', 'predicted_expense')
-    search_fields = ('commune',)
-    list_filter = ('year',)
\ No newline at end of file
+    list_display = ('commune', 'year', 'predicted_revenue', 'predicted_expense', 'model_version')
+    search_fields = ('commune__name',)
+    list_filter = ('year', 'model_version')
\ No newline at end of file
@@ -0,0 +1,53 @@
+from .models import Commune, Prediction
+
+
+def cached_predictions(communes, annees, bundle):
+    """
+    Cache de lecture pour les prédictions, adossé au modèle Prediction.
+
+    Les paires (commune, année) déjà calculées par la version courante du
+    modèle sont lues en une requête ; les autres sont prédites en un seul
+    appel puis insérées (ou mises à jour si elles étaient périmées) en
+    une seule requête. Retourne une liste de tuples (recettes, dépenses)
+    dans l'ordre des paires fournies.
+    """
+    rows = Prediction.objects.filter(
+        commune__name__in=set(communes),
+        year__in=set(annees),
+        model_version=bundle.version,
+    ).values_list('commune__name', 'year', 'predicted_revenue', 'predicted_expense')
+    found = {(name, year): (revenue, expense) for name, year, revenue, expense in rows}
+
+    missing = list(dict.fromkeys(
+        pair for pair in zip(communes, annees) if pair not in found
+    ))
+    if missing:
+        missing_communes = [commune for commune, _ in missing]
+        values = bundle.predict(missing_communes, [annee for _, annee in missing])
+
+        Commune.objects.bulk_create(
+            [Commune(name=name) for name in set(missing_communes)],
+            ignore_conflicts=True,
+        )
+        commune_ids = dict(
+            Commune.objects.filter(name__in=set(missing_communes)).values_list('name', 'id')
+        )
+        Prediction.objects.bulk_create(
+            [
+                Prediction(
+                    commune_id=commune_ids[commune],
+                    year=annee,
+                    predicted_revenue=float(value[0]),
+                    predicted_expense=float(value[1]),
+                    model_version=bundle.version,
+                )
+                for (commune, annee), value in zip(missing, values)
+            ],
+            update_conflicts=True,
+            unique_fields=['commune', 'year'],
+            update_fields=['predicted_revenue', 'predicted_expense', 'model_version', 'updated_at'],
+        )
+        for pair, value in zip(missing, values):
+            found[pair] = (float(value[0]), float(value[1]))
+
+    return [found[pair] for pair in zip(communes, annees)]
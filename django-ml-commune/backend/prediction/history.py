@@ -0,0 +1,66 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from .ml.store import CSV_PATH, STORE_DIR, history_signature, load_history
+
+HISTORY_COLUMNS = ['Année', 'Recettes (M€)', 'Dépenses (M€)']
+
+
+def build_history(df):
+    """
+    Construit {commune: [{Année, Recettes (M€), Dépenses (M€)}, ...]} en une
+    seule passe groupby, chaque historique étant trié par année.
+    """
+    df = df[['Commune'] + HISTORY_COLUMNS].sort_values(['Commune', 'Année'], kind='stable')
+    return {
+        commune: rows[HISTORY_COLUMNS].to_dict(orient='records')
+        for commune, rows in df.groupby('Commune', sort=True, observed=True)
+    }
+
+
+class HistoryPayload:
+    """Historique prêt à servir : JSON, version compressée et validateurs HTTP"""
+
+    def __init__(self, historique, mtime):
+        self.communes = list(historique)
+        self.json = json.dumps(historique)
+        raw = self.json.encode('utf-8')
+        self.json_bytes = raw
+        self.json_gzip = gzip.compress(raw, mtime=0)
+        self.etag = hashlib.sha256(raw).hexdigest()[:16]
+        self.last_modified = datetime.fromtimestamp(mtime, tz=timezone.utc)
+
+
+class HistoryCache:
+    """
+    Historique des communes, relu uniquement lorsque la source change
+    (mtime) : le store colonnaire si store_dir est fourni et existe, sinon
+    le CSV.
+    """
+
+    def __init__(self, csv_path=CSV_PATH, store_dir=None):
+        self.csv_path = csv_path
+        self.store_dir = store_dir
+        self._payload = None
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        mtime = os.stat(history_signature(self.csv_path, self.store_dir)).st_mtime
+        payload = self._payload
+        if payload is not None and mtime == self._mtime:
+            return payload
+        with self._lock:
+            if self._payload is None or mtime != self._mtime:
+                df = load_history(['Commune'] + HISTORY_COLUMNS, self.csv_path, self.store_dir)
+                self._payload = HistoryPayload(build_history(df), mtime)
+                self._mtime = mtime
+            return self._payload
+
+
+# Instance globale du cache
+history_cache = HistoryCache(store_dir=STORE_DIR)
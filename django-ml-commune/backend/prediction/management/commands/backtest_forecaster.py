@@ -0,0 +1,71 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction.ml.backtest import CACHE_DIR, ENGINES, commune_errors, run_backtest
+from prediction.ml.store import load_history
+
+
+class Command(BaseCommand):
+    help = ("Backtest à origine glissante des moteurs de prévision (forêt, tendance) : "
+            "erreur par commune et temps par pli, plis en parallèle et mis en cache")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=1,
+                            help="Années prédites après chaque coupure")
+        parser.add_argument('--min-train-years', type=int, default=5,
+                            help="Années d'historique avant la première coupure")
+        parser.add_argument('--engines', nargs='+', choices=sorted(ENGINES), default=sorted(ENGINES))
+        parser.add_argument('--params', default='{}',
+                            help='Réglages JSON par moteur, ex. \'{"foret": {"n_estimators": 50}}\'')
+        parser.add_argument('--communes', nargs='+', help="Communes évaluées (toutes par défaut)")
+        parser.add_argument('--workers', type=int, help="Processus du pool (nombre de CPU par défaut)")
+        parser.add_argument('--cache-dir', default=CACHE_DIR)
+        parser.add_argument('--no-cache', action='store_true')
+        parser.add_argument('--output', help="CSV de la table d'erreurs par commune")
+
+    def handle(self, *args, **options):
+        try:
+            overrides = json.loads(options['params'])
+        except json.JSONDecodeError as e:
+            raise CommandError(f"--params invalide : {e}")
+        engines = {name: dict(ENGINES[name], **overrides.get(name, {})) for name in options['engines']}
+
+        data = load_history()
+        if options['communes']:
+            data = data[data['Commune'].isin(options['communes'])]
+            if data.empty:
+                raise CommandError("Aucune des communes demandées n'est dans l'historique")
+        first, last = int(data['Année'].min()), int(data['Année'].max())
+        cutoffs = list(range(first + options['min_train_years'] - 1, last))
+        if not cutoffs:
+            raise CommandError(f"Historique {first}-{last} trop court pour --min-train-years")
+
+        start = time.perf_counter()
+        errors, timings = run_backtest(
+            data, cutoffs, horizon=options['horizon'], engines=engines, workers=options['workers'],
+            cache_dir=None if options['no_cache'] else options['cache_dir'],
+        )
+        elapsed = time.perf_counter() - start
+
+        table = commune_errors(errors)
+        with_index = table.reset_index()
+        self.stdout.write(with_index.to_string(index=False, float_format=lambda v: f'{v:.2f}'))
+        if options['output']:
+            with_index.to_csv(options['output'], index=False)
+        excluded = int(table['MAPE exclus'].sum())
+        if excluded:
+            self.stdout.write(f"{excluded} valeurs réelles nulles exclues du MAPE")
+
+        self.stdout.write('')
+        self.stdout.write(timings.to_string(index=False, float_format=lambda v: f'{v:.1f}'))
+        self.stdout.write('')
+        for engine, rows in errors.groupby('moteur'):
+            mae = ', '.join(f"{rows[column].abs().mean():.2f}" for column in rows if column.startswith('erreur'))
+            self.stdout.write(f"{engine} : MAE (recettes, dépenses) {mae} M€")
+        computed = int((~timings['cache']).sum())
+        self.stdout.write(
+            f"{len(timings)} plis ({computed} calculés, {len(timings) - computed} en cache) "
+            f"en {elapsed:.2f} s"
+        )
@@ -0,0 +1,96 @@
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+
+from prediction.ml.store import ColumnStore, load_history, write_store
+
+PROJECTION = ['Commune', 'Recettes (M€)']
+
+# Chargements comparés : (nom, fonction(csv_path, store_dir))
+CASES = [
+    ('CSV complet', lambda csv, store: load_history(csv_path=csv, store_dir=None)),
+    ('CSV 2 colonnes', lambda csv, store: load_history(PROJECTION, csv_path=csv, store_dir=None)),
+    ('store complet', lambda csv, store: load_history(csv_path=csv, store_dir=store)),
+    ('store 2 colonnes', lambda csv, store: load_history(PROJECTION, csv_path=csv, store_dir=store)),
+    # Agrégat directement sur la colonne memory-mappée, sans DataFrame
+    ('store mmap somme', lambda csv, store: float(ColumnStore(store, ['Recettes (M€)']).column('Recettes (M€)').sum())),
+]
+
+
+def _status_mb(field):
+    # VmRSS : mémoire résidente, VmHWM : son pic (Ko, propres au processus
+    # contrairement à ru_maxrss, hérité à travers exec)
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def _measure(index, csv_path, store_dir, repeat):
+    """Exécuté dans un processus neuf : temps médian, RSS résident et pic"""
+    load = CASES[index][1]
+    base_rss, base_peak = _status_mb('VmRSS'), _status_mb('VmHWM')
+    timings, result = [], None
+    for _ in range(repeat):
+        result = None
+        start = time.perf_counter()
+        result = load(csv_path, store_dir)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000, _status_mb('VmRSS') - base_rss, _status_mb('VmHWM') - base_peak
+
+
+def synthetic_history(n_communes, years, seed=0):
+    """Historique fictif n_communes × années (dernière année 2023), trié par commune"""
+    rng = np.random.default_rng(seed)
+    annees = np.arange(2024 - years, 2024)
+    communes = np.array([f'Commune {i:05d}' for i in range(n_communes)], dtype=object)
+    niveau = rng.lognormal(1.0, 1.2, n_communes)
+    croissance = 1 + rng.normal(0.02, 0.01, (n_communes, years))
+    recettes = np.round(niveau[:, None] * np.cumprod(croissance, axis=1), 2)
+    return pd.DataFrame({
+        'Commune': np.repeat(communes, years),
+        'Année': np.tile(annees, n_communes),
+        'Recettes (M€)': recettes.ravel(),
+        'Dépenses (M€)': np.round(recettes.ravel() * rng.uniform(0.85, 1.05, recettes.size), 2),
+    })
+
+
+class Command(BaseCommand):
+    help = ("Compare le chargement de l'historique depuis le CSV et depuis le store colonnaire "
+            "(temps et mémoire résidente), sur des données synthétiques")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--communes', type=int, default=35000)
+        parser.add_argument('--years', type=int, default=30)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        data = synthetic_history(options['communes'], options['years'])
+        # Chaque mesure dans un processus neuf : RSS non pollué par les précédentes
+        context = multiprocessing.get_context('spawn')
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            csv_path = os.path.join(tmp_dir, 'historique.csv')
+            store_dir = os.path.join(tmp_dir, 'store')
+            data.to_csv(csv_path, index=False)
+            write_store(data, store_dir)
+            store_size = sum(entry.stat().st_size for entry in os.scandir(store_dir))
+            self.stdout.write(
+                f"{len(data)} lignes ({options['communes']} communes × {options['years']} ans) ; "
+                f"CSV {os.path.getsize(csv_path) / 2 ** 20:.1f} Mo, store {store_size / 2 ** 20:.1f} Mo"
+            )
+            del data
+
+            self.stdout.write(f"{'chargement':>18} {'temps (ms)':>12} {'RSS (Mo)':>10} {'pic (Mo)':>10}")
+            reference = None
+            for index, (name, _) in enumerate(CASES):
+                with context.Pool(1) as pool:
+                    ms, rss, peak = pool.apply(_measure, (index, csv_path, store_dir, options['repeat']))
+                reference = reference or ms
+                self.stdout.write(f"{name:>18} {ms:>12.1f} {rss:>10.1f} {peak:>10.1f}  ({reference / ms:.1f}x)")
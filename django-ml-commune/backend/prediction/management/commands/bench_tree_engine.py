@@ -0,0 +1,45 @@
+import statistics
+import time
+
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from prediction.ml.registry import ENCODER_PATH, MODEL_PATH
+from prediction.ml.tree_engine import CompiledForest
+
+
+def _timeit(func, X, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare la forêt scikit-learn et la forêt compilée (latence de predict)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 64, 10000])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        model = joblib.load(MODEL_PATH)
+        n_communes = len(joblib.load(ENCODER_PATH).classes_)
+        forest = CompiledForest.from_sklearn(model)
+        rng = np.random.default_rng(0)
+
+        self.stdout.write(f"{'lot':>8} {'sklearn (ms)':>14} {'compilé (ms)':>14} {'gain':>8}")
+        for size in options['sizes']:
+            X = np.column_stack([
+                rng.integers(0, n_communes, size),
+                rng.integers(2000, 2060, size),
+            ])
+            if not np.array_equal(model.predict(X), forest.predict(X)):
+                self.stderr.write(f"Écart de prédiction pour un lot de {size}")
+            repeat = max(3, options['repeat'] if size < 1000 else options['repeat'] // 10)
+            sk = _timeit(model.predict, X, repeat)
+            compiled = _timeit(forest.predict, X, repeat)
+            self.stdout.write(f"{size:>8} {sk:>14.3f} {compiled:>14.3f} {sk / compiled:>7.1f}x")
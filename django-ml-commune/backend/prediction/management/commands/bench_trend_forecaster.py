@@ -0,0 +1,94 @@
+import statistics
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import LabelEncoder
+
+from prediction.ml.store import load_history
+from prediction.ml.tree_engine import CompiledForest
+from prediction.ml.trend import TrendForecaster
+
+TARGETS = ['Recettes (M€)', 'Dépenses (M€)']
+
+# Variantes de tendance comparées à la forêt : (nom, kind, damping)
+VARIANTS = [
+    ('linéaire', 'linear', None),
+    ('linéaire amortie 0.8', 'linear', 0.8),
+    ('log-linéaire', 'loglinear', None),
+    ('log-lin. amortie 0.8', 'loglinear', 0.8),
+]
+
+
+def _median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = ("Compare la forêt et les tendances par commune : temps d'ajustement, latence "
+            "de predict et erreur sur les dernières années tenues à l'écart")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--horizon', type=int, default=3,
+                            help="Dernières années retirées de l'entraînement pour le backtest")
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 64, 10000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        data = load_history()
+        le = LabelEncoder().fit(data['Commune'])
+        codes = le.transform(data['Commune'])
+        annees = data['Année'].to_numpy()
+        y = data[TARGETS].to_numpy()
+        n_communes = len(le.classes_)
+
+        derniere = int(annees.max())
+        train = annees <= derniere - options['horizon']
+        test = ~train
+        X = np.column_stack([codes, annees])
+
+        def fit_forest():
+            model = RandomForestRegressor(n_estimators=100, random_state=42)
+            return model.fit(X[train], y[train])
+
+        engines = [('forêt', fit_forest)] + [
+            (name, lambda kind=kind, damping=damping: TrendForecaster.fit(
+                codes[train], annees[train], y[train], n_communes, kind=kind, damping=damping))
+            for name, kind, damping in VARIANTS
+        ]
+
+        self.stdout.write(
+            f"{len(data)} lignes, {n_communes} communes ; backtest sur {derniere - options['horizon'] + 1}"
+            f"-{derniere} ({test.sum()} lignes)"
+        )
+        self.stdout.write(f"{'moteur':>22} {'fit (ms)':>10} {'MAE (M€)':>10} {'MAPE':>7}")
+        models = {}
+        for name, fit in engines:
+            fit_ms = _median_ms(fit, 3 if name == 'forêt' else options['repeat'])
+            model = fit()
+            if name == 'forêt':
+                model = CompiledForest.from_sklearn(model)
+            models[name] = model
+            erreur = model.predict(X[test]) - y[test]
+            mae = np.abs(erreur).mean()
+            # Valeurs réelles nulles exclues du MAPE
+            reel = y[test]
+            mape = np.abs(erreur[reel != 0] / reel[reel != 0]).mean() * 100
+            self.stdout.write(f"{name:>22} {fit_ms:>10.2f} {mae:>10.2f} {mape:>6.1f}%")
+
+        # Latence de predict, années jusqu'à 30 ans après la dernière
+        rng = np.random.default_rng(0)
+        forest, trend = models['forêt'], models[VARIANTS[0][0]]
+        self.stdout.write(f"\n{'lot':>8} {'forêt (ms)':>12} {'tendance (ms)':>14} {'gain':>8}")
+        for size in options['sizes']:
+            Xp = np.column_stack([rng.integers(0, n_communes, size), rng.integers(2010, derniere + 30, size)])
+            repeat = max(3, options['repeat'] if size < 1000 else options['repeat'] // 4)
+            f_ms = _median_ms(lambda: forest.predict(Xp), repeat)
+            t_ms = _median_ms(lambda: trend.predict(Xp), repeat)
+            self.stdout.write(f"{size:>8} {f_ms:>12.3f} {t_ms:>14.3f} {f_ms / t_ms:>7.1f}x")
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from prediction.ml.ingest import CHUNK_ROWS, UNITS, ingest_workbook
+from prediction.ml.store import CSV_PATH, STORE_DIR
+
+
+class Command(BaseCommand):
+    help = ("Convertit un classeur Excel de comptes communaux en CSV et store colonnaire, "
+            "en flux (lecture seule, lot par lot, mémoire bornée)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Classeur source (.xlsx)")
+        parser.add_argument('--sheet', help="Feuille à lire (feuille active par défaut)")
+        parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                            help="Lignes normalisées et écrites à la fois")
+        parser.add_argument('--unit', default='meur', choices=sorted(UNITS),
+                            help="Unité des montants quand l'en-tête n'en indique pas")
+        parser.add_argument('--csv', default=CSV_PATH, help="CSV produit")
+        parser.add_argument('--store', default=STORE_DIR, help="Store colonnaire produit")
+        parser.add_argument('--no-csv', action='store_true', help="N'écrit que le store")
+
+    def handle(self, *args, **options):
+        def progress(read, kept, seconds):
+            self.stdout.write(f"{read:>10} lignes lues, {kept:>10} gardées, {read / max(seconds, 1e-9):>9.0f} lignes/s")
+
+        try:
+            stats = ingest_workbook(
+                options['path'],
+                csv_path=None if options['no_csv'] else options['csv'],
+                store_dir=options['store'],
+                sheet=options['sheet'],
+                chunk_rows=options['chunk_rows'],
+                default_unit=options['unit'],
+                progress=progress,
+            )
+        except (OSError, KeyError, ValueError) as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{stats['kept']} lignes ({stats['read'] - stats['kept']} écartées), {stats['communes']} communes "
+            f"en {stats['seconds']:.1f} s ({stats['read'] / max(stats['seconds'], 1e-9):.0f} lignes/s)"
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2 on 2026-10-17 17:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Commune',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('population', models.IntegerField(blank=True, null=True)),
+                ('area', models.FloatField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Prediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('predicted_revenue', models.FloatField()),
+                ('predicted_expense', models.FloatField()),
+                ('model_version', models.CharField(default='', max_length=32)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('commune', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='prediction.commune')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('commune', 'year'), name='unique_prediction_commune_year')],
+            },
+        ),
+    ]
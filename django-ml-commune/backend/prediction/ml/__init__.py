@@ -0,0 +1,3 @@
+# backend/prediction/ml/__init__.py
+
+# Outils de préparation, d'entraînement et de service du modèle.
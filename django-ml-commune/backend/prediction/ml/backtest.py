@@ -0,0 +1,179 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestRegressor
+
+from prediction.ml.store import ML_DIR
+from prediction.ml.trend import TrendForecaster
+
+# Résultats des plis déjà évalués, par clé (données du pli + réglages)
+CACHE_DIR = os.path.join(ML_DIR, 'backtest_cache')
+
+TARGETS = ['Recettes (M€)', 'Dépenses (M€)']
+
+# Réglages par défaut des moteurs évalués
+ENGINES = {
+    'foret': {'n_estimators': 100, 'random_state': 42},
+    'tendance': {'kind': 'loglinear', 'damping': None},
+}
+
+# Données partagées avec les processus du pool (héritées par fork)
+_DATA = None
+
+
+class BacktestData:
+    """Historique en tableaux : codes des communes, années, cibles"""
+
+    def __init__(self, df):
+        categories = pd.Categorical(df['Commune'])
+        self.communes = [str(c) for c in categories.categories]
+        self.codes = categories.codes.astype(np.int64)
+        self.annees = df['Année'].to_numpy(dtype=np.int64)
+        self.y = df[TARGETS].to_numpy(dtype=np.float64)
+
+    def fold_rows(self, cutoff, horizon):
+        """
+        Lignes d'entraînement (années <= cutoff) et de test (les horizon
+        années suivantes, communes vues à l'entraînement seulement)
+        """
+        train = self.annees <= cutoff
+        test = (self.annees > cutoff) & (self.annees <= cutoff + horizon)
+        test &= np.isin(self.codes, np.unique(self.codes[train]))
+        return train, test
+
+    def fold_hash(self, cutoff, horizon):
+        """Empreinte des seules lignes utilisées par le pli"""
+        rows = self.annees <= cutoff + horizon
+        digest = hashlib.sha256()
+        for values in (self.codes[rows], self.annees[rows], self.y[rows]):
+            digest.update(np.ascontiguousarray(values).tobytes())
+        # Les codes dépendent de l'ordre des communes : libellés inclus
+        digest.update('\n'.join(self.communes).encode('utf-8'))
+        return digest.hexdigest()
+
+
+def fold_key(data, engine, params, cutoff, horizon):
+    spec = json.dumps({'engine': engine, 'params': params, 'cutoff': cutoff, 'horizon': horizon},
+                      sort_keys=True)
+    return hashlib.sha256((spec + data.fold_hash(cutoff, horizon)).encode()).hexdigest()[:20]
+
+
+def fit_predict(data, engine, params, train, test):
+    if engine == 'foret':
+        model = RandomForestRegressor(n_jobs=1, **params)
+        X = np.column_stack([data.codes, data.annees])
+        start = time.perf_counter()
+        model.fit(X[train], data.y[train])
+        fitted = time.perf_counter()
+        predictions = model.predict(X[test])
+    elif engine == 'tendance':
+        start = time.perf_counter()
+        model = TrendForecaster.fit(data.codes[train], data.annees[train], data.y[train],
+                                    len(data.communes), **params)
+        fitted = time.perf_counter()
+        predictions = model.predict(np.column_stack([data.codes[test], data.annees[test]]))
+    else:
+        raise ValueError(f"Moteur inconnu : {engine} ({', '.join(ENGINES)})")
+    return predictions.reshape(-1, len(TARGETS)), fitted - start, time.perf_counter() - fitted
+
+
+def _init_worker(data):
+    global _DATA
+    _DATA = data
+
+
+def _run_fold(task):
+    engine, params, cutoff, horizon = task
+    train, test = _DATA.fold_rows(cutoff, horizon)
+    predictions, fit_s, predict_s = fit_predict(_DATA, engine, params, train, test)
+    return task, predictions, fit_s, predict_s
+
+
+def run_backtest(df, cutoffs, horizon=1, engines=None, workers=None, cache_dir=CACHE_DIR):
+    """
+    Backtest à origine glissante : pour chaque année de coupure, chaque
+    moteur est entraîné sur les années <= coupure et évalué sur les horizon
+    années suivantes. Les plis sont évalués dans un pool de processus
+    (fork) ; ceux déjà présents dans cache_dir ne sont pas recalculés.
+
+    Retourne (erreurs par ligne de test, temps par pli) en DataFrames.
+    """
+    data = BacktestData(df)
+    engines = engines or ENGINES
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    folds, pending = {}, []
+    for engine, params in engines.items():
+        for cutoff in cutoffs:
+            task = (engine, params, cutoff, horizon)
+            key = fold_key(data, engine, params, cutoff, horizon)
+            path = os.path.join(cache_dir, f'{key}.npz') if cache_dir else None
+            if path and os.path.exists(path):
+                with np.load(path) as cached:
+                    folds[engine, cutoff] = (cached['predictions'], float(cached['fit_s']),
+                                             float(cached['predict_s']), True)
+            else:
+                pending.append((task, path))
+
+    if pending:
+        tasks = [task for task, _ in pending]
+        workers = min(workers or os.cpu_count() or 1, len(tasks))
+        if workers > 1:
+            context = multiprocessing.get_context('fork')
+            with context.Pool(workers, initializer=_init_worker, initargs=(data,)) as pool:
+                results = pool.map(_run_fold, tasks, chunksize=1)
+        else:
+            _init_worker(data)
+            results = [_run_fold(task) for task in tasks]
+        for (task, path), (_, predictions, fit_s, predict_s) in zip(pending, results):
+            engine, _, cutoff, _ = task
+            folds[engine, cutoff] = (predictions, fit_s, predict_s, False)
+            if path:
+                tmp_path = path + '.tmp.npz'
+                np.savez(tmp_path, predictions=predictions, fit_s=fit_s, predict_s=predict_s)
+                os.replace(tmp_path, path)
+
+    errors, timings = [], []
+    for (engine, cutoff), (predictions, fit_s, predict_s, cached) in sorted(folds.items()):
+        train, test = data.fold_rows(cutoff, horizon)
+        actual = data.y[test]
+        errors.append(pd.DataFrame({
+            'moteur': engine,
+            'coupure': cutoff,
+            'commune': np.asarray(data.communes, dtype=object)[data.codes[test]],
+            'annee': data.annees[test],
+            **{f'erreur {t}': predictions[:, j] - actual[:, j] for j, t in enumerate(TARGETS)},
+            **{f'reel {t}': actual[:, j] for j, t in enumerate(TARGETS)},
+        }))
+        timings.append({
+            'moteur': engine, 'coupure': cutoff, 'entrainement': int(train.sum()), 'test': int(test.sum()),
+            'fit_ms': fit_s * 1000, 'predict_ms': predict_s * 1000, 'cache': cached,
+        })
+    return pd.concat(errors, ignore_index=True), pd.DataFrame(timings)
+
+
+def commune_errors(errors):
+    """
+    Erreurs par moteur et commune : MAE de chaque cible (M€) et MAPE (%).
+    Les valeurs réelles nulles sont exclues du MAPE (erreur relative
+    infinie) et comptées dans 'MAPE exclus'.
+    """
+    frame = errors[['moteur', 'commune']].copy()
+    absolute, excluded = [], 0
+    for target in TARGETS:
+        frame[f'MAE {target}'] = errors[f'erreur {target}'].abs()
+        actual = errors[f'reel {target}']
+        absolute.append((errors[f'erreur {target}'] / actual.where(actual != 0)).abs())
+        excluded = excluded + (actual == 0)
+    frame['MAPE (%)'] = pd.concat(absolute, axis=1).mean(axis=1) * 100
+    groups = frame.groupby(['moteur', 'commune'], sort=True)
+    table = groups.mean()
+    table['MAPE exclus'] = excluded.groupby([frame['moteur'], frame['commune']], sort=True).sum()
+    table['points'] = groups.size()
+    return table
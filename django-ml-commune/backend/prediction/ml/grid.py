@@ -0,0 +1,91 @@
+import json
+import os
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+GRID_PATH = os.path.join(ML_DIR, 'prediction_grid.npy')
+GRID_META_PATH = os.path.join(ML_DIR, 'prediction_grid.json')
+
+# Nombre d'années précalculées au-delà de la dernière année d'entraînement
+GRID_HORIZON = 30
+
+
+class PredictionGrid:
+    """
+    Table dense des prédictions, indexée par (code commune, année - annee_debut).
+
+    Le tableau a la forme (n_communes, n_annees, 2) : recettes, dépenses.
+    """
+
+    def __init__(self, values, annee_debut, model_version):
+        self.values = values
+        self.annee_debut = annee_debut
+        self.annee_fin = annee_debut + values.shape[1] - 1
+        self.model_version = model_version
+
+    def contains(self, annees):
+        """Masque des années couvertes par la grille"""
+        annees = np.asarray(annees)
+        return (annees >= self.annee_debut) & (annees <= self.annee_fin)
+
+    def lookup(self, codes, annees):
+        """Prédictions pour des codes et années supposés dans la grille"""
+        return self.values[np.asarray(codes), np.asarray(annees) - self.annee_debut]
+
+    def info(self):
+        return {
+            'annee_debut': self.annee_debut,
+            'annee_fin': self.annee_fin,
+            'shape': list(self.values.shape),
+        }
+
+
+def build_grid(model, n_communes, annee_debut, annee_fin):
+    """Calcule toutes les prédictions communes × années en un seul appel"""
+    annees = np.arange(annee_debut, annee_fin + 1)
+    X = np.empty((n_communes * len(annees), 2), dtype=np.int64)
+    X[:, 0] = np.repeat(np.arange(n_communes), len(annees))
+    X[:, 1] = np.tile(annees, n_communes)
+    values = np.asarray(model.predict(X), dtype=np.float64)
+    return values.reshape(n_communes, len(annees), -1)
+
+
+def save_grid(values, annee_debut, model_version, grid_path=GRID_PATH,
+              meta_path=GRID_META_PATH):
+    """Écrit la grille puis ses métadonnées, chacune par remplacement atomique"""
+    tmp_path = grid_path + '.tmp.npy'
+    np.save(tmp_path, values)
+    os.replace(tmp_path, grid_path)
+
+    meta = {
+        'annee_debut': int(annee_debut),
+        'annee_fin': int(annee_debut + values.shape[1] - 1),
+        'model_version': model_version,
+    }
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, meta_path)
+
+
+def read_grid_meta(meta_path=GRID_META_PATH):
+    """Métadonnées de la grille, ou None si elle n'a jamais été générée"""
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def load_grid(model_version, grid_path=GRID_PATH, meta_path=GRID_META_PATH):
+    """
+    Ouvre la grille en lecture seule (memory-map) si elle correspond à la
+    version du modèle servie, sinon retourne None.
+    """
+    meta = read_grid_meta(meta_path)
+    if meta is None or meta['model_version'] != model_version:
+        return None
+    if not os.path.exists(grid_path):
+        return None
+    values = np.load(grid_path, mmap_mode='r')
+    return PredictionGrid(values, meta['annee_debut'], model_version)
@@ -0,0 +1,85 @@
+import numpy as np
+from sklearn.tree._tree import Tree
+
+# Mise à jour incrémentale d'une forêt de régression scikit-learn entraînée
+# sur (commune, année). Chaque feuille atteinte par des lignes d'une année
+# nouvelle devient un noeud « année < seuil » : à gauche l'ancienne
+# feuille, inchangée, à droite une feuille dont la valeur est la moyenne
+# des nouvelles lignes. Les prédictions des années déjà apprises restent
+# identiques ; le coût dépend des nouvelles lignes et non de l'historique.
+
+
+def extend_tree(tree, X, y, feature, threshold):
+    """
+    Retourne une copie de tree (sklearn.tree._tree.Tree) dont les feuilles
+    atteintes par X sont scindées sur feature au seuil threshold. X doit
+    être entièrement au-dessus du seuil, l'historique en dessous.
+    """
+    state = tree.__getstate__()
+    nodes, values = state['nodes'], state['values']
+    leaves, inverse = np.unique(tree.apply(X), return_inverse=True)
+    depth = np.diff(tree.decision_path(X).indptr) - 1
+    n_leaves, n_nodes = len(leaves), len(nodes)
+
+    counts = np.bincount(inverse, minlength=n_leaves)
+    sums = np.stack([np.bincount(inverse, weights=y[:, j], minlength=n_leaves) for j in range(y.shape[1])], axis=1)
+    squares = np.stack([np.bincount(inverse, weights=y[:, j] ** 2, minlength=n_leaves) for j in range(y.shape[1])], axis=1)
+    means = sums / counts[:, None]
+
+    nodes = np.concatenate([nodes, np.zeros(2 * n_leaves, dtype=nodes.dtype)])
+    values = np.concatenate([values, np.zeros((2 * n_leaves,) + values.shape[1:])])
+    left = n_nodes + 2 * np.arange(n_leaves)
+    right = left + 1
+
+    # Gauche : l'ancienne feuille telle quelle
+    nodes[left] = nodes[leaves]
+    values[left] = values[leaves]
+
+    # Droite : feuille des nouvelles lignes (impureté MSE moyennée sur les sorties)
+    new_leaves = nodes[right]
+    new_leaves['left_child'] = new_leaves['right_child'] = -1
+    new_leaves['feature'] = -2
+    new_leaves['threshold'] = -2.0
+    new_leaves['impurity'] = np.maximum(squares / counts[:, None] - means ** 2, 0.0).mean(axis=1)
+    new_leaves['n_node_samples'] = counts
+    new_leaves['weighted_n_node_samples'] = counts
+    nodes[right] = new_leaves
+    values[right] = means[:, :, None]
+
+    # L'ancienne feuille devient le noeud de séparation
+    split = nodes[leaves]
+    weight = split['weighted_n_node_samples']
+    values[leaves] = (values[leaves] * weight[:, None, None] + sums[:, :, None]) / (weight + counts)[:, None, None]
+    split['left_child'] = left
+    split['right_child'] = right
+    split['feature'] = feature
+    split['threshold'] = threshold
+    split['n_node_samples'] += counts
+    split['weighted_n_node_samples'] += counts
+    nodes[leaves] = split
+
+    extended = Tree(tree.n_features, np.ones(tree.n_outputs, dtype=np.intp), tree.n_outputs)
+    extended.__setstate__({
+        'max_depth': max(state['max_depth'], int(depth.max()) + 1),
+        'node_count': len(nodes),
+        'nodes': nodes,
+        'values': values,
+    })
+    return extended
+
+
+def extend_forest(model, X, y, feature=1):
+    """
+    Intègre de nouvelles années à une forêt de régression, année par année
+    (feature : colonne de l'année dans X). Les années de X doivent être
+    postérieures à celles de l'entraînement.
+    """
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float64).reshape(len(X), -1)
+    if y.shape[1] != model.n_outputs_:
+        raise ValueError(f"{y.shape[1]} sorties, la forêt en attend {model.n_outputs_}")
+    for annee in np.unique(X[:, feature]):
+        rows = X[:, feature] == annee
+        for estimator in model.estimators_:
+            estimator.tree_ = extend_tree(estimator.tree_, X[rows], y[rows], feature, float(annee) - 0.5)
+    return model
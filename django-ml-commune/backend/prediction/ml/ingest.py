@@ -0,0 +1,155 @@
+import os
+import re
+import time
+import unicodedata
+
+import pandas as pd
+
+from prediction.ml.store import COLUMNS, CSV_PATH, STORE_DIR, StoreWriter
+
+# Lignes du classeur normalisées et écrites à la fois
+CHUNK_ROWS = 50_000
+
+# Facteur de conversion vers le M€, par unité lue dans l'en-tête
+# (ex. « Recettes (k€) ») ou passée par défaut
+UNITS = {'eur': 1e-6, '€': 1e-6, 'keur': 1e-3, 'k€': 1e-3, 'meur': 1.0, 'm€': 1.0}
+
+VALUE_COLUMNS = ['Recettes (M€)', 'Dépenses (M€)']
+
+# En-tête sans accents ni casse -> colonne de l'historique
+HEADERS = {'commune': 'Commune', 'annee': 'Année', 'recettes': 'Recettes (M€)', 'depenses': 'Dépenses (M€)'}
+
+
+def _ascii(text):
+    text = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in text if not unicodedata.combining(c)).strip().lower()
+
+
+def map_header(header, default_unit='meur'):
+    """
+    Associe chaque colonne de l'historique à (index dans l'en-tête,
+    facteur vers le M€). Les autres colonnes du classeur sont ignorées.
+    """
+    mapping = {}
+    for index, cell in enumerate(header):
+        if cell is None:
+            continue
+        match = re.match(r'^([^(]+?)\s*(?:\(([^)]*)\))?$', str(cell).strip())
+        if not match:
+            continue
+        column = HEADERS.get(_ascii(match.group(1)))
+        if column is None or column in mapping:
+            continue
+        unit = (match.group(2) or default_unit).strip().lower().replace(' ', '')
+        if column in VALUE_COLUMNS and unit not in UNITS:
+            raise ValueError(f"Unité inconnue pour {cell} : {unit} ({', '.join(UNITS)})")
+        mapping[column] = (index, UNITS[unit] if column in VALUE_COLUMNS else 1.0)
+    missing = [column for column in COLUMNS if column not in mapping]
+    if missing:
+        raise ValueError(f"Colonnes absentes de l'en-tête : {', '.join(missing)}")
+    return mapping
+
+
+def _numbers(series):
+    # Nombres saisis en texte à la française : « 1 234,5 »
+    if series.dtype == object:
+        series = series.astype(str).str.replace(r'\s', '', regex=True).str.replace(',', '.')
+    return pd.to_numeric(series, errors='coerce')
+
+
+def normalize_chunk(df, factors=None):
+    """
+    Normalise un lot aux colonnes de l'historique : noms de communes
+    (Unicode NFC, espaces), années entières, montants en M€. Les lignes
+    incomplètes sont écartées.
+    """
+    factors = factors or {}
+    communes = df['Commune'].astype('string').str.normalize('NFC')
+    communes = communes.str.replace(r'\s+', ' ', regex=True).str.strip().replace('', pd.NA)
+    data = pd.DataFrame({
+        'Commune': communes.astype(object),
+        'Année': _numbers(df['Année']),
+    })
+    for column in VALUE_COLUMNS:
+        data[column] = (_numbers(df[column]) * factors.get(column, 1.0)).round(6)
+    data = data.dropna()
+    data['Année'] = data['Année'].astype(int)
+    return data
+
+
+def iter_workbook(path, sheet=None, chunk_rows=CHUNK_ROWS, default_unit='meur'):
+    """
+    Parcourt le classeur en lecture seule, ligne par ligne, et génère des
+    lots normalisés (DataFrame, lignes lues) : seul un lot est en mémoire.
+    """
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.active
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError(f"Classeur vide (aucun en-tête) : {path}")
+        mapping = map_header(header, default_unit)
+        indexes = [index for index, _ in mapping.values()]
+        factors = {column: factor for column, (_, factor) in mapping.items()}
+
+        def flush(buffer):
+            raw = pd.DataFrame.from_records(buffer, columns=list(mapping))
+            return normalize_chunk(raw, factors), len(buffer)
+
+        buffer = []
+        for row in rows:
+            buffer.append([row[index] if index < len(row) else None for index in indexes])
+            if len(buffer) >= chunk_rows:
+                yield flush(buffer)
+                buffer = []
+        if buffer:
+            yield flush(buffer)
+    finally:
+        workbook.close()
+
+
+def ingest_workbook(path, csv_path=CSV_PATH, store_dir=STORE_DIR, sheet=None,
+                    chunk_rows=CHUNK_ROWS, default_unit='meur', progress=None):
+    """
+    Convertit un classeur Excel en CSV et/ou store colonnaire, écrits lot
+    par lot. progress(lignes lues, lignes gardées, secondes) est appelé
+    après chaque lot. Les sorties ne sont remplacées qu'une fois la
+    conversion terminée, et jamais par un historique vide (ValueError).
+    """
+    start = time.perf_counter()
+    read = kept = 0
+    csv_tmp = csv_path + '.tmp' if csv_path else None
+    # Taille et mtime du CSV relevés à la fermeture du store (conservés par os.replace)
+    writer = StoreWriter(store_dir, source=csv_tmp) if store_dir else None
+    try:
+        csv_file = open(csv_tmp, 'w', encoding='utf-8', newline='') if csv_tmp else None
+        try:
+            for chunk, n_rows in iter_workbook(path, sheet, chunk_rows, default_unit):
+                if csv_file is not None:
+                    chunk.to_csv(csv_file, index=False, header=read == 0)
+                if writer is not None:
+                    writer.append(chunk)
+                read += n_rows
+                kept += len(chunk)
+                if progress is not None:
+                    progress(read, kept, time.perf_counter() - start)
+            if kept == 0:
+                raise ValueError(f"Aucune ligne exploitable ({read} lues) : {path}")
+        finally:
+            if csv_file is not None:
+                csv_file.close()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        if csv_tmp and os.path.exists(csv_tmp):
+            os.remove(csv_tmp)
+        raise
+    if writer is not None:
+        writer.close()
+    if csv_tmp:
+        os.replace(csv_tmp, csv_path)
+    communes = writer.n_communes if writer is not None else None
+    return {'read': read, 'kept': kept, 'communes': communes, 'seconds': time.perf_counter() - start}
@@ -1,25 +1,45 @@
+import os
+import sys
+
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.preprocessing import LabelEncoder
-import joblib
 
-# Charger les données préparées
-df = pd.read_csv('backend/prediction/ml/donnees_communes.csv')
+# Permet l'exécution directe du script depuis n'importe quel répertoire
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from prediction.ml.ingest import ingest_workbook, map_header, normalize_chunk
+from prediction.ml.store import CSV_PATH, STORE_DIR, write_store
+
+EXCEL_EXTENSIONS = ('.xlsx', '.xlsm')
+
+
+def prepare_data(source_path=CSV_PATH, default_unit='meur'):
+    # Colonnes attendues (unités converties en M€), lignes incomplètes écartées
+    data = pd.read_csv(source_path)
+    mapping = map_header(list(data.columns), default_unit)
+    raw = data.iloc[:, [index for index, _ in mapping.values()]]
+    raw.columns = list(mapping)
+    data = normalize_chunk(raw, {column: factor for column, (_, factor) in mapping.items()})
+    if data.empty:
+        raise ValueError(f"Aucune ligne exploitable ({len(raw)} lues) : {source_path}")
+    return data
 
-# Encodage de la commune
-le = LabelEncoder()
-df['Commune_enc'] = le.fit_transform(df['Commune'])
 
-# Features et cibles
-X = df[['Commune_enc', 'Année']]
-y = df[['Recettes (M€)', 'Dépenses (M€)']]
+def save_data(data, csv_path=CSV_PATH, store_dir=STORE_DIR):
+    # CSV de référence (lisible) et store colonnaire lu par load_history
+    data.to_csv(csv_path, index=False)
+    write_store(data, store_dir, source=csv_path)
 
-# Entraînement du modèle
-model = RandomForestRegressor(n_estimators=100, random_state=42)
-model.fit(X, y)
 
-# Sauvegarde du modèle et de l’encodeur
-joblib.dump(model, 'backend/prediction/ml/model_rf.pkl')
-joblib.dump(le, 'backend/prediction/ml/label_encoder.pkl')
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else CSV_PATH
+    if source.lower().endswith(EXCEL_EXTENSIONS):
+        # Classeur lu en flux, lot par lot (voir la commande ingest_excel)
+        stats = ingest_workbook(source)
+        rows, communes = stats['kept'], stats['communes']
+    else:
+        data = prepare_data(source)
+        save_data(data)
+        rows, communes = len(data), data['Commune'].nunique()
 
-print("✅ Modèle entraîné et sauvegardé dans backend/prediction/ml/model_rf.pkl")
+    print(f"✅ {rows} lignes, {communes} communes")
+    print(f"✅ Données sauvegardées dans {CSV_PATH} et {STORE_DIR}")
@@ -0,0 +1,263 @@
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+
+from .tree_engine import CompiledForest, read_meta
+from .trend import META_FILE as TREND_META_FILE, TrendForecaster
+from .grid import (
+    GRID_PATH, GRID_META_PATH, PredictionGrid, build_grid, load_grid, read_grid_meta
+)
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_PATH = os.path.join(ML_DIR, 'model_rf.pkl')
+ENCODER_PATH = os.path.join(ML_DIR, 'label_encoder.pkl')
+# Forêt exportée en tableaux NumPy (voir tree_engine.py)
+COMPILED_DIR = os.path.join(ML_DIR, 'model_rf_compiled')
+# Tendances par commune (voir trend.py)
+TREND_DIR = os.path.join(ML_DIR, 'model_trend')
+
+# Intervalle minimal (en secondes) entre deux vérifications des fichiers
+CHECK_INTERVAL = 2.0
+
+
+def file_signature(*paths):
+    """Signature bon marché (mtime, taille) des fichiers d'artefacts"""
+    signature = []
+    for path in paths:
+        stat = os.stat(path)
+        signature.append((stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+def file_checksum(*paths):
+    """Empreinte SHA-256 du contenu des fichiers, utilisée comme version"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelBundle:
+    """
+    Modèle et encodeur chargés ensemble, immuables une fois publiés.
+    """
+
+    def __init__(self, model, encoder, version, signature, load_seconds, grid=None):
+        self.model = model
+        self.encoder = encoder
+        self.version = version
+        self.signature = signature
+        self.load_seconds = load_seconds
+        self.grid = grid
+        self.loaded_at = datetime.now(timezone.utc)
+        # Index commune -> code, évite le.transform() sur le chemin chaud
+        self.commune_codes = {
+            commune: code for code, commune in enumerate(encoder.classes_)
+        }
+
+    def encode(self, commune):
+        """Retourne le code de la commune, ou None si elle est inconnue"""
+        return self.commune_codes.get(commune)
+
+    def unknown(self, communes):
+        """Liste (sans doublons) des communes absentes de l'encodeur"""
+        return sorted(set(communes) - self.commune_codes.keys())
+
+    def predict(self, communes, annees):
+        """
+        Prédit recettes et dépenses pour des paires (commune, année).
+
+        Toutes les communes sont encodées en une passe et le modèle n'est
+        appelé qu'une fois sur la matrice complète. Retourne un tableau
+        (n, 2) : recettes, dépenses.
+        """
+        communes = np.asarray(communes, dtype=object)
+        annees = np.asarray(annees, dtype=np.int64)
+        unknown = self.unknown(communes.tolist())
+        if unknown:
+            raise ValueError(f"Communes inconnues : {', '.join(unknown)}")
+        return self.predict_codes(self.encoder.transform(communes), annees)
+
+    def predict_codes(self, codes, annees):
+        """
+        Prédit à partir des codes communes déjà encodés.
+
+        Les années couvertes par la grille précalculée sont lues en O(1) ;
+        le modèle n'est appelé que pour les paires hors grille.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        annees = np.asarray(annees, dtype=np.int64)
+        if self.grid is None:
+            return self._predict_live(codes, annees)
+
+        in_grid = self.grid.contains(annees)
+        if in_grid.all():
+            return np.array(self.grid.lookup(codes, annees))
+        values = np.empty((len(codes), self.grid.values.shape[2]))
+        values[in_grid] = self.grid.lookup(codes[in_grid], annees[in_grid])
+        outside = ~in_grid
+        values[outside] = self._predict_live(codes[outside], annees[outside])
+        return values
+
+    def _predict_live(self, codes, annees):
+        X = np.empty((len(codes), 2), dtype=np.int64)
+        X[:, 0] = codes
+        X[:, 1] = annees
+        return np.asarray(self.model.predict(X)).reshape(len(X), -1)
+
+
+class ModelRegistry:
+    """
+    Registre du modèle de prédiction, partagé par tout le processus.
+
+    Le modèle et l'encodeur sont chargés une seule fois par worker puis
+    remplacés atomiquement lorsque les fichiers changent sur le disque
+    (mtime/taille puis empreinte SHA-256).
+    """
+
+    def __init__(self, model_path=MODEL_PATH, encoder_path=ENCODER_PATH,
+                 check_interval=CHECK_INTERVAL, grid_path=GRID_PATH,
+                 grid_meta_path=GRID_META_PATH, compiled_dir=COMPILED_DIR):
+        self.model_path = model_path
+        self.encoder_path = encoder_path
+        self.compiled_dir = compiled_dir
+        self.grid_path = grid_path
+        self.grid_meta_path = grid_meta_path
+        self.check_interval = check_interval
+        self._bundle = None
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self.reloads = 0
+
+    def get(self):
+        """Retourne le bundle courant, en le rechargeant si nécessaire"""
+        bundle = self._bundle
+        now = time.monotonic()
+        if bundle is not None and now - self._last_check < self.check_interval:
+            return bundle
+
+        with self._lock:
+            # Un autre thread a peut-être déjà fait la vérification
+            if self._bundle is not bundle and self._bundle is not None:
+                return self._bundle
+            self._last_check = now
+            signature = file_signature(self.model_path, self.encoder_path)
+            if bundle is not None and bundle.signature == signature:
+                return bundle
+            version = file_checksum(self.model_path, self.encoder_path)
+            if bundle is not None and bundle.version == version:
+                # Fichiers touchés sans changement de contenu
+                bundle.signature = signature
+                return bundle
+            self._bundle = self._load(version, signature)
+            if bundle is not None:
+                self.reloads += 1
+            return self._bundle
+
+    def _load(self, version, signature):
+        start = time.perf_counter()
+        model = self._load_model(version)
+        encoder = joblib.load(self.encoder_path)
+        grid = self._load_grid(model, encoder, version)
+        return ModelBundle(
+            model, encoder, version, signature,
+            load_seconds=time.perf_counter() - start,
+            grid=grid
+        )
+
+    def _load_model(self, version):
+        # La forêt exportée évite de désérialiser le pickle scikit-learn ;
+        # à défaut (export absent ou périmé), on la compile en mémoire.
+        meta = read_meta(self.compiled_dir)
+        if meta is not None and meta.get('model_version') == version:
+            return CompiledForest.load(self.compiled_dir, mmap_mode='r')
+        return CompiledForest.from_sklearn(joblib.load(self.model_path))
+
+    def _load_grid(self, model, encoder, version):
+        grid = load_grid(version, self.grid_path, self.grid_meta_path)
+        if grid is not None and grid.values.shape[0] == len(encoder.classes_):
+            return grid
+        # Grille absente ou périmée (modèle remplacé sans la régénérer) :
+        # on la recalcule en mémoire sur la même plage d'années.
+        meta = read_grid_meta(self.grid_meta_path)
+        if meta is None:
+            return None
+        values = build_grid(model, len(encoder.classes_), meta['annee_debut'], meta['annee_fin'])
+        return PredictionGrid(values, meta['annee_debut'], version)
+
+    def info(self):
+        """Informations sur le modèle actuellement servi"""
+        bundle = self.get()
+        return {
+            'version': bundle.version,
+            'loaded_at': bundle.loaded_at.isoformat(),
+            'load_seconds': round(bundle.load_seconds, 4),
+            'reloads': self.reloads,
+            'model_path': os.path.basename(self.model_path),
+            'encoder_path': os.path.basename(self.encoder_path),
+            'n_communes': len(bundle.commune_codes),
+            'n_trees': getattr(bundle.model, 'n_trees', None),
+            'grid': bundle.grid.info() if bundle.grid is not None else None,
+        }
+
+
+class TrendRegistry(ModelRegistry):
+    """
+    Registre du modèle de tendances : même rechargement à chaud, la version
+    étant portée par les métadonnées de l'export. Pas de grille, la
+    prédiction est déjà un calcul direct.
+    """
+
+    def __init__(self, trend_dir=TREND_DIR, encoder_path=ENCODER_PATH,
+                 check_interval=CHECK_INTERVAL):
+        super().__init__(
+            model_path=os.path.join(trend_dir, TREND_META_FILE), encoder_path=encoder_path,
+            check_interval=check_interval, compiled_dir=trend_dir
+        )
+
+    def _load(self, version, signature):
+        start = time.perf_counter()
+        model = TrendForecaster.load(self.compiled_dir, mmap_mode='r')
+        encoder = joblib.load(self.encoder_path)
+        # Codes communes des tendances = codes de l'encodeur
+        if model.meta.get('communes') != [str(c) for c in encoder.classes_]:
+            raise ValueError("Tendances et encodeur désynchronisés : relancer train_model.py")
+        return ModelBundle(
+            model, encoder, version, signature,
+            load_seconds=time.perf_counter() - start
+        )
+
+    def info(self):
+        info = super().info()
+        model = self.get().model
+        info.update({'kind': model.kind, 'damping': model.damping})
+        return info
+
+
+# Instances globales des registres (forêt, tendances)
+registry = ModelRegistry()
+trend_registry = TrendRegistry()
+
+
+def predict_batch(communes, annees, bundle=None):
+    """
+    API Python de prédiction par lot.
+
+    Retourne un générateur de dicts {commune, annee, recettes, depenses},
+    dans l'ordre des paires fournies. Lève ValueError si une commune est
+    inconnue.
+    """
+    bundle = bundle or registry.get()
+    values = np.round(bundle.predict(communes, annees), 2)
+    return (
+        {'commune': commune, 'annee': int(annee),
+         'recettes': float(row[0]), 'depenses': float(row[1])}
+        for commune, annee, row in zip(communes, annees, values)
+    )
@@ -0,0 +1,210 @@
+import json
+import os
+import shutil
+import warnings
+
+import numpy as np
+import pandas as pd
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_PATH = os.path.join(ML_DIR, 'donnees_communes.csv')
+# Historique en colonnes .npy (voir write_store), produit par prepare_data.py
+STORE_DIR = os.path.join(ML_DIR, 'donnees_communes_store')
+
+META_FILE = 'meta.json'
+
+# Colonne du CSV -> (fichier .npy, type). La commune est stockée en codes
+# int32 dans l'ordre du dictionnaire trié (mêmes codes que LabelEncoder).
+COLUMNS = {
+    'Commune': ('commune', np.int32),
+    'Année': ('annee', np.int16),
+    'Recettes (M€)': ('recettes', np.float64),
+    'Dépenses (M€)': ('depenses', np.float64),
+}
+
+
+def store_exists(store_dir=STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, META_FILE))
+
+
+def _file_stat(path):
+    # Taille et mtime d'un fichier source, comparés à chaque lecture du store
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def store_is_current(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    """
+    Vrai si le store existe et correspond toujours au CSV dont il a été
+    tiré (taille et mtime enregistrés dans meta.json). Un store écrit sans
+    CSV source, ou dont le CSV a disparu, est considéré à jour.
+    """
+    if store_dir is None or not store_exists(store_dir):
+        return False
+    with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+        source = json.load(f).get('source')
+    if source is None or csv_path is None or not os.path.exists(csv_path):
+        return True
+    return _file_stat(csv_path) == source
+
+
+# Lignes converties à la fois lors de la fermeture d'un StoreWriter
+COPY_BLOCK = 1 << 20
+
+
+def write_store(df, store_dir=STORE_DIR, source=None):
+    """
+    Écrit l'historique en colonnes .npy non compressées plus le
+    dictionnaire des communes, dans l'ordre des lignes de df. Le
+    répertoire est remplacé d'un bloc : un lecteur voit l'ancien store ou
+    le nouveau, jamais un mélange. source est le CSV déjà écrit dont le
+    store est la copie (voir store_is_current).
+    """
+    with StoreWriter(store_dir, source) as writer:
+        writer.append(df)
+
+
+class StoreWriter:
+    """
+    Écriture incrémentale du store, lot par lot, en mémoire bornée : les
+    colonnes sont ajoutées en binaire brut, puis converties en .npy à la
+    fermeture avec les codes des communes renumérotés dans l'ordre trié.
+    En cas d'exception dans le bloc with, le store existant est conservé.
+    La taille et le mtime du fichier source, s'il est fourni, sont relevés
+    à la fermeture.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, source=None):
+        self.store_dir = store_dir
+        self.source = source
+        self.tmp_dir = store_dir + '.tmp'
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        os.makedirs(self.tmp_dir)
+        self.rows = 0
+        # Commune -> code provisoire, dans l'ordre d'apparition
+        self._codes = {}
+        self._files = {
+            column: open(self._path(name, '.bin'), 'wb') for column, (name, _) in COLUMNS.items()
+        }
+
+    def _path(self, name, suffix):
+        return os.path.join(self.tmp_dir, name + suffix)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    @property
+    def n_communes(self):
+        return len(self._codes)
+
+    def append(self, df):
+        local_codes, communes = pd.factorize(df['Commune'])
+        lookup = np.array([self._codes.setdefault(c, len(self._codes)) for c in communes], dtype=np.int32)
+        for column, (_, dtype) in COLUMNS.items():
+            values = lookup[local_codes] if column == 'Commune' else df[column].to_numpy()
+            np.asarray(values, dtype=dtype).tofile(self._files[column])
+        self.rows += len(df)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        names = list(self._codes)
+        order = sorted(range(len(names)), key=names.__getitem__)
+        remap = np.empty(len(names), dtype=np.int32)
+        remap[order] = np.arange(len(names), dtype=np.int32)
+
+        for column, (name, dtype) in COLUMNS.items():
+            raw_path, npy_path = self._path(name, '.bin'), self._path(name, '.npy')
+            if not self.rows:
+                np.save(npy_path, np.empty(0, dtype=dtype))
+            else:
+                raw = np.memmap(raw_path, dtype=dtype, mode='r', shape=(self.rows,))
+                out = np.lib.format.open_memmap(npy_path, mode='w+', dtype=dtype, shape=(self.rows,))
+                for start in range(0, self.rows, COPY_BLOCK):
+                    block = raw[start:start + COPY_BLOCK]
+                    out[start:start + COPY_BLOCK] = remap[block] if column == 'Commune' else block
+                out.flush()
+                del raw, out
+            os.remove(raw_path)
+        meta = {'rows': self.rows, 'communes': [names[i] for i in order], 'columns': list(COLUMNS)}
+        if self.source is not None:
+            meta['source'] = _file_stat(self.source)
+        with open(os.path.join(self.tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        old_dir = self.store_dir + '.old'
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.exists(self.store_dir):
+            os.replace(self.store_dir, old_dir)
+        os.replace(self.tmp_dir, self.store_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    def abort(self):
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class ColumnStore:
+    """
+    Historique colonnaire ouvert en memory-map : seules les colonnes
+    demandées sont ouvertes, et seules les pages lues sont chargées.
+    """
+
+    def __init__(self, store_dir=STORE_DIR, columns=None):
+        with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        self.store_dir = store_dir
+        self.communes = self.meta['communes']
+        self.columns = list(columns) if columns is not None else list(COLUMNS)
+        unknown = set(self.columns) - COLUMNS.keys()
+        if unknown:
+            raise KeyError(f"Colonnes inconnues : {', '.join(sorted(unknown))}")
+        self._arrays = {
+            column: np.load(os.path.join(store_dir, f'{COLUMNS[column][0]}.npy'), mmap_mode='r')
+            for column in self.columns
+        }
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def column(self, name):
+        """Tableau memory-mappé d'une colonne (codes pour 'Commune')"""
+        return self._arrays[name]
+
+    def frame(self):
+        """DataFrame des colonnes ouvertes, communes en catégories (sans copie des libellés)"""
+        data = {}
+        for column, values in self._arrays.items():
+            if column == 'Commune':
+                data[column] = pd.Categorical.from_codes(values, categories=self.communes)
+            else:
+                data[column] = values
+        return pd.DataFrame(data, columns=self.columns)
+
+
+def load_history(columns=None, csv_path=CSV_PATH, store_dir=STORE_DIR):
+    """
+    Chargeur partagé de l'historique des communes (entraînement, vues,
+    analyses) : store colonnaire s'il existe et correspond au CSV, sinon
+    le CSV.
+    """
+    if store_is_current(csv_path, store_dir):
+        return ColumnStore(store_dir, columns).frame()
+    if store_dir is not None and store_exists(store_dir):
+        warnings.warn(f"{csv_path} modifié depuis l'écriture de {store_dir} : lecture du CSV "
+                      f"(relancer prepare_data.py pour reconstruire le store)", RuntimeWarning)
+    return pd.read_csv(csv_path, usecols=columns)
+
+
+def history_signature(csv_path=CSV_PATH, store_dir=STORE_DIR):
+    """Fichier (métadonnées du store, ou CSV) dont le mtime date l'historique"""
+    if store_is_current(csv_path, store_dir):
+        return os.path.join(store_dir, META_FILE)
+    return csv_path
@@ -1,11 +1,32 @@
-import pandas as pd
+import argparse
+import os
+import sys
+import time
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import LabelEncoder
 import joblib
+import numpy as np
 
-def load_data(file_path):
-    data = pd.read_csv(file_path)
+# Permet l'exécution directe du script depuis n'importe quel répertoire
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from prediction.ml.incremental import extend_forest
+from prediction.ml.grid import GRID_HORIZON, GRID_PATH, GRID_META_PATH, build_grid, save_grid
+from prediction.ml.store import CSV_PATH, STORE_DIR, load_history
+from prediction.ml.registry import MODEL_PATH, ENCODER_PATH, COMPILED_DIR, TREND_DIR, file_checksum
+from prediction.ml.tree_engine import CompiledForest, read_meta
+from prediction.ml.trend import TrendForecaster
+
+# Tendance servie par le moteur 'tendance' : la plus précise au backtest
+# de bench_trend_forecaster. Un amortissement (ex. 0.8) borne les
+# extrapolations lointaines au prix d'un peu de précision à court terme.
+TREND_KIND = 'loglinear'
+TREND_DAMPING = None
+
+def load_data(file_path=CSV_PATH, store_dir=STORE_DIR):
+    # Store colonnaire (prepare_data.py) s'il existe, sinon le CSV
+    data = load_history(csv_path=file_path, store_dir=store_dir)
     return data
 
 def preprocess_data(data):
@@ -30,14 +51,103 @@ def train_model(data):
 
     return model, le
 
+def update_model(model, le, data, since):
+    # Mode incrémental : seules les lignes des années postérieures à since
+    # sont lues par les arbres, dont les feuilles atteintes sont scindées
+    new_rows = data[data['Année'] > since]
+    if new_rows.empty:
+        return new_rows
+    unknown = sorted(set(new_rows['Commune']) - set(le.classes_))
+    if unknown:
+        # Les codes de l'encodeur changeraient : réentraînement complet
+        raise ValueError(f"Communes absentes du modèle : {', '.join(unknown)}")
+    X = np.column_stack([le.transform(new_rows['Commune']), new_rows['Année']])
+    extend_forest(model, X, new_rows[['Recettes (M€)', 'Dépenses (M€)']])
+    return new_rows
+
+def train_trend_model(data, le, kind=TREND_KIND, damping=TREND_DAMPING):
+    # Tendances de toutes les communes, codes de l'encodeur de la forêt
+    return TrendForecaster.fit(
+        le.transform(data['Commune']), data['Année'],
+        data[['Recettes (M€)', 'Dépenses (M€)']], len(le.classes_),
+        kind=kind, damping=damping
+    )
+
+def save_trend_model(forecaster, le, trend_dir=TREND_DIR):
+    forecaster.save(trend_dir, communes=[str(c) for c in le.classes_])
+
+def dump_atomic(obj, path):
+    # Fichier temporaire du même répertoire puis os.replace : le registre
+    # (rechargement à chaud) ne lit jamais un pickle à moitié écrit
+    tmp_path = path + '.tmp'
+    joblib.dump(obj, tmp_path)
+    os.replace(tmp_path, path)
+
 def save_model(model, le, model_path, le_path):
-    joblib.dump(model, model_path)
-    joblib.dump(le, le_path)
+    # Encodeur d'abord : le changement du modèle déclenche le rechargement
+    # du registre, qui trouve alors la paire complète
+    dump_atomic(le, le_path)
+    dump_atomic(model, model_path)
+
+def export_compiled_forest(model, model_path, le_path, compiled_dir=COMPILED_DIR, annee_max=None):
+    # Forêt aplatie en tableaux NumPy, servie sans désérialiser le pickle ;
+    # annee_max (dernière année apprise) sert au mode incrémental
+    forest = CompiledForest.from_sklearn(model)
+    meta = {'model_version': file_checksum(model_path, le_path)}
+    if annee_max is not None:
+        meta['annee_max'] = int(annee_max)
+    forest.save(compiled_dir, **meta)
+    return forest
+
+def save_prediction_grid(model, le, data, model_path, le_path,
+                         grid_path=GRID_PATH, meta_path=GRID_META_PATH):
+    # Grille dense communes × années, de la première année connue jusqu'à
+    # GRID_HORIZON ans après la dernière, liée à la version du modèle
+    annee_debut = int(data['Année'].min())
+    annee_fin = int(data['Année'].max()) + GRID_HORIZON
+    values = build_grid(model, len(le.classes_), annee_debut, annee_fin)
+    save_grid(values, annee_debut, file_checksum(model_path, le_path), grid_path, meta_path)
+    return values
+
+def trained_through(compiled_dir=COMPILED_DIR):
+    # Dernière année apprise par le modèle publié, None si inconnue
+    meta = read_meta(compiled_dir)
+    return meta.get('annee_max') if meta else None
 
 if __name__ == "__main__":
-    data = load_data('backend/prediction/ml/donnees_communes.csv')
+    parser = argparse.ArgumentParser(description="Entraîne et publie les modèles de prédiction")
+    parser.add_argument('--incremental', action='store_true',
+                        help="Intègre les nouvelles années au modèle publié au lieu de le réentraîner")
+    parser.add_argument('--since', type=int,
+                        help="Dernière année déjà apprise (par défaut celle du modèle publié)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    data = load_data()
     processed_data = preprocess_data(data)
-    model, le = train_model(processed_data)
-    save_model(model, le, 'backend/prediction/ml/model_rf.pkl', 'backend/prediction/ml/label_encoder.pkl')
+    annee_max = int(processed_data['Année'].max())
+    if args.incremental:
+        since = args.since if args.since is not None else trained_through()
+        if since is None:
+            sys.exit("❌ Dernière année apprise inconnue : préciser --since")
+        model, le = joblib.load(MODEL_PATH), joblib.load(ENCODER_PATH)
+        try:
+            new_rows = update_model(model, le, processed_data, since)
+        except ValueError as e:
+            sys.exit(f"❌ {e} ; relancer sans --incremental")
+        if new_rows.empty:
+            print(f"✅ Aucune année postérieure à {since} : modèle inchangé")
+            sys.exit(0)
+        print(f"✅ {len(new_rows)} nouvelles lignes ({since + 1}-{annee_max}) intégrées "
+              f"en {time.perf_counter() - start:.2f} s")
+    else:
+        model, le = train_model(processed_data)
+    save_model(model, le, MODEL_PATH, ENCODER_PATH)
+    forest = export_compiled_forest(model, MODEL_PATH, ENCODER_PATH, annee_max=annee_max)
+    grid = save_prediction_grid(forest, le, processed_data, MODEL_PATH, ENCODER_PATH)
+    save_trend_model(train_trend_model(processed_data, le), le)
 
-    print("✅ Modèle entraîné et sauvegardé dans backend/prediction/ml/model_rf.pkl")
\ No newline at end of file
+    print(f"✅ Modèle entraîné et sauvegardé dans {MODEL_PATH} (version {file_checksum(MODEL_PATH, ENCODER_PATH)})")
+    print(f"✅ Grille de prédictions {grid.shape} sauvegardée dans {GRID_PATH}")
+    print(f"✅ Tendances par commune sauvegardées dans {TREND_DIR}")
+    print(f"✅ Publication en {time.perf_counter() - start:.2f} s")
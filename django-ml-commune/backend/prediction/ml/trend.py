@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .tree_engine import replace_directory
+
+META_FILE = 'meta.json'
+ARRAY_NAMES = ('intercept', 'slope', 'last_year')
+
+KINDS = ('linear', 'loglinear')
+
+# Plancher des valeurs passées au logarithme (modèle log-linéaire)
+LOG_FLOOR = 1e-6
+
+
+class TrendForecaster:
+    """
+    Tendance par commune : y = a + b·(année - origine), ou log y pour le
+    modèle log-linéaire, avec une pente amortie (facteur damping par an)
+    au-delà de la dernière année connue de la commune.
+
+    Contrairement à la forêt, la tendance extrapole au-delà des années
+    d'entraînement. Même interface de prédiction que CompiledForest :
+    predict(X) avec X (n, 2) = (code commune, année).
+    """
+
+    def __init__(self, intercept, slope, last_year, kind='linear', damping=None,
+                 year_origin=0, meta=None):
+        if kind not in KINDS:
+            raise ValueError(f"Tendance inconnue : {kind} ({', '.join(KINDS)})")
+        if damping is not None and not 0 < damping <= 1:
+            raise ValueError(f"Amortissement hors de ]0, 1] : {damping}")
+        # Coefficients (n_communes, n_outputs)
+        self.intercept = intercept
+        self.slope = slope
+        self.last_year = last_year
+        self.kind = kind
+        self.damping = damping
+        self.year_origin = year_origin
+        self.n_outputs = intercept.shape[1]
+        self.meta = meta or {}
+
+    @classmethod
+    def fit(cls, codes, annees, y, n_communes, kind='linear', damping=None):
+        """
+        Ajuste les tendances de toutes les communes en une fois : les
+        équations normales 2×2 de chaque commune sont assemblées par
+        bincount puis résolues ensemble (np.linalg.solve sur la pile),
+        pour toutes les sorties à la fois.
+        """
+        codes = np.asarray(codes, dtype=np.int64)
+        annees = np.asarray(annees, dtype=np.int64)
+        y = np.asarray(y, dtype=np.float64).reshape(len(codes), -1)
+        if kind == 'loglinear':
+            y = np.log(np.maximum(y, LOG_FLOOR))
+        # Années centrées : équations mieux conditionnées
+        origin = int(annees.min()) if len(annees) else 0
+        t = (annees - origin).astype(np.float64)
+
+        def total(weights=None):
+            return np.bincount(codes, weights=weights, minlength=n_communes)
+
+        n = total()
+        st, stt = total(t), total(t * t)
+        sy = np.stack([total(y[:, j]) for j in range(y.shape[1])], axis=1)
+        sty = np.stack([total(t * y[:, j]) for j in range(y.shape[1])], axis=1)
+
+        A = np.empty((n_communes, 2, 2))
+        A[:, 0, 0], A[:, 0, 1], A[:, 1, 0], A[:, 1, 1] = n, st, st, stt
+        B = np.stack([sy, sty], axis=1)
+        # Une seule année (ou aucune) : pente nulle, niveau moyen
+        singular = n * stt - st * st <= 1e-9 * np.maximum(n, 1) ** 2
+        A[singular] = [[1.0, 0.0], [0.0, 1.0]]
+        B[singular, 0] = sy[singular] / np.maximum(n[singular], 1)[:, None]
+        B[singular, 1] = 0.0
+        coef = np.linalg.solve(A, B)
+
+        last_year = np.full(n_communes, origin, dtype=np.int64)
+        np.maximum.at(last_year, codes, annees)
+        return cls(coef[:, 0], coef[:, 1], last_year, kind=kind, damping=damping, year_origin=origin)
+
+    def predict(self, X):
+        X = np.asarray(X)
+        codes = X[:, 0].astype(np.int64)
+        t = X[:, 1].astype(np.float64) - self.year_origin
+        if self.damping is not None and self.damping < 1:
+            # Au-delà de la dernière année : b·(φ + φ² + ... + φ^h)
+            last = self.last_year[codes] - self.year_origin
+            h = np.maximum(t - last, 0.0)
+            phi = self.damping
+            t = np.minimum(t, last) + phi * (1 - phi ** h) / (1 - phi)
+        values = self.intercept[codes] + self.slope[codes] * t[:, None]
+        if self.kind == 'loglinear':
+            values = np.exp(values)
+        return values[:, 0] if self.n_outputs == 1 else values
+
+    def checksum(self):
+        """Empreinte des coefficients et des réglages"""
+        digest = hashlib.sha256()
+        for name in ARRAY_NAMES:
+            digest.update(np.ascontiguousarray(getattr(self, name)).tobytes())
+        digest.update(f'{self.kind}:{self.damping}:{self.year_origin}'.encode())
+        return digest.hexdigest()[:12]
+
+    def save(self, directory, **meta):
+        """
+        Écrit les tableaux (.npy) et les métadonnées dans un répertoire
+        neuf, substitué ensuite à directory : un registre qui recharge ne
+        voit jamais de nouvelles métadonnées avec d'anciens tableaux, et les
+        tableaux en memory-map ne sont jamais réécrits sur place.
+        """
+        tmp_dir = directory.rstrip(os.sep) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), getattr(self, name))
+        meta = dict(self.meta, **meta)
+        meta.update({
+            'kind': self.kind,
+            'damping': self.damping,
+            'year_origin': int(self.year_origin),
+            'model_version': self.checksum(),
+        })
+        with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        replace_directory(tmp_dir, directory)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """Recharge des tendances exportées par save()"""
+        with open(os.path.join(directory, META_FILE), encoding='utf-8') as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        return cls(**arrays, kind=meta['kind'], damping=meta['damping'],
+                   year_origin=meta['year_origin'], meta=meta)
@@ -2,8 +2,8 @@ from django.db import models
 
 class Commune(models.Model):
     name = models.CharField(max_length=100, unique=True)
-    population = models.IntegerField()
-    area = models.FloatField()
+    population = models.IntegerField(null=True, blank=True)
+    area = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -13,6 +13,15 @@ class Prediction(models.Model):
     year = models.IntegerField()
     predicted_revenue = models.FloatField()
     predicted_expense = models.FloatField()
+    # Version (empreinte) du modèle ayant produit la prédiction : une ligne
+    # d'une autre version est considérée comme périmée et recalculée.
+    model_version = models.CharField(max_length=32, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['commune', 'year'], name='unique_prediction_commune_year'),
+        ]
 
     def __str__(self):
         return f"Prediction for {self.commune.name} in {self.year}"
\ No newline at end of file
@@ -0,0 +1,16 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+
+class JSONLinesRenderer(BaseRenderer):
+    """Rendu JSON lines (un objet JSON par ligne) pour les réponses par lot"""
+    media_type = 'application/x-ndjson'
+    format = 'jsonl'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows).encode(self.charset)
@@ -8,4 +8,44 @@ class PredictionSerializer(serializers.ModelSerializer):
 
 class PredictionRequestSerializer(serializers.Serializer):
     commune = serializers.CharField()
-    annee = serializers.IntegerField()
\ No newline at end of file
+    annee = serializers.IntegerField()
+    # Moteur de prédiction : forêt aléatoire, ou tendances par commune
+    # (extrapolent au-delà des années connues)
+    modele = serializers.ChoiceField(choices=['foret', 'tendance'], default='foret')
+
+class BatchPredictionRequestSerializer(serializers.Serializer):
+    # Soit une liste explicite de paires, soit le produit cartésien
+    # communes × annees
+    paires = PredictionRequestSerializer(many=True, required=False)
+    communes = serializers.ListField(child=serializers.CharField(), required=False, allow_empty=False)
+    annees = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    # Un seul moteur par lot (les tendances ne passent pas par le cache)
+    modele = serializers.ChoiceField(choices=['foret', 'tendance'], required=False)
+
+    MAX_SIZE = 100000
+
+    def validate(self, data):
+        modeles = {data['modele']} if 'modele' in data else set()
+        if 'paires' in data:
+            communes = [p['commune'] for p in data['paires']]
+            annees = [p['annee'] for p in data['paires']]
+            modeles.update(p['modele'] for p in data['paires'])
+        elif 'communes' in data and 'annees' in data:
+            communes = [c for c in data['communes'] for _ in data['annees']]
+            annees = list(data['annees']) * len(data['communes'])
+        else:
+            raise serializers.ValidationError(
+                "Fournir 'paires' ou bien 'communes' et 'annees'."
+            )
+        if not communes:
+            raise serializers.ValidationError("Aucune paire à prédire.")
+        if len(modeles) > 1:
+            raise serializers.ValidationError(
+                {'modele': "Un seul modèle par lot."}
+            )
+        if len(communes) > self.MAX_SIZE:
+            raise serializers.ValidationError(
+                f"Lot trop volumineux ({len(communes)} > {self.MAX_SIZE})."
+            )
+        return {'communes': communes, 'annees': annees,
+                'modele': modeles.pop() if modeles else 'foret'}
\ No newline at end of file
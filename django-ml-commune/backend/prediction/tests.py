@@ -1,39 +1,622 @@
-from django.test import TestCase
-from .models import Prediction
+import gzip
+import io
+import json
+import os
+import tempfile
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.preprocessing import LabelEncoder
+
+from .history import CSV_PATH, HistoryCache, build_history
+from .ml.grid import build_grid, save_grid
+from .ml.tree_engine import CompiledForest
+from .ml.backtest import BacktestData, commune_errors, run_backtest
+from .ml.incremental import extend_forest
+from .ml.ingest import ingest_workbook, map_header
+from .ml.registry import ModelRegistry, TrendRegistry, file_checksum, registry
+from .ml.store import ColumnStore, history_signature, load_history, write_store
+from .ml.train_model import save_model, update_model
+from .ml.trend import TrendForecaster
+from .models import Commune, Prediction
 from .serializers import PredictionSerializer
 
 class PredictionModelTest(TestCase):
     def setUp(self):
+        self.commune = Commune.objects.create(name='Test Commune')
         self.prediction = Prediction.objects.create(
-            commune='Test Commune',
+            commune=self.commune,
             year=2023,
-            recette=100000,
-            depense=80000
+            predicted_revenue=100000,
+            predicted_expense=80000,
+            model_version='abc123'
         )
 
     def test_prediction_creation(self):
-        self.assertEqual(self.prediction.commune, 'Test Commune')
+        self.assertEqual(self.prediction.commune.name, 'Test Commune')
         self.assertEqual(self.prediction.year, 2023)
-        self.assertEqual(self.prediction.recette, 100000)
-        self.assertEqual(self.prediction.depense, 80000)
+        self.assertEqual(self.prediction.predicted_revenue, 100000)
+        self.assertEqual(self.prediction.predicted_expense, 80000)
+        self.assertEqual(self.prediction.model_version, 'abc123')
+        self.assertIsNotNone(self.prediction.updated_at)
+
+    def test_one_prediction_per_commune_and_year(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Prediction.objects.create(commune=self.commune, year=2023,
+                                      predicted_revenue=1, predicted_expense=1)
 
 class PredictionSerializerTest(TestCase):
     def setUp(self):
+        self.commune = Commune.objects.create(name='Test Commune')
         self.prediction = Prediction.objects.create(
-            commune='Test Commune',
+            commune=self.commune,
             year=2023,
-            recette=100000,
-            depense=80000
+            predicted_revenue=100000,
+            predicted_expense=80000,
+            model_version='abc123'
         )
         self.serializer = PredictionSerializer(instance=self.prediction)
 
     def test_serializer_contains_expected_fields(self):
         data = self.serializer.data
-        self.assertEqual(set(data.keys()), set(['id', 'commune', 'year', 'recette', 'depense']))
+        self.assertEqual(set(data.keys()), {
+            'id', 'commune', 'year', 'predicted_revenue', 'predicted_expense', 'model_version', 'updated_at'
+        })
 
     def test_serializer_field_values(self):
         data = self.serializer.data
-        self.assertEqual(data['commune'], self.prediction.commune)
+        self.assertEqual(data['commune'], self.commune.id)
         self.assertEqual(data['year'], self.prediction.year)
-        self.assertEqual(data['recette'], self.prediction.recette)
-        self.assertEqual(data['depense'], self.prediction.depense)
\ No newline at end of file
+        self.assertEqual(data['predicted_revenue'], self.prediction.predicted_revenue)
+        self.assertEqual(data['predicted_expense'], self.prediction.predicted_expense)
+        self.assertEqual(data['model_version'], self.prediction.model_version)
+
+class ModelRegistryTest(SimpleTestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.model_path = os.path.join(self.tmpdir.name, 'model_rf.pkl')
+        self.encoder_path = os.path.join(self.tmpdir.name, 'label_encoder.pkl')
+        self.grid_path = os.path.join(self.tmpdir.name, 'prediction_grid.npy')
+        self.grid_meta_path = os.path.join(self.tmpdir.name, 'prediction_grid.json')
+        self._write_artifacts(['Lyon', 'Paris'], 1.0)
+        self.registry = ModelRegistry(
+            self.model_path, self.encoder_path, check_interval=0,
+            grid_path=self.grid_path, grid_meta_path=self.grid_meta_path,
+            compiled_dir=os.path.join(self.tmpdir.name, 'model_rf_compiled')
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write_artifacts(self, communes, value):
+        le = LabelEncoder().fit(communes)
+        X = np.array([[code, annee] for code in range(len(communes)) for annee in (2010, 2011)])
+        model = RandomForestRegressor(n_estimators=3, random_state=0)
+        model.fit(X, np.full((len(X), 2), value))
+        joblib.dump(model, self.model_path)
+        joblib.dump(le, self.encoder_path)
+        return model, le
+
+    def test_bundle_loaded_once(self):
+        first = self.registry.get()
+        self.assertIs(self.registry.get(), first)
+        self.assertEqual(first.encode('Paris'), 1)
+        self.assertIsNone(first.encode('Atlantis'))
+
+    def test_bundle_swapped_when_files_change(self):
+        first = self.registry.get()
+        self._write_artifacts(['Lyon', 'Nice', 'Paris'], 2.0)
+        second = self.registry.get()
+        self.assertIsNot(second, first)
+        self.assertNotEqual(second.version, first.version)
+        self.assertEqual(second.encode('Nice'), 1)
+        self.assertEqual(self.registry.info()['reloads'], 1)
+
+    def test_grid_answers_inside_range_and_model_outside(self):
+        model, le = self._write_artifacts(['Lyon', 'Paris'], 3.0)
+        values = build_grid(model, len(le.classes_), 2010, 2030)
+        # Cellules marquées : seule la grille peut produire ces valeurs
+        values[le.transform(['Paris'])[0], 2020 - 2010] = [-1.0, -2.0]
+        values[le.transform(['Lyon'])[0], 2030 - 2010] = [-3.0, -4.0]
+        save_grid(values, 2010, file_checksum(self.model_path, self.encoder_path),
+                  self.grid_path, self.grid_meta_path)
+        bundle = self.registry.get()
+        self.assertIsInstance(bundle.grid.values, np.memmap)
+        predictions = bundle.predict(['Paris', 'Lyon', 'Lyon', 'Paris'], [2020, 2030, 2031, 2045])
+        np.testing.assert_array_equal(predictions, [[-1.0, -2.0], [-3.0, -4.0], [3.0, 3.0], [3.0, 3.0]])
+
+    def test_stale_grid_rebuilt_in_memory(self):
+        model, le = self._write_artifacts(['Lyon', 'Paris'], 3.0)
+        save_grid(build_grid(model, 2, 2010, 2030), 2010, 'ancienne-version',
+                  self.grid_path, self.grid_meta_path)
+        bundle = self.registry.get()
+        self.assertNotIsInstance(bundle.grid.values, np.memmap)
+        self.assertEqual(bundle.grid.model_version, bundle.version)
+
+
+class CompiledForestTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.X = np.column_stack([rng.integers(0, 20, 500), rng.normal(2015, 8, 500)])
+
+    def test_regressor_matches_sklearn(self):
+        y = np.column_stack([self.X[:, 1] * 0.5, self.X[:, 0] ** 2])
+        model = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X, y)
+        forest = CompiledForest.from_sklearn(model)
+        np.testing.assert_array_equal(forest.predict(self.X), model.predict(self.X))
+        np.testing.assert_array_equal(forest.apply(self.X), model.apply(self.X).T)
+
+    def test_classifier_matches_sklearn_after_reload(self):
+        y = (self.X[:, 1] > 2015).astype(int) + (self.X[:, 0] > 10)
+        model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=0).fit(self.X, y)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            CompiledForest.from_sklearn(model).save(tmpdir)
+            forest = CompiledForest.load(tmpdir)
+            np.testing.assert_array_equal(forest.predict_proba(self.X), model.predict_proba(self.X))
+            np.testing.assert_array_equal(forest.predict(self.X), model.predict(self.X))
+
+    def test_save_leaves_mapped_forest_intact(self):
+        y = np.column_stack([self.X[:, 1] * 0.5, self.X[:, 0] ** 2])
+        old = RandomForestRegressor(n_estimators=3, max_depth=3, random_state=0).fit(self.X, y)
+        new = RandomForestRegressor(n_estimators=10, random_state=1).fit(self.X, y)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            compiled_dir = os.path.join(tmpdir, 'model_rf_compiled')
+            CompiledForest.from_sklearn(old).save(compiled_dir)
+            served = CompiledForest.load(compiled_dir, mmap_mode='r')
+            CompiledForest.from_sklearn(new).save(compiled_dir)
+            np.testing.assert_array_equal(served.predict(self.X), old.predict(self.X))
+            reloaded = CompiledForest.load(compiled_dir, mmap_mode='r')
+            np.testing.assert_array_equal(reloaded.predict(self.X), new.predict(self.X))
+            self.assertEqual(os.listdir(tmpdir), ['model_rf_compiled'])
+
+
+class TrendForecasterTest(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.codes = np.repeat(np.arange(5), 12)
+        self.annees = np.tile(np.arange(2010, 2022), 5)
+        self.y = np.column_stack([
+            50 + 3 * self.codes + (self.codes + 1) * (self.annees - 2010) + rng.normal(0, 1, 60),
+            40 + 2 * self.codes + 0.5 * (self.annees - 2010) + rng.normal(0, 1, 60),
+        ])
+
+    def test_batched_fit_matches_per_commune_polyfit(self):
+        for kind in ('linear', 'loglinear'):
+            forecaster = TrendForecaster.fit(self.codes, self.annees, self.y, 5, kind=kind)
+            y = np.log(self.y) if kind == 'loglinear' else self.y
+            for code in range(5):
+                rows = self.codes == code
+                for j in range(2):
+                    slope, intercept = np.polyfit(self.annees[rows] - 2010, y[rows, j], 1)
+                    self.assertAlmostEqual(forecaster.slope[code, j], slope)
+                    self.assertAlmostEqual(forecaster.intercept[code, j], intercept)
+
+    def test_extrapolates_and_damps_beyond_last_year(self):
+        y = 10.0 + 2.0 * (self.annees - 2010)
+        forecaster = TrendForecaster.fit(self.codes, self.annees, y, 6)
+        X = np.array([[0, 2021], [0, 2030], [5, 2030]])
+        np.testing.assert_allclose(forecaster.predict(X), [32.0, 50.0, 0.0])
+        damped = TrendForecaster.fit(self.codes, self.annees, y, 6, damping=0.5)
+        # Au plus une année de pente supplémentaire (0.5 + 0.25 + ...)
+        np.testing.assert_allclose(damped.predict(np.array([[0, 2022], [0, 2060]])), [33.0, 34.0])
+
+    def test_registry_serves_saved_trends(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            communes = ['Angers', 'Lyon', 'Nice', 'Paris', 'Reims']
+            encoder_path = os.path.join(tmpdir, 'label_encoder.pkl')
+            joblib.dump(LabelEncoder().fit(communes), encoder_path)
+            forecaster = TrendForecaster.fit(self.codes, self.annees, self.y, 5, kind='loglinear')
+            forecaster.save(os.path.join(tmpdir, 'trend'), communes=communes)
+            trends = TrendRegistry(os.path.join(tmpdir, 'trend'), encoder_path, check_interval=0)
+            bundle = trends.get()
+            self.assertIs(trends.get(), bundle)
+            self.assertEqual(bundle.version, file_checksum(os.path.join(tmpdir, 'trend', 'meta.json'), encoder_path))
+            np.testing.assert_allclose(
+                bundle.predict(['Paris', 'Nice'], [2030, 2030]),
+                forecaster.predict(np.array([[3, 2030], [2, 2030]]))
+            )
+            self.assertEqual(trends.info()['kind'], 'loglinear')
+
+    def test_resave_replaces_directory_without_touching_mapped_arrays(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            trend_dir = os.path.join(tmpdir, 'trend')
+            linear = TrendForecaster.fit(self.codes, self.annees, self.y, 5)
+            linear.save(trend_dir)
+            served = TrendForecaster.load(trend_dir, mmap_mode='r')
+            X = np.array([[1, 2030], [4, 2015]])
+            expected = linear.predict(X)
+            TrendForecaster.fit(self.codes, self.annees, self.y, 5, kind='loglinear').save(trend_dir)
+            np.testing.assert_array_equal(served.predict(X), expected)
+            reloaded = TrendForecaster.load(trend_dir, mmap_mode='r')
+            self.assertEqual(reloaded.kind, 'loglinear')
+            self.assertEqual(reloaded.meta['model_version'], reloaded.checksum())
+            self.assertEqual(os.listdir(tmpdir), ['trend'])
+
+
+class BatchPredictAPITest(TestCase):
+    def test_cartesian_batch_matches_single_predictions(self):
+        response = self.client.post('/api/predict/batch/', {
+            'communes': ['Paris', 'Lyon'],
+            'annees': [2024, 2025, 2026],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        predictions = response.json()['predictions']
+        self.assertEqual(len(predictions), 6)
+        single = self.client.post('/api/predict/', {
+            'commune': 'Lyon', 'annee': 2025,
+        }, content_type='application/json').json()
+        self.assertEqual(predictions[4]['commune'], 'Lyon')
+        self.assertEqual(predictions[4]['annee'], 2025)
+        self.assertEqual(predictions[4]['recettes'], single['recettes'])
+        self.assertEqual(predictions[4]['depenses'], single['depenses'])
+
+    def test_unknown_commune_rejected(self):
+        response = self.client.post('/api/predict/batch/', {
+            'paires': [{'commune': 'Paris', 'annee': 2024}, {'commune': 'Atlantis', 'annee': 2024}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['communes'], ['Atlantis'])
+
+    def test_streams_json_lines(self):
+        response = self.client.post('/api/predict/batch/', {
+            'paires': [{'commune': 'Paris', 'annee': 2024}],
+        }, content_type='application/json', HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['commune'], 'Paris')
+
+    def test_trend_engine_used_for_pairs(self):
+        single = self.client.post('/api/predict/', {
+            'commune': 'Lyon', 'annee': 2040, 'modele': 'tendance',
+        }, content_type='application/json').json()
+        cached = Prediction.objects.count()
+        response = self.client.post('/api/predict/batch/', {
+            'paires': [{'commune': 'Lyon', 'annee': 2040, 'modele': 'tendance'}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        prediction = response.json()['predictions'][0]
+        self.assertEqual(prediction['recettes'], single['recettes'])
+        self.assertEqual(prediction['depenses'], single['depenses'])
+        self.assertEqual(Prediction.objects.count(), cached)
+
+    def test_mixed_engines_rejected(self):
+        response = self.client.post('/api/predict/batch/', {
+            'paires': [{'commune': 'Lyon', 'annee': 2040, 'modele': 'tendance'},
+                       {'commune': 'Paris', 'annee': 2040}],
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('modele', response.json())
+
+
+class TrendPredictAPITest(TestCase):
+    def test_trend_engine_extrapolates(self):
+        def predict(annee, modele):
+            return self.client.post('/api/predict/', {
+                'commune': 'Lyon', 'annee': annee, 'modele': modele,
+            }, content_type='application/json').json()
+
+        # La forêt plafonne après la dernière année connue, pas la tendance
+        self.assertEqual(predict(2040, 'foret'), predict(2050, 'foret'))
+        cached = Prediction.objects.count()
+        self.assertNotEqual(predict(2040, 'tendance'), predict(2050, 'tendance'))
+        # Tendances calculées directement, hors du cache en base
+        self.assertEqual(Prediction.objects.count(), cached)
+
+    def test_unknown_engine_rejected(self):
+        response = self.client.post('/api/predict/', {
+            'commune': 'Lyon', 'annee': 2030, 'modele': 'oracle',
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('modele', response.json())
+
+
+class HistoryStoreTest(SimpleTestCase):
+    def test_store_round_trips_csv(self):
+        df = pd.read_csv(CSV_PATH)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_dir = os.path.join(tmpdir, 'store')
+            write_store(df, store_dir)
+            loaded = load_history(store_dir=store_dir)
+        self.assertEqual(list(loaded.columns), list(df.columns))
+        self.assertEqual(list(loaded['Commune'].astype(str)), list(df['Commune']))
+        np.testing.assert_array_equal(loaded['Année'], df['Année'])
+        np.testing.assert_array_equal(loaded['Recettes (M€)'], df['Recettes (M€)'])
+        self.assertEqual(json.dumps(build_history(loaded)), json.dumps(build_history(df)))
+
+    def test_projection_maps_only_requested_columns(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_dir = os.path.join(tmpdir, 'store')
+            write_store(pd.read_csv(CSV_PATH), store_dir)
+            store = ColumnStore(store_dir, ['Année'])
+            self.assertIsInstance(store.column('Année'), np.memmap)
+            with self.assertRaises(KeyError):
+                store.column('Recettes (M€)')
+            self.assertEqual(list(load_history(['Commune', 'Année'], store_dir=store_dir).columns),
+                             ['Commune', 'Année'])
+
+    def test_falls_back_to_csv_without_store(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            loaded = load_history(['Année'], store_dir=os.path.join(tmpdir, 'absent'))
+        self.assertEqual(list(loaded.columns), ['Année'])
+        self.assertEqual(len(loaded), len(pd.read_csv(CSV_PATH)))
+
+    def test_history_cache_reloads_rewritten_store(self):
+        df = pd.read_csv(CSV_PATH)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store_dir = os.path.join(tmpdir, 'store')
+            write_store(df, store_dir)
+            cache = HistoryCache(os.path.join(tmpdir, 'absent.csv'), store_dir)
+            first = cache.get()
+            self.assertIs(cache.get(), first)
+            write_store(df[df['Commune'] != 'Paris'], store_dir)
+            os.utime(os.path.join(store_dir, 'meta.json'), (0, 0))
+            self.assertNotIn('Paris', cache.get().communes)
+
+    def test_stale_store_falls_back_to_rewritten_csv(self):
+        df = pd.read_csv(CSV_PATH)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path, store_dir = os.path.join(tmpdir, 'donnees.csv'), os.path.join(tmpdir, 'store')
+            df.to_csv(csv_path, index=False)
+            write_store(df, store_dir, source=csv_path)
+            self.assertEqual(history_signature(csv_path, store_dir), os.path.join(store_dir, 'meta.json'))
+            cache = HistoryCache(csv_path, store_dir)
+            first = cache.get()
+            self.assertIn('Paris', first.communes)
+
+            df[df['Commune'] != 'Paris'].to_csv(csv_path, index=False)
+            os.utime(csv_path, (1, 1))
+            self.assertEqual(history_signature(csv_path, store_dir), csv_path)
+            with self.assertWarns(RuntimeWarning):
+                payload = cache.get()
+            self.assertNotIn('Paris', payload.communes)
+            self.assertNotEqual(payload.etag, first.etag)
+
+
+class ExcelIngestTest(SimpleTestCase):
+    def write_workbook(self, path, rows, header=('Code', 'commune', 'ANNEE', 'Recettes (k€)', 'Dépenses (k€)')):
+        import openpyxl
+
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet('comptes')
+        sheet.append(list(header))
+        for row in rows:
+            sheet.append(list(row))
+        workbook.save(path)
+
+    def test_streams_workbook_in_chunks_to_csv_and_store(self):
+        rows = [
+            (1, '  Saint-\u00c9tienne ', 2020, 1500, '1 200,5'),
+            (1, 'Saint-E\u0301tienne', 2021, 1600.0, 1300),
+            (2, 'Le   Havre', 2020, 900, 800),
+            (3, None, 2020, 100, 100),
+            (4, 'Lyon', 'inconnue', 100, 100),
+            (5, 'Lyon', 2021, 2500, 2400),
+        ]
+        progress = []
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'comptes.xlsx')
+            csv_path = os.path.join(tmpdir, 'donnees.csv')
+            store_dir = os.path.join(tmpdir, 'store')
+            self.write_workbook(path, rows)
+            stats = ingest_workbook(path, csv_path, store_dir, chunk_rows=2,
+                                    progress=lambda read, kept, seconds: progress.append(read))
+            csv = pd.read_csv(csv_path)
+            stored = load_history(csv_path=csv_path, store_dir=store_dir)
+
+        self.assertEqual(progress, [2, 4, 6])
+        self.assertEqual((stats['read'], stats['kept'], stats['communes']), (6, 4, 3))
+        self.assertEqual(list(csv['Commune']), ['Saint-\u00c9tienne', 'Saint-\u00c9tienne', 'Le Havre', 'Lyon'])
+        self.assertEqual(list(csv['Recettes (M€)']), [1.5, 1.6, 0.9, 2.5])
+        self.assertEqual(csv['Dépenses (M€)'][0], 1.2005)
+        self.assertEqual(list(stored['Commune'].astype(str)), list(csv['Commune']))
+        self.assertEqual(list(stored['Commune'].cat.categories), ['Le Havre', 'Lyon', 'Saint-\u00c9tienne'])
+        np.testing.assert_array_equal(stored['Dépenses (M€)'], csv['Dépenses (M€)'])
+
+    def test_missing_column_keeps_existing_outputs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'comptes.xlsx')
+            store_dir = os.path.join(tmpdir, 'store')
+            write_store(pd.read_csv(CSV_PATH), store_dir)
+            self.write_workbook(path, [('Lyon', 2020, 1)], header=('Commune', 'Année', 'Recettes'))
+            with self.assertRaises(ValueError):
+                ingest_workbook(path, None, store_dir)
+            self.assertEqual(len(load_history(store_dir=store_dir)), len(pd.read_csv(CSV_PATH)))
+            self.assertFalse(os.path.exists(store_dir + '.tmp'))
+
+    def test_empty_workbook_keeps_existing_outputs(self):
+        import openpyxl
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'donnees.csv')
+            store_dir = os.path.join(tmpdir, 'store')
+            df = pd.read_csv(CSV_PATH)
+            df.to_csv(csv_path, index=False)
+            write_store(df, store_dir, source=csv_path)
+            blank = os.path.join(tmpdir, 'vide.xlsx')
+            openpyxl.Workbook().save(blank)
+            header_only = os.path.join(tmpdir, 'entete.xlsx')
+            self.write_workbook(header_only, [(1, None, 2020, 1, 1)])
+            for path in (blank, header_only):
+                with self.assertRaises(CommandError):
+                    call_command('ingest_excel', path, csv=csv_path, store=store_dir, stdout=io.StringIO())
+            self.assertEqual(len(pd.read_csv(csv_path)), len(df))
+            self.assertEqual(len(load_history(csv_path=csv_path, store_dir=store_dir)), len(df))
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['donnees.csv', 'entete.xlsx', 'store', 'vide.xlsx'])
+
+    def test_header_units(self):
+        mapping = map_header(['Commune', 'Année', 'Recettes (€)', 'Dépenses'], default_unit='keur')
+        self.assertEqual(mapping['Recettes (M€)'], (2, 1e-6))
+        self.assertEqual(mapping['Dépenses (M€)'], (3, 1e-3))
+        with self.assertRaises(ValueError):
+            map_header(['Commune', 'Année', 'Recettes (francs)', 'Dépenses'])
+
+
+class BacktestTest(SimpleTestCase):
+    engines = {'foret': {'n_estimators': 5, 'random_state': 0}, 'tendance': {'kind': 'linear', 'damping': None}}
+
+    def test_fold_rows_respect_cutoff(self):
+        df = pd.read_csv(CSV_PATH)
+        df = df[(df['Commune'] != 'Lyon') | (df['Année'] > 2015)]
+        data = BacktestData(df)
+        train, test = data.fold_rows(2015, 2)
+        self.assertEqual(data.annees[train].max(), 2015)
+        self.assertEqual(sorted(set(data.annees[test])), [2016, 2017])
+        self.assertNotIn('Lyon', {data.communes[c] for c in data.codes[test]})
+
+    def test_folds_cached_until_their_data_changes(self):
+        df = pd.read_csv(CSV_PATH)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            old = df[df['Année'] <= 2022]
+            errors, timings = run_backtest(old, range(2015, 2022), engines=self.engines, workers=1, cache_dir=tmpdir)
+            self.assertFalse(timings['cache'].any())
+            cached_errors, cached = run_backtest(old, range(2015, 2022), engines=self.engines, workers=1,
+                                                 cache_dir=tmpdir)
+            self.assertTrue(cached['cache'].all())
+            pd.testing.assert_frame_equal(cached_errors, errors)
+
+            # Nouvelle année : seul le pli qui la voit est recalculé
+            _, timings = run_backtest(df, range(2015, 2023), engines=self.engines, workers=1, cache_dir=tmpdir)
+            recomputed = timings[~timings['cache']]
+            self.assertEqual(set(recomputed['coupure']), {2022})
+
+    def test_pool_matches_serial_run(self):
+        df = pd.read_csv(CSV_PATH)
+        serial, _ = run_backtest(df, range(2018, 2022), engines=self.engines, workers=1, cache_dir=None)
+        pooled, _ = run_backtest(df, range(2018, 2022), engines=self.engines, workers=2, cache_dir=None)
+        pd.testing.assert_frame_equal(pooled, serial)
+        table = commune_errors(serial)
+        self.assertEqual(len(table), 2 * df['Commune'].nunique())
+        self.assertTrue((table['points'] == 4).all())
+        self.assertTrue((table['MAPE exclus'] == 0).all())
+
+    def test_mape_skips_zero_actuals(self):
+        errors = pd.DataFrame({
+            'moteur': 'tendance', 'commune': ['Lyon', 'Lyon', 'Paris'],
+            'erreur Recettes (M€)': [1.0, 2.0, 1.0], 'reel Recettes (M€)': [10.0, 0.0, 4.0],
+            'erreur Dépenses (M€)': [1.0, 1.0, 3.0], 'reel Dépenses (M€)': [0.0, 5.0, 0.0],
+        })
+        table = commune_errors(errors)
+        self.assertTrue(np.isfinite(table['MAPE (%)']).all())
+        self.assertAlmostEqual(table.loc[('tendance', 'Lyon'), 'MAPE (%)'], 15.0)
+        self.assertAlmostEqual(table.loc[('tendance', 'Paris'), 'MAPE (%)'], 25.0)
+        self.assertEqual(list(table['MAPE exclus']), [2, 1])
+
+
+class IncrementalTrainingTest(SimpleTestCase):
+    def setUp(self):
+        self.df = pd.read_csv(CSV_PATH)
+        self.le = LabelEncoder().fit(self.df['Commune'])
+        self.X = np.column_stack([self.le.transform(self.df['Commune']), self.df['Année']])
+        self.y = self.df[['Recettes (M€)', 'Dépenses (M€)']].to_numpy()
+        self.old = self.df['Année'] <= 2021
+        self.model = RandomForestRegressor(n_estimators=10, random_state=0).fit(self.X[self.old], self.y[self.old])
+
+    def test_new_years_extend_trees_without_changing_past(self):
+        before = self.model.predict(self.X)
+        node_counts = [e.tree_.node_count for e in self.model.estimators_]
+        new = self.df['Année'] == 2022
+        extend_forest(self.model, self.X[~self.old], self.y[~self.old])
+        after = self.model.predict(self.X)
+        np.testing.assert_array_equal(after[self.old], before[self.old])
+        error_before = np.abs(before[new] - self.y[new]).mean()
+        self.assertLess(np.abs(after[new] - self.y[new]).mean(), error_before)
+        self.assertTrue(all(e.tree_.node_count > n for e, n in zip(self.model.estimators_, node_counts)))
+
+    def test_extended_forest_pickles_and_compiles(self):
+        extend_forest(self.model, self.X[~self.old], self.y[~self.old])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'model.pkl')
+            le_path = os.path.join(tmpdir, 'label_encoder.pkl')
+            joblib.dump(self.model, path)
+            published = os.stat(path).st_ino
+            save_model(self.model, self.le, path, le_path)
+            # Nouveau fichier mis en place par os.replace, jamais réécrit sur place
+            self.assertNotEqual(os.stat(path).st_ino, published)
+            self.assertEqual(sorted(os.listdir(tmpdir)), ['label_encoder.pkl', 'model.pkl'])
+            reloaded = joblib.load(path)
+        np.testing.assert_array_equal(reloaded.predict(self.X), self.model.predict(self.X))
+        np.testing.assert_array_equal(CompiledForest.from_sklearn(self.model).predict(self.X),
+                                      self.model.predict(self.X))
+
+    def test_update_model_rejects_new_communes(self):
+        self.assertTrue(update_model(self.model, self.le, self.df, 2023).empty)
+        extra = pd.DataFrame([{'Commune': 'Brest', 'Année': 2024, 'Recettes (M€)': 1.0, 'Dépenses (M€)': 1.0}])
+        with self.assertRaises(ValueError):
+            update_model(self.model, self.le, pd.concat([self.df, extra]), 2023)
+
+
+class HistoryCacheTest(SimpleTestCase):
+    def test_groupby_history_matches_per_commune_filter(self):
+        df = pd.read_csv(CSV_PATH)
+        expected = {}
+        for c in sorted(df['Commune'].unique()):
+            rows = df[df['Commune'] == c][['Année', 'Recettes (M€)', 'Dépenses (M€)']].sort_values('Année')
+            expected[c] = rows.to_dict(orient='records')
+        self.assertEqual(json.dumps(build_history(df)), json.dumps(expected))
+
+    def test_payload_cached_until_csv_changes(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            csv_path = os.path.join(tmpdir, 'donnees_communes.csv')
+            pd.read_csv(CSV_PATH).to_csv(csv_path, index=False)
+            cache = HistoryCache(csv_path)
+            first = cache.get()
+            self.assertIs(cache.get(), first)
+            os.utime(csv_path, (0, 0))
+            self.assertIsNot(cache.get(), first)
+
+    def test_historique_served_compressed_with_validators(self):
+        response = self.client.get('/api/historique/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Paris', json.loads(gzip.decompress(response.content)))
+        revalidated = self.client.get('/api/historique/', HTTP_ACCEPT_ENCODING='gzip',
+                                      HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(revalidated.status_code, 304)
+        self.assertIn('Accept-Encoding', revalidated['Vary'])
+
+    def test_historique_etag_depends_on_encoding(self):
+        compressed = self.client.get('/api/historique/', HTTP_ACCEPT_ENCODING='gzip')
+        identity = self.client.get('/api/historique/')
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertNotEqual(compressed['ETag'], identity['ETag'])
+        # L'ETag du corps gzip ne valide pas le corps brut
+        response = self.client.get('/api/historique/', HTTP_IF_NONE_MATCH=compressed['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Paris', response.json())
+
+    def test_predict_form_not_modified(self):
+        response = self.client.get('/api/form/')
+        self.assertEqual(response.status_code, 200)
+        revalidated = self.client.get('/api/form/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(revalidated.status_code, 304)
+
+
+
+class PredictionCacheTest(TestCase):
+    def _predict(self):
+        return self.client.post('/api/predict/', {
+            'commune': 'Paris', 'annee': 2030,
+        }, content_type='application/json')
+
+    def test_prediction_persisted_then_read_from_database(self):
+        first = self._predict().json()
+        cached = Prediction.objects.get(commune__name='Paris', year=2030)
+        self.assertEqual(cached.model_version, registry.get().version)
+        with self.assertNumQueries(1):
+            second = self._predict().json()
+        self.assertEqual(first, second)
+
+    def test_stale_version_recomputed(self):
+        commune = Commune.objects.create(name='Paris')
+        Prediction.objects.create(
+            commune=commune, year=2030, predicted_revenue=-1, predicted_expense=-1,
+            model_version='ancienne-version'
+        )
+        response = self._predict().json()
+        self.assertGreater(response['recettes'], 0)
+        cached = Prediction.objects.get(commune=commune, year=2030)
+        self.assertEqual(cached.model_version, registry.get().version)
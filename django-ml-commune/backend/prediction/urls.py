@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import PredictAPIView, predict_form, home
+from .views import PredictAPIView, BatchPredictAPIView, ModelInfoAPIView, predict_form, historique, home
 
 urlpatterns = [
     path('', home, name='home'),
     path('predict/', PredictAPIView.as_view(), name='predict'),
+    path('predict/batch/', BatchPredictAPIView.as_view(), name='predict_batch'),
+    path('model/', ModelInfoAPIView.as_view(), name='model_info'),
     path('form/', predict_form, name='predict_form'),
+    path('historique/', historique, name='historique'),
 ]
\ No newline at end of file
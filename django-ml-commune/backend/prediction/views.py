@@ -1,38 +1,44 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-import joblib
-import numpy as np
-from .serializers import PredictionRequestSerializer
-import os
+from rest_framework.settings import api_settings
+from .renderers import JSONLinesRenderer
+from .serializers import PredictionRequestSerializer, BatchPredictionRequestSerializer
+from .cache import cached_predictions
+from .history import history_cache
+from .ml.registry import registry, trend_registry, predict_batch
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import render
-import pandas as pd
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from django.views.decorators.vary import vary_on_headers
 import json
 
-MODEL_PATH = os.path.join(os.path.dirname(__file__), 'ml', 'model_rf.pkl')
-ENCODER_PATH = os.path.join(os.path.dirname(__file__), 'ml', 'label_encoder.pkl')
-
 class PredictAPIView(APIView):
     def post(self, request):
         serializer = PredictionRequestSerializer(data=request.data)
         if serializer.is_valid():
             commune = serializer.validated_data['commune']
             annee = serializer.validated_data['annee']
+            tendance = serializer.validated_data['modele'] == 'tendance'
 
-            # Charger le modèle et l'encodeur
-            model = joblib.load(MODEL_PATH)
-            le = joblib.load(ENCODER_PATH)
+            # Modèle et encodeur chargés une seule fois par processus
+            bundle = trend_registry.get() if tendance else registry.get()
 
             # Vérifier si la commune existe dans l'encodeur
-            if commune not in le.classes_:
+            commune_enc = bundle.encode(commune)
+            if commune_enc is None:
                 return Response(
                     {"error": "Commune inconnue."},
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            commune_enc = le.transform([commune])[0]
-            X_pred = np.array([[commune_enc, annee]])
-            y_pred = model.predict(X_pred)[0]
+            if tendance:
+                # Calcul direct, plus rapide qu'une lecture du cache en base
+                y_pred = bundle.predict_codes([commune_enc], [annee])[0]
+            else:
+                # Lecture en base (cache), puis grille précalculée ou modèle
+                y_pred = cached_predictions([commune], [annee], bundle)[0]
 
             return Response({
                 "recettes": round(float(y_pred[0]), 2),
@@ -40,19 +46,87 @@ class PredictAPIView(APIView):
             })
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+class BatchPredictAPIView(APIView):
+    # Au-delà de ce nombre de paires, la réponse est diffusée en JSON lines
+    STREAM_THRESHOLD = 1000
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [JSONLinesRenderer]
+
+    def post(self, request):
+        serializer = BatchPredictionRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        communes = serializer.validated_data['communes']
+        annees = serializer.validated_data['annees']
+        tendance = serializer.validated_data['modele'] == 'tendance'
+
+        bundle = trend_registry.get() if tendance else registry.get()
+        unknown = bundle.unknown(communes)
+        if unknown:
+            return Response(
+                {"error": "Commune inconnue.", "communes": unknown},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        streamed = request.accepted_renderer.format == JSONLinesRenderer.format
+        if streamed or len(communes) > self.STREAM_THRESHOLD:
+            # Un seul encodage et un seul appel au modèle pour tout le lot
+            predictions = predict_batch(communes, annees, bundle)
+            return StreamingHttpResponse(
+                (json.dumps(p, ensure_ascii=False) + '\n' for p in predictions),
+                content_type=JSONLinesRenderer.media_type
+            )
+
+        if tendance:
+            # Calcul direct, comme pour une paire seule
+            values = bundle.predict(communes, annees).tolist()
+        else:
+            # Lots raisonnables : lecture en base, calcul groupé des manquants
+            values = cached_predictions(communes, annees, bundle)
+        return Response({"predictions": [
+            {"commune": commune, "annee": annee,
+             "recettes": round(value[0], 2), "depenses": round(value[1], 2)}
+            for commune, annee, value in zip(communes, annees, values)
+        ]})
+
+class ModelInfoAPIView(APIView):
+    def get(self, request):
+        return Response(registry.info())
+
+def _accepts_gzip(request):
+    return 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+
+def _history_etag(request):
+    return history_cache.get().etag
+
+def _history_encoded_etag(request):
+    # Corps gzip et corps brut diffèrent : un ETag fort par encodage
+    etag = history_cache.get().etag
+    return etag + '-gzip' if _accepts_gzip(request) else etag
+
+def _history_last_modified(request):
+    return history_cache.get().last_modified
+
+@condition(etag_func=_history_etag, last_modified_func=_history_last_modified)
 def predict_form(request):
-    csv_path = os.path.join(os.path.dirname(__file__), 'ml', 'donnees_communes.csv')
-    df = pd.read_csv(csv_path)
-    communes = sorted(df['Commune'].unique())
-    # Prépare un dict {commune: [{annee, recettes, depenses}, ...]}
-    historique = {}
-    for c in communes:
-        rows = df[df['Commune'] == c][['Année', 'Recettes (M€)', 'Dépenses (M€)']].sort_values('Année')
-        historique[c] = rows.to_dict(orient='records')
+    # Historique {commune: [{annee, recettes, depenses}, ...]} mis en cache
+    # tant que le CSV ne change pas
+    payload = history_cache.get()
     return render(request, 'prediction/predict.html', {
-        'communes': communes,
-        'historique_json': json.dumps(historique)
+        'communes': payload.communes,
+        'historique_json': payload.json
     })
 
+@vary_on_headers('Accept-Encoding')
+@condition(etag_func=_history_encoded_etag, last_modified_func=_history_last_modified)
+def historique(request):
+    payload = history_cache.get()
+    if _accepts_gzip(request):
+        response = HttpResponse(payload.json_gzip, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(payload.json_bytes, content_type='application/json')
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
+
 def home(request):
-    return render(request, 'prediction/home.html')
\ No newline at end of file
+    return render(request, 'prediction/home.html')
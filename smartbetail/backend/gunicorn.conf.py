@@ -0,0 +1,16 @@
+"""
+Configuration gunicorn pour SmartBétail.
+
+    gunicorn -c gunicorn.conf.py
+
+L'application (et donc le modèle ML) est chargée dans le processus maître
+avant le fork : les workers partagent les pages du modèle en copy-on-write.
+"""
+
+import multiprocessing
+import os
+
+wsgi_app = 'smartbetail_project.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Animal, Maladie, Traitement, SymptomeObserve, Diagnostic, PlanificationSoin
+from .models import Animal, Maladie, Traitement, SymptomeObserve, LectureCapteur, Diagnostic, PlanificationSoin, TachePrediction
 
 
 @admin.register(Animal)
@@ -171,3 +171,23 @@ class PlanificationSoinAdmin(admin.ModelAdmin):
 admin.site.site_header = "Administration SmartBétail"
 admin.site.site_title = "SmartBétail Admin"
 admin.site.index_title = "Gestion du bétail intelligent"
+
+
+@admin.register(LectureCapteur)
+class LectureCapteurAdmin(admin.ModelAdmin):
+    """Administration des lectures capteurs (consultation)"""
+    list_display = ['animal', 'horodatage', 'temperature', 'frequence_cardiaque', 'frequence_respiratoire']
+    list_select_related = ['animal']
+    raw_id_fields = ['animal']
+    date_hierarchy = 'horodatage'
+    # Table volumineuse : pas de COUNT(*) complet pour la pagination
+    show_full_result_count = False
+
+
+@admin.register(TachePrediction)
+class TachePredictionAdmin(admin.ModelAdmin):
+    """Suivi de la file des prédictions asynchrones"""
+    list_display = ['id', 'statut', 'tentatives', 'date_creation', 'date_fin']
+    list_filter = ['statut']
+    raw_id_fields = ['symptome_observe', 'diagnostic']
+    readonly_fields = ['jeton', 'date_creation', 'date_debut', 'date_fin']
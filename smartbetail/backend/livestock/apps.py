@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class LivestockConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'livestock'
+
+    def ready(self):
+        # Invalidation du cache du dashboard et du catalogue des maladies,
+        # états temporels par animal, réglages des connexions SQLite
+        from . import signals  # noqa: F401
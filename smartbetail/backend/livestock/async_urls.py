@@ -0,0 +1,15 @@
+from django.urls import path, include
+
+from . import async_views
+
+# Routes servies sous ASGI (settings.ASYNC_API) : les endpoints les plus
+# sollicités en vues asynchrones natives, tout le reste via livestock.urls
+urlpatterns = [
+    path('predict/', async_views.predict_disease, name='predict-disease-async'),
+    path('dashboard/', async_views.dashboard_data, name='dashboard-data-async'),
+    path('health/', async_views.health_check, name='health-check-async'),
+    path('symptoms/', async_views.symptome_list, name='symptome-list-async'),
+    path('diagnostics/', async_views.diagnostic_list, name='diagnostic-list-async'),
+    path('schedule/', async_views.planification_list, name='planification-list-async'),
+    path('', include('livestock.urls')),
+]
@@ -0,0 +1,214 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import prediction_queue
+from .catalog import disease_catalog
+from .dashboard import CACHE_KEY, get_dashboard
+from .diagnostics import SERVING_TOP_K, resultat_diagnostic
+from .features import feature_store
+from .models import Animal, Diagnostic, Maladie, SymptomeObserve, Traitement
+from .serializers import AsyncPredictionInputSerializer, PredictionInputSerializer
+from .views import DiagnosticViewSet, PlanificationSoinViewSet, SymptomeObserveViewSet
+from ml_model.ml_predictor import PredictorNotReady, get_predictor, predictor_manager
+
+# Vues asynchrones natives des endpoints les plus sollicités, servies
+# sous ASGI (voir async_urls.py). L'ORM est utilisé en asynchrone et
+# l'inférence, qui occupe le CPU, tourne dans un pool de threads borné
+# pour ne jamais bloquer la boucle d'événements.
+
+
+class InferenceOverloaded(Exception):
+    """Trop de prédictions en attente dans le pool d'inférence"""
+
+
+class InferenceExecutor:
+    """
+    Pool de threads d'inférence avec une file d'attente bornée : au-delà
+    de max_pending prédictions en cours ou en attente, les requêtes sont
+    refusées (503) au lieu de s'accumuler en mémoire.
+    """
+
+    def __init__(self, max_workers, max_pending):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='inference')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    async def run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise InferenceOverloaded("Trop de prédictions en cours, réessayer plus tard")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self._slots.release()
+
+
+inference_executor = InferenceExecutor(
+    max_workers=getattr(settings, 'ML_INFERENCE_THREADS', 2),
+    max_pending=getattr(settings, 'ML_INFERENCE_QUEUE', 256),
+)
+
+
+def json_response(data, status=200):
+    # Même encodeur que le rendu JSON de DRF
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _predict(data, animal_id):
+    predictor = get_predictor()
+    # États temporels en cache ; lus en base par ce thread au premier appel
+    record = feature_store.enrich(predictor, [data], [animal_id])[0]
+    return predictor.predict(record, top_k=SERVING_TOP_K)
+
+
+def _enregistrer_diagnostic(animal_id, notes_veterinaire, data, prediction_result, entry):
+    # Observation et diagnostic dans une même transaction, comme la vue
+    # synchrone (l'ORM asynchrone ne gère pas transaction.atomic)
+    with transaction.atomic():
+        symptome_observe = SymptomeObserve.objects.create(
+            animal_id=animal_id, notes_veterinaire=notes_veterinaire, **data
+        )
+        return Diagnostic.objects.create(
+            animal_id=animal_id,
+            symptome_observe=symptome_observe,
+            maladie_predite=entry.maladie,
+            probabilite=prediction_result['confidence'],
+            traitement_recommande=entry.traitement
+        )
+
+
+@csrf_exempt
+@require_POST
+async def predict_disease(request):
+    """
+    Version asynchrone de views.predict_disease
+    URL: /api/predict/
+    """
+    try:
+        payload = json.loads(request.body or b'{}')
+    except ValueError:
+        return json_response({'errors': {'detail': 'JSON invalide'}}, status=400)
+
+    if request.GET.get('async') in ('1', 'true'):
+        serializer = AsyncPredictionInputSerializer(data=payload)
+        if not await sync_to_async(serializer.is_valid)():
+            return json_response({'errors': serializer.errors}, status=400)
+        data = dict(serializer.validated_data)
+        callback_url = data.pop('callback_url', '')
+        tache = await sync_to_async(prediction_queue.enqueue)(data, callback_url=callback_url)
+        response = json_response(prediction_queue.job_payload(tache), status=202)
+        response['Location'] = f'/api/predict/jobs/{tache.id}/'
+        return response
+
+    serializer = PredictionInputSerializer(data=payload)
+    if not await sync_to_async(serializer.is_valid)():
+        return json_response({'errors': serializer.errors}, status=400)
+
+    try:
+        data = dict(serializer.validated_data)
+        animal_id = data.pop('animal_id')
+        notes_veterinaire = data.pop('notes_veterinaire', '')
+
+        # Prédiction avant toute écriture : pas d'observation orpheline si
+        # le modèle est indisponible
+        prediction_result = await inference_executor.run(_predict, data, animal_id)
+
+        # Catalogue en mémoire ; chargé dans un thread au premier appel
+        entry = disease_catalog.peek(prediction_result)
+        if entry is None:
+            entry = await sync_to_async(disease_catalog.entry)(prediction_result)
+
+        diagnostic = await sync_to_async(_enregistrer_diagnostic)(
+            animal_id, notes_veterinaire, data, prediction_result, entry
+        )
+        return json_response(resultat_diagnostic(diagnostic))
+
+    except (PredictorNotReady, InferenceOverloaded) as e:
+        return json_response({'error': str(e)}, status=503)
+    except Exception as e:
+        return json_response({'error': f'Erreur lors de la prédiction : {str(e)}'}, status=500)
+
+
+@require_GET
+async def dashboard_data(request):
+    """
+    Version asynchrone de views.dashboard_data
+    URL: /api/dashboard/
+    """
+    try:
+        # Cas courant : résumé en cache, lu sans passer par un thread
+        data = await cache.aget(CACHE_KEY)
+        if data is None:
+            data = await sync_to_async(get_dashboard)()
+        return json_response(data)
+    except Exception as e:
+        return json_response(
+            {'error': f'Erreur lors de la récupération des données du dashboard : {str(e)}'},
+            status=500
+        )
+
+
+@require_GET
+async def health_check(request):
+    """
+    Version asynchrone de views.health_check
+    URL: /api/health/
+    """
+    try:
+        model_status = predictor_manager.status()
+        if not model_status['ready']:
+            predictor_manager.start_warm_up()
+
+        stats = {
+            'api_status': 'OK' if model_status['ready'] else 'STARTING',
+            'ready': model_status['ready'],
+            'model_loaded': model_status['ready'],
+            'model_status': model_status,
+            'total_animals': await Animal.objects.acount(),
+            'total_diseases': await Maladie.objects.acount(),
+            'total_treatments': await Traitement.objects.acount(),
+            'total_diagnostics': await Diagnostic.objects.acount(),
+            'timestamp': timezone.now().isoformat()
+        }
+        return json_response(stats, status=200 if model_status['ready'] else 503)
+    except Exception as e:
+        return json_response({'error': str(e), 'api_status': 'ERROR'}, status=500)
+
+
+def feed_list_view(viewset_class):
+    """
+    Liste paginée asynchrone d'un ViewSet de flux (même queryset, même
+    serializer compact, même pagination par curseur). Les autres méthodes
+    (POST de création) sont déléguées à la vue DRF synchrone.
+    """
+    sync_view = viewset_class.as_view({'get': 'list', 'post': 'create'})
+
+    @csrf_exempt
+    async def view(request):
+        if request.method != 'GET':
+            return await sync_to_async(sync_view)(request)
+        drf_request = Request(request)
+        viewset = viewset_class(request=drf_request, action='list', format_kwarg=None, args=(), kwargs={})
+        paginator = viewset.paginator
+        page = await paginator.apaginate_queryset(viewset.get_queryset(), drf_request, viewset)
+        serializer = viewset.get_serializer(page, many=True)
+        return json_response(paginator.get_paginated_response(serializer.data).data)
+
+    return view
+
+
+symptome_list = feed_list_view(SymptomeObserveViewSet)
+diagnostic_list = feed_list_view(DiagnosticViewSet)
+planification_list = feed_list_view(PlanificationSoinViewSet)
@@ -0,0 +1,103 @@
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Notifications des prédictions asynchrones (callback_url). Les URL sont
+# limitées à https et aux hôtes de settings.PREDICTION_CALLBACK_HOSTS :
+# un client de l'API ne peut pas faire appeler au worker une adresse
+# interne. Les envois se font dans des threads dédiés, hors du chemin de
+# réservation des tâches : un destinataire lent ne ralentit pas la file.
+
+CALLBACK_TIMEOUT = 5
+# Notifications en attente d'envoi, au-delà elles sont abandonnées
+MAX_PENDING = 1000
+N_THREADS = 2
+# Attente (secondes) avant chaque nouvel essai d'un envoi échoué
+RETRY_DELAYS = (1, 5)
+
+
+def callback_allowed(url):
+    """Vrai si url est en https vers un hôte autorisé"""
+    parts = urlsplit(url)
+    hosts = {host.lower() for host in getattr(settings, 'PREDICTION_CALLBACK_HOSTS', ())}
+    return parts.scheme == 'https' and (parts.hostname or '') in hosts
+
+
+class CallbackNotifier:
+    """
+    File bornée de notifications (POST JSON), envoyées par quelques threads
+    avec nouveaux essais. Les threads sont démarrés à la première
+    notification de chaque processus (workers créés par fork).
+    """
+
+    def __init__(self, n_threads=N_THREADS, max_pending=MAX_PENDING, retry_delays=RETRY_DELAYS):
+        self.n_threads = n_threads
+        self.retry_delays = retry_delays
+        self._queue = queue.Queue(max_pending)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Processus fils : les threads du parent n'existent plus
+            self._queue = queue.Queue(self._queue.maxsize)
+            for i in range(self.n_threads):
+                threading.Thread(target=self._run, name=f'callback-{i}', daemon=True).start()
+            self._pid = os.getpid()
+
+    def submit(self, url, body):
+        """Met une notification en file ; retourne False si elle est refusée"""
+        if not callback_allowed(url):
+            logger.warning("Notification refusée (hôte non autorisé) : %s", url)
+            return False
+        self._start()
+        try:
+            self._queue.put_nowait((url, body))
+        except queue.Full:
+            logger.warning("File des notifications pleine, notification abandonnée : %s", url)
+            return False
+        return True
+
+    def flush(self, timeout=CALLBACK_TIMEOUT):
+        """Attend (au plus timeout secondes) l'envoi des notifications en file"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+    def _run(self):
+        notifications = self._queue
+        while True:
+            url, body = notifications.get()
+            try:
+                self._send(url, body)
+            finally:
+                notifications.task_done()
+
+    def _send(self, url, body):
+        for delay in (*self.retry_delays, None):
+            request = urllib.request.Request(
+                url, data=body, method='POST', headers={'Content-Type': 'application/json'}
+            )
+            try:
+                with urllib.request.urlopen(request, timeout=CALLBACK_TIMEOUT):
+                    return
+            except OSError as e:
+                if delay is None:
+                    logger.warning("Notification impossible : %s (%s)", url, e)
+                    return
+                time.sleep(delay)
+
+
+# Notifications du processus
+notifier = CallbackNotifier()
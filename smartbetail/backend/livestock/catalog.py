@@ -0,0 +1,130 @@
+import threading
+import time
+
+from django.conf import settings
+
+from .models import Maladie
+from .serializers import MaladieSerializer, TraitementSerializer
+
+# Durée de vie (secondes) du catalogue en mémoire. Les modifications faites
+# par le processus courant l'invalident immédiatement (voir signals.py) ;
+# le TTL borne le retard des autres workers.
+DEFAULT_TTL = 300
+
+
+class CatalogEntry:
+    """Maladie, traitement recommandé et leurs représentations sérialisées"""
+
+    __slots__ = ('maladie', 'traitement', 'maladie_data', 'traitement_data')
+
+    def __init__(self, maladie):
+        # Même choix que predict_disease : premier traitement par nom
+        traitements = maladie.traitements.all()
+        self.maladie = maladie
+        self.traitement = traitements[0] if traitements else None
+        self.maladie_data = MaladieSerializer(maladie).data
+        self.traitement_data = TraitementSerializer(self.traitement).data if self.traitement else None
+
+
+class DiseaseCatalog:
+    """
+    Catalogue maladies/traitements du processus, indexé par les libellés
+    du classifieur (ex. 'pneumonie').
+
+    Chargé en deux requêtes (maladies, traitements et leurs maladies), puis
+    servi sans requête : le chemin de prédiction n'écrit plus que
+    l'observation et le diagnostic. Une maladie prédite absente de la base
+    est créée à la volée depuis disease_info.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self._by_nom = None
+        self._by_label = {}
+        self._loaded_at = 0.0
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _get_ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, 'DISEASE_CATALOG_TTL', DEFAULT_TTL)
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._by_nom = None
+            self._by_label = {}
+
+    def _fresh(self):
+        return self._by_nom is not None and time.monotonic() - self._loaded_at < self._get_ttl()
+
+    def _load(self):
+        with self._lock:
+            generation = self._generation
+        maladies = Maladie.objects.prefetch_related('traitements__maladies')
+        by_nom = {maladie.nom: CatalogEntry(maladie) for maladie in maladies}
+        with self._lock:
+            # Une invalidation pendant le chargement rend ce résultat périmé
+            if generation == self._generation:
+                self._by_nom = by_nom
+                self._by_label = {}
+                self._loaded_at = time.monotonic()
+        return by_nom
+
+    def peek(self, result):
+        """Entrée d'un résultat de prédiction, ou None s'il faut la charger (sans requête)"""
+        if not self._fresh():
+            return None
+        return self._by_label.get(result['predicted_disease'])
+
+    def peek_maladie(self, maladie):
+        """Entrée d'une maladie déjà chargée, ou None (sans requête)"""
+        by_nom = self._by_nom
+        if by_nom is None or not self._fresh():
+            return None
+        entry = by_nom.get(maladie.nom)
+        if entry is None or entry.maladie.pk != maladie.pk:
+            return None
+        return entry
+
+    def entry(self, result):
+        """Entrée (maladie, traitement) d'un résultat de LivestockMLPredictor.predict"""
+        label = result['predicted_disease']
+        by_nom = self._by_nom if self._fresh() else None
+        entry = self._by_label.get(label) if by_nom is not None else None
+        if entry is not None:
+            return entry
+        if by_nom is None:
+            by_nom = self._load()
+
+        info = result['disease_info']
+        nom = info.get('nom', label)
+        entry = by_nom.get(nom)
+        created = entry is None
+        if created:
+            maladie, _ = Maladie.objects.get_or_create(
+                nom=nom,
+                defaults={
+                    'description': info.get('description', ''),
+                    'symptomes_typiques': info.get('symptomes_typiques', ''),
+                    'gravite': info.get('gravite', 'modérée')
+                }
+            )
+            # Nouvelle maladie : aucun traitement associé
+            entry = CatalogEntry(maladie)
+        with self._lock:
+            # Seul le catalogue en service est complété : pas un chargement
+            # remplacé ou invalidé entre-temps
+            if self._by_nom is by_nom:
+                if created:
+                    entry = by_nom.setdefault(nom, entry)
+                self._by_label[label] = entry
+        return entry
+
+    def entries(self, prediction_results):
+        return [self.entry(result) for result in prediction_results]
+
+
+# Catalogue global du processus
+disease_catalog = DiseaseCatalog()
@@ -0,0 +1,92 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .models import Animal, Diagnostic, PlanificationSoin
+from .serializers import DiagnosticSerializer, PlanificationSoinSerializer
+
+CACHE_KEY = 'livestock:dashboard'
+
+# Durée de vie (secondes) du résumé en cache. Les écritures du processus
+# courant l'invalident immédiatement (voir signals.py) ; le TTL borne le
+# retard des autres workers et des compteurs qui dépendent de l'heure.
+DEFAULT_TTL = 30
+
+
+def compute_dashboard():
+    """
+    Calcule le résumé du dashboard : une requête d'agrégation conditionnelle
+    par table pour les compteurs, plus les deux listes récentes avec leurs
+    relations préchargées.
+    """
+    now = timezone.now()
+    aujourd_hui = now.date()
+    date_limite = now - timedelta(days=30)
+    fin_semaine = aujourd_hui + timedelta(days=7)
+    date_limite_urgence = aujourd_hui + timedelta(days=3)
+
+    # Répartition par type d'animal (le total en est la somme)
+    repartition_types_animaux = dict(
+        Animal.objects.values('type_animal').annotate(count=Count('id'))
+        .order_by('-count').values_list('type_animal', 'count')
+    )
+
+    # Animaux avec diagnostics récents non confirmés (30 derniers jours)
+    # et répartition des maladies sur la même période
+    diagnostics_stats = Diagnostic.objects.filter(
+        date_diagnostic__gte=date_limite
+    ).aggregate(
+        animaux_malades=Count('animal', distinct=True, filter=Q(confirme_par_veterinaire=False)),
+    )
+    repartition_maladies = dict(
+        Diagnostic.objects.filter(date_diagnostic__gte=date_limite)
+        .values('maladie_predite__nom').annotate(count=Count('id'))
+        .order_by('-count').values_list('maladie_predite__nom', 'count')
+    )
+
+    # Soins en retard et soins de la semaine
+    soins_stats = PlanificationSoin.objects.filter(statut='planifie').aggregate(
+        soins_en_retard=Count('id', filter=Q(date_prevue__lt=now)),
+        soins_cette_semaine=Count('id', filter=Q(date_prevue__date__range=[aujourd_hui, fin_semaine])),
+    )
+
+    # Diagnostics récents (5 derniers), avec toutes les relations imbriquées
+    # de DiagnosticSerializer
+    diagnostics_recents = Diagnostic.objects.select_related(
+        'animal__proprietaire', 'maladie_predite', 'traitement_recommande', 'veterinaire',
+        'symptome_observe__animal__proprietaire'
+    ).prefetch_related('traitement_recommande__maladies').order_by('-date_diagnostic')[:5]
+
+    # Soins urgents (en retard + prochains 3 jours)
+    soins_urgents = PlanificationSoin.objects.filter(
+        statut='planifie',
+        date_prevue__date__lte=date_limite_urgence
+    ).select_related('animal__proprietaire', 'veterinaire_responsable').order_by('date_prevue')[:10]
+
+    return {
+        'total_animaux': sum(repartition_types_animaux.values()),
+        'animaux_malades': diagnostics_stats['animaux_malades'],
+        'soins_en_retard': soins_stats['soins_en_retard'],
+        'soins_cette_semaine': soins_stats['soins_cette_semaine'],
+        'diagnostics_recents': DiagnosticSerializer(diagnostics_recents, many=True).data,
+        'soins_urgents': PlanificationSoinSerializer(soins_urgents, many=True).data,
+        'repartition_maladies': repartition_maladies,
+        'repartition_types_animaux': repartition_types_animaux,
+    }
+
+
+def get_dashboard():
+    """Résumé du dashboard, servi depuis le cache tant qu'il est valide"""
+    data = cache.get(CACHE_KEY)
+    if data is None:
+        data = compute_dashboard()
+        cache.set(CACHE_KEY, data, getattr(settings, 'DASHBOARD_CACHE_TTL', DEFAULT_TTL))
+    return data
+
+
+def invalidate_dashboard():
+    """Supprime le résumé en cache (appelé après chaque écriture concernée)"""
+    cache.delete(CACHE_KEY)
@@ -0,0 +1,79 @@
+from .catalog import disease_catalog
+from .models import Diagnostic
+from .serializers import MaladieSerializer, TraitementSerializer
+
+# Les réponses n'exposent que la maladie prédite : inutile de classer
+# toutes les autres (all_predictions)
+SERVING_TOP_K = 1
+
+
+def niveau_de_confiance(confidence):
+    """Libellé du niveau de confiance d'une prédiction"""
+    if confidence >= 0.8:
+        return 'Très élevé'
+    elif confidence >= 0.6:
+        return 'Élevé'
+    elif confidence >= 0.4:
+        return 'Modéré'
+    return 'Faible'
+
+
+def generer_recommandations(confidence, maladie, traitement_recommande):
+    """Recommandations associées à une prédiction"""
+    recommandations = []
+    if confidence < 0.6:
+        recommandations.append("Consulter un vétérinaire pour confirmation")
+
+    if maladie.gravite in ['élevée', 'critique']:
+        recommandations.append("Isoler l'animal si nécessaire")
+        recommandations.append("Surveillance rapprochée recommandée")
+
+    if traitement_recommande:
+        recommandations.append(f"Traitement suggéré : {traitement_recommande.nom}")
+
+    if not recommandations:
+        recommandations.append("Continuer la surveillance régulière")
+    return recommandations
+
+
+def construire_diagnostics(symptomes, prediction_results):
+    """
+    Diagnostics (non enregistrés) d'un lot d'observations, dans le même
+    ordre ; à enregistrer par bulk_create une fois les observations créées.
+    Maladies et traitements viennent du catalogue en mémoire.
+    """
+    diagnostics = []
+    for symptome, result in zip(symptomes, prediction_results):
+        entry = disease_catalog.entry(result)
+        diagnostics.append(Diagnostic(
+            animal_id=symptome.animal_id,
+            symptome_observe=symptome,
+            maladie_predite=entry.maladie,
+            probabilite=result['confidence'],
+            traitement_recommande=entry.traitement
+        ))
+    return diagnostics
+
+
+def resultat_diagnostic(diagnostic):
+    """Réponse de prédiction d'un diagnostic (maladie et traitement chargés)"""
+    maladie = diagnostic.maladie_predite
+    traitement = diagnostic.traitement_recommande
+    confidence = diagnostic.probabilite
+    entry = disease_catalog.peek_maladie(maladie)
+    if entry is not None and entry.traitement == traitement:
+        # Représentations déjà sérialisées par le catalogue
+        maladie_data, traitement_data = entry.maladie_data, entry.traitement_data
+    else:
+        maladie_data = MaladieSerializer(maladie).data
+        traitement_data = TraitementSerializer(traitement).data if traitement else None
+    return {
+        'animal_id': diagnostic.animal_id,
+        'maladie_predite': maladie_data,
+        'probabilite': confidence,
+        'traitement_recommande': traitement_data,
+        'niveau_confiance': niveau_de_confiance(confidence),
+        'recommandations': generer_recommandations(confidence, maladie, traitement),
+        'diagnostic_id': diagnostic.id,
+        'symptome_observe_id': diagnostic.symptome_observe_id
+    }
@@ -0,0 +1,310 @@
+import math
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import EtatTemporel, SymptomeObserve
+from ml_model.ml_predictor import TEMPORAL_FEATURES
+
+# Magasin incrémental des caractéristiques temporelles par animal. Chaque
+# observation met à jour en O(1) des fenêtres glissantes de 48 h découpées
+# en seaux de 4 h (sommes suffisantes pour la moyenne, la pente et le
+# maximum de la température, épisodes de fièvre) : aucune relecture de
+# l'historique SymptomeObserve n'est nécessaire. L'état est persisté dans
+# EtatTemporel et servi depuis le cache au moment de la prédiction.
+
+WINDOW_HOURS = 48
+BUCKET_HOURS = 4
+N_BUCKETS = WINDOW_HOURS // BUCKET_HOURS
+
+# Température (°C) à partir de laquelle une observation compte comme fièvre
+FEVER_THRESHOLD = 39.5
+
+# Colonnes d'un seau : observations, mesures de température, puis sommes
+# (t en heures depuis le début du seau, y la température) et maximum
+OBS, N, ST, SY, STT, STY, MAX, EPISODES = range(8)
+N_COLUMNS = 8
+
+STATE_VERSION = 1
+HEADER_SIZE = 6
+
+CACHE_PREFIX = 'livestock:features:'
+
+# Durée de vie (secondes) des états en cache. Les écritures du processus
+# courant les remplacent après commit ; le TTL borne le retard des autres
+# workers.
+DEFAULT_TTL = 300
+
+
+def _hours(date):
+    return date.timestamp() / 3600
+
+
+def _optional(value):
+    return None if value is None or math.isnan(value) else value
+
+
+class TemporalState:
+    """Fenêtres glissantes d'un animal, mises à jour observation par observation"""
+
+    __slots__ = ('bucket', 'last_seen', 'appetit', 'previous_appetit', 'fever', 'buckets')
+
+    def __init__(self):
+        # Index absolu du seau le plus récent et heure de la dernière
+        # observation
+        self.bucket = None
+        self.last_seen = None
+        self.appetit = None
+        self.previous_appetit = None
+        self.fever = False
+        self.buckets = np.zeros((N_BUCKETS, N_COLUMNS))
+        self.buckets[:, MAX] = np.nan
+
+    def copy(self):
+        state = TemporalState()
+        state.bucket, state.last_seen = self.bucket, self.last_seen
+        state.appetit, state.previous_appetit = self.appetit, self.previous_appetit
+        state.fever = self.fever
+        state.buckets = self.buckets.copy()
+        return state
+
+    def update(self, date, temperature=None, appetit=None, fievre=False):
+        """
+        Ajoute une observation. Une observation plus ancienne que la fenêtre
+        est ignorée ; une observation en retard mais dans la fenêtre compte
+        dans les agrégats sans modifier les dernières valeurs (appétit,
+        épisode de fièvre en cours).
+        """
+        hours = _hours(date)
+        bucket = int(hours // BUCKET_HOURS)
+        if self.bucket is None:
+            self.bucket = bucket
+        elif bucket > self.bucket:
+            # Vide les seaux sortis de la fenêtre (au plus N_BUCKETS)
+            for index in range(self.bucket + 1, min(bucket, self.bucket + N_BUCKETS) + 1):
+                row = self.buckets[index % N_BUCKETS]
+                row[:] = 0.0
+                row[MAX] = np.nan
+            self.bucket = bucket
+        elif bucket <= self.bucket - N_BUCKETS:
+            return
+
+        row = self.buckets[bucket % N_BUCKETS]
+        row[OBS] += 1
+        if temperature is not None:
+            t = hours - bucket * BUCKET_HOURS
+            row[N] += 1
+            row[ST] += t
+            row[SY] += temperature
+            row[STT] += t * t
+            row[STY] += t * temperature
+            row[MAX] = temperature if np.isnan(row[MAX]) else max(row[MAX], temperature)
+
+        fever = bool(fievre) or (temperature is not None and temperature >= FEVER_THRESHOLD)
+        if self.last_seen is None or hours >= self.last_seen:
+            if fever and not self.fever:
+                row[EPISODES] += 1
+            self.fever = fever
+            self.previous_appetit, self.appetit = self.appetit, appetit
+            self.last_seen = hours
+
+    def features(self, date):
+        """Caractéristiques (TEMPORAL_FEATURES) sur les 48 h précédant date"""
+        if self.bucket is None:
+            return dict.fromkeys(TEMPORAL_FEATURES, 0.0)
+        now = int(_hours(date) // BUCKET_HOURS)
+        # Index absolu du seau de chaque case, puis seaux encore dans la fenêtre
+        buckets = self.bucket - (self.bucket - np.arange(N_BUCKETS)) % N_BUCKETS
+        in_window = buckets > min(now, self.bucket) - N_BUCKETS
+        rows = self.buckets[in_window]
+        # Décalage (heures) du début de chaque seau par rapport au seau de date
+        shift = (buckets[in_window] - now) * float(BUCKET_HOURS)
+
+        n = rows[:, N].sum()
+        st = (rows[:, ST] + rows[:, N] * shift).sum()
+        sy = rows[:, SY].sum()
+        stt = (rows[:, STT] + 2 * shift * rows[:, ST] + rows[:, N] * shift ** 2).sum()
+        sty = (rows[:, STY] + shift * rows[:, SY]).sum()
+        denominator = n * stt - st * st
+        maxima = rows[:, MAX][~np.isnan(rows[:, MAX])]
+
+        delta_appetit = 0.0
+        if self.appetit is not None and self.previous_appetit is not None:
+            delta_appetit = float(self.appetit - self.previous_appetit)
+        return {
+            'temperature_moyenne_48h': float(sy / n) if n else 0.0,
+            # °C par heure, moindres carrés
+            'temperature_pente_48h': float((n * sty - st * sy) / denominator) if n >= 2 and denominator > 1e-9 else 0.0,
+            'temperature_max_48h': float(maxima.max()) if len(maxima) else 0.0,
+            'episodes_fievre_48h': float(rows[:, EPISODES].sum()),
+            'observations_48h': float(rows[:, OBS].sum()),
+            'delta_appetit': delta_appetit,
+        }
+
+    def to_bytes(self):
+        header = [
+            STATE_VERSION,
+            np.nan if self.bucket is None else self.bucket,
+            np.nan if self.last_seen is None else self.last_seen,
+            np.nan if self.appetit is None else self.appetit,
+            np.nan if self.previous_appetit is None else self.previous_appetit,
+            float(self.fever),
+        ]
+        return np.concatenate([header, self.buckets.ravel()]).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        state = cls()
+        values = np.frombuffer(bytes(data), dtype=np.float64)
+        if len(values) != HEADER_SIZE + N_BUCKETS * N_COLUMNS or values[0] != STATE_VERSION:
+            # Format d'une autre version : état vide (voir rebuild_feature_store)
+            return state
+        bucket, last_seen, appetit, previous_appetit = (_optional(v) for v in values[1:5].tolist())
+        state.bucket = None if bucket is None else int(bucket)
+        state.last_seen = last_seen
+        state.appetit, state.previous_appetit = appetit, previous_appetit
+        state.fever = bool(values[5])
+        state.buckets = values[HEADER_SIZE:].reshape(N_BUCKETS, N_COLUMNS).copy()
+        return state
+
+
+def observation_fields(observation):
+    """Champs d'une SymptomeObserve (ou d'un dictionnaire de symptômes) utilisés par update"""
+    get = observation.get if isinstance(observation, dict) else lambda name: getattr(observation, name, None)
+    return {'temperature': get('temperature'), 'appetit': get('appetit'), 'fievre': get('fievre') or False}
+
+
+class FeatureStore:
+    """
+    États temporels par animal : EtatTemporel en base, servis par le cache.
+
+    La lecture (features) ne fait aucune requête quand l'état est en cache ;
+    l'écriture (record) relit l'état en base sous verrou pour ne pas perdre
+    de mise à jour entre workers.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+
+    def _get_ttl(self):
+        if self.ttl is not None:
+            return self.ttl
+        return getattr(settings, 'FEATURE_STORE_TTL', DEFAULT_TTL)
+
+    @property
+    def enabled(self):
+        """Écritures activées (settings.FEATURE_STORE_ENABLED)"""
+        return getattr(settings, 'FEATURE_STORE_ENABLED', False)
+
+    def states(self, animal_ids):
+        """États des animaux : cache, puis une requête pour les absents"""
+        keys = {animal_id: f'{CACHE_PREFIX}{animal_id}' for animal_id in set(animal_ids)}
+        cached = cache.get_many(keys.values())
+        states = {
+            animal_id: TemporalState.from_bytes(cached[key])
+            for animal_id, key in keys.items() if key in cached
+        }
+        missing = [animal_id for animal_id in keys if animal_id not in states]
+        if missing:
+            rows = dict(EtatTemporel.objects.filter(animal_id__in=missing).values_list('animal_id', 'etat'))
+            for animal_id in missing:
+                states[animal_id] = TemporalState.from_bytes(rows[animal_id]) if animal_id in rows \
+                    else TemporalState()
+            # add : ne remplace pas un état écrit entre-temps par record
+            for animal_id in missing:
+                cache.add(keys[animal_id], states[animal_id].to_bytes(), self._get_ttl())
+        return states
+
+    def features(self, animal_ids, records, dates=None):
+        """
+        Caractéristiques temporelles de chaque enregistrement, fenêtre
+        incluant l'enregistrement lui-même (s'il n'est pas déjà dans l'état)
+        """
+        now = timezone.now()
+        dates = dates or [now] * len(records)
+        states = self.states(animal_ids)
+        results = []
+        for animal_id, record, date in zip(animal_ids, records, dates):
+            state = states[animal_id]
+            if state.last_seen is None or _hours(date) > state.last_seen:
+                state = state.copy()
+                state.update(date, **observation_fields(record))
+            results.append(state.features(date))
+        return results
+
+    def enrich(self, predictor, records, animal_ids, dates=None):
+        """Enregistrements complétés des caractéristiques temporelles du modèle"""
+        if not predictor.temporal_features:
+            return records
+        features = self.features(animal_ids, records, dates)
+        return [dict(record, **values) for record, values in zip(records, features)]
+
+    def record(self, observations):
+        """
+        Intègre des SymptomeObserve enregistrées : une lecture verrouillée et
+        une écriture (upsert) pour tout le lot, états en cache après commit.
+        Sans effet si le magasin n'est pas activé.
+        """
+        if not self.enabled:
+            return
+        observations = sorted(observations, key=lambda o: o.date_observation)
+        animal_ids = sorted({o.animal_id for o in observations})
+        if not animal_ids:
+            return
+        with transaction.atomic():
+            rows = dict(
+                EtatTemporel.objects.select_for_update()
+                .filter(animal_id__in=animal_ids).values_list('animal_id', 'etat')
+            )
+            states = {
+                animal_id: TemporalState.from_bytes(rows[animal_id]) if animal_id in rows else TemporalState()
+                for animal_id in animal_ids
+            }
+            for observation in observations:
+                states[observation.animal_id].update(observation.date_observation, **observation_fields(observation))
+            self._save(states)
+
+    def _save(self, states):
+        date_maj = timezone.now()
+        blobs = {animal_id: state.to_bytes() for animal_id, state in states.items()}
+        EtatTemporel.objects.bulk_create(
+            [EtatTemporel(animal_id=animal_id, etat=blob, date_maj=date_maj) for animal_id, blob in blobs.items()],
+            update_conflicts=True, unique_fields=['animal'], update_fields=['etat', 'date_maj'],
+        )
+        entries = {f'{CACHE_PREFIX}{animal_id}': blob for animal_id, blob in blobs.items()}
+        transaction.on_commit(lambda: cache.set_many(entries, self._get_ttl()))
+
+    def rebuild(self, animal_ids=None, batch_size=500):
+        """
+        Reconstruit les états depuis l'historique SymptomeObserve (après un
+        import, ou un changement de STATE_VERSION). Retourne le nombre
+        d'animaux traités.
+        """
+        observations = SymptomeObserve.objects.order_by('animal_id', 'date_observation').only(
+            'animal_id', 'date_observation', 'temperature', 'appetit', 'fievre'
+        )
+        if animal_ids is not None:
+            observations = observations.filter(animal_id__in=animal_ids)
+        states, count = {}, 0
+        for observation in observations.iterator(chunk_size=2000):
+            if observation.animal_id not in states and len(states) >= batch_size:
+                self._flush(states)
+                count += len(states)
+                states = {}
+            state = states.setdefault(observation.animal_id, TemporalState())
+            state.update(observation.date_observation, **observation_fields(observation))
+        if states:
+            self._flush(states)
+            count += len(states)
+        return count
+
+    def _flush(self, states):
+        with transaction.atomic():
+            self._save(states)
+
+
+# Magasin global du processus
+feature_store = FeatureStore()
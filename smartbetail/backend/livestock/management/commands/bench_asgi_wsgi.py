@@ -0,0 +1,152 @@
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+import numpy as np
+
+SERVERS = {
+    # Workers synchrones gunicorn : une requête à la fois par processus
+    'wsgi': ['-m', 'gunicorn', 'smartbetail_project.wsgi:application',
+             '--workers', '{workers}', '--bind', '127.0.0.1:{port}', '--backlog', '4096'],
+    # Une boucle d'événements par processus, vues asynchrones (asgi.py)
+    'asgi': ['-m', 'uvicorn', 'smartbetail_project.asgi:application',
+             '--workers', '{workers}', '--port', '{port}', '--backlog', '4096', '--no-access-log'],
+}
+
+
+def _wait_for_port(port, process, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f"Le serveur s'est arrêté (code {process.returncode})")
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Le serveur n'écoute pas sur le port {port}")
+
+
+async def _read_response(reader):
+    """Lit une réponse HTTP/1.1 ; retourne (statut, connexion conservée)"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connexion fermée")
+    status = int(status_line.split()[1])
+    length, keep_alive = 0, True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            keep_alive = False
+    await reader.readexactly(length)
+    return status, keep_alive
+
+
+async def _client(port, paths, deadline, stats, start_gate):
+    """Une connexion : requêtes enchaînées (keep-alive) jusqu'à l'échéance"""
+    await start_gate.wait()
+    reader = writer = None
+    i = 0
+    while time.monotonic() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        began = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(
+                f'GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: keep-alive\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(_read_response(reader), timeout=30)
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+            stats['errors'] += 1
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            await asyncio.sleep(0.05)
+            continue
+        stats['latencies'].append(time.perf_counter() - began)
+        if status >= 400:
+            stats['errors'] += 1
+        if not keep_alive:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def _load(port, paths, connections, duration):
+    stats = {'latencies': [], 'errors': 0}
+    start_gate = asyncio.Event()
+    deadline = time.monotonic() + duration
+    tasks = [
+        asyncio.create_task(_client(port, paths, deadline, stats, start_gate))
+        for _ in range(connections)
+    ]
+    start_gate.set()
+    began = time.monotonic()
+    await asyncio.gather(*tasks)
+    stats['elapsed'] = time.monotonic() - began
+    return stats
+
+
+class Command(BaseCommand):
+    help = ("Test de charge WSGI (gunicorn) contre ASGI (uvicorn, vues asynchrones) "
+            "avec N connexions simultanées sur des endpoints en lecture")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=1000)
+        parser.add_argument('--duration', type=float, default=15.0)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--paths', nargs='+',
+                            default=['/api/health/', '/api/dashboard/', '/api/symptoms/'])
+        parser.add_argument('--servers', nargs='+', choices=sorted(SERVERS), default=['wsgi', 'asgi'])
+
+    def handle(self, *args, **options):
+        # Endpoints en lecture seule : la base n'est pas modifiée
+        self.stdout.write(
+            f"{options['connections']} connexions, {options['duration']} s, "
+            f"{options['workers']} workers, {' '.join(options['paths'])}"
+        )
+        self.stdout.write(f"{'serveur':>8} {'req/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'erreurs':>8}")
+        for name in options['servers']:
+            args = [
+                arg.format(workers=options['workers'], port=options['port'])
+                for arg in SERVERS[name]
+            ]
+            process = subprocess.Popen(
+                [sys.executable, *args], cwd=settings.BASE_DIR,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                env=dict(os.environ, DJANGO_SETTINGS_MODULE='smartbetail_project.settings'),
+            )
+            try:
+                _wait_for_port(options['port'], process)
+                # Premier passage (amorçage des workers), non mesuré
+                asyncio.run(_load(options['port'], options['paths'], 10, 2.0))
+                stats = asyncio.run(_load(
+                    options['port'], options['paths'], options['connections'], options['duration']
+                ))
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+
+            latencies = np.array(stats['latencies']) * 1000
+            p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (float('nan'),) * 2
+            self.stdout.write(
+                f"{name:>8} {len(latencies) / stats['elapsed']:>8.0f} "
+                f"{p50:>9.1f} {p99:>9.1f} {stats['errors']:>8}"
+            )
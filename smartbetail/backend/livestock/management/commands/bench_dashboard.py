@@ -0,0 +1,79 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from livestock.models import Animal, Diagnostic, Maladie, PlanificationSoin, SymptomeObserve
+
+
+class Command(BaseCommand):
+    help = "Mesure le nombre de requêtes et la latence de /api/dashboard/ sur un gros troupeau"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, default=100_000)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Données créées dans une transaction annulée à la fin : la base
+        # n'est pas modifiée
+        with transaction.atomic():
+            self._populate(options['animals'])
+            self._bench(options['repeat'])
+            transaction.set_rollback(True)
+
+    def _populate(self, n_animals):
+        rng = random.Random(0)
+        start = time.perf_counter()
+        owner = User.objects.create(username=f'bench-{time.time_ns()}')
+        types = [code for code, _ in Animal.ANIMAL_TYPES]
+        animals = Animal.objects.bulk_create([
+            Animal(nom=f'Animal {i}', numero_identification=f'BENCH-{i}', type_animal=rng.choice(types),
+                   race='Race', sexe=rng.choice('MF'), date_naissance=date(2020, 1, 1), proprietaire=owner)
+            for i in range(n_animals)
+        ], batch_size=5000)
+        maladies = list(Maladie.objects.all()) or [Maladie.objects.create(
+            nom='Bench', description='', symptomes_typiques='')]
+
+        # Un diagnostic pour un animal sur cinq, un soin pour un sur dix
+        sick = animals[::5]
+        symptomes = SymptomeObserve.objects.bulk_create(
+            [SymptomeObserve(animal=a) for a in sick], batch_size=5000
+        )
+        Diagnostic.objects.bulk_create([
+            Diagnostic(animal=s.animal, symptome_observe=s, maladie_predite=rng.choice(maladies),
+                       probabilite=rng.random())
+            for s in symptomes
+        ], batch_size=5000)
+        now = timezone.now()
+        PlanificationSoin.objects.bulk_create([
+            PlanificationSoin(animal=a, type_soin='controle', nom_soin='Contrôle',
+                              date_prevue=now + timedelta(days=rng.randint(-10, 30)))
+            for a in animals[::10]
+        ], batch_size=5000)
+        self.stdout.write(
+            f"{n_animals} animaux, {len(symptomes)} diagnostics, {len(animals[::10])} soins "
+            f"créés en {time.perf_counter() - start:.1f} s"
+        )
+
+    def _bench(self, repeat):
+        client = Client()
+        self.stdout.write(f"{'appel':>8} {'requêtes':>9} {'latence (ms)':>13}")
+        for label, clear in (('froid', True), ('chaud', False)):
+            timings = []
+            for _ in range(repeat):
+                if clear:
+                    cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    response = client.get('/api/dashboard/')
+                    timings.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.content[:200]
+            timings.sort()
+            self.stdout.write(f"{label:>8} {len(queries):>9} {timings[len(timings) // 2] * 1000:>13.1f}")
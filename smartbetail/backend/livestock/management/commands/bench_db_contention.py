@@ -0,0 +1,158 @@
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+from livestock.models import Animal, Diagnostic, Maladie, SymptomeObserve
+from smartbetail_project.database import SQLITE_PRAGMAS
+
+# Réglages SQLite par défaut de Django (journal DELETE, transactions
+# DEFERRED), comparés au profil de settings.py
+SQLITE_DEFAULT = ({'journal_mode': 'delete'}, {'timeout': 5})
+
+
+def _writer(animal_ids, n_transactions, seed, results):
+    """Écritures de predict_disease : lecture puis deux INSERT par transaction"""
+    rng = np.random.default_rng(seed)
+    latencies, errors = [], 0
+    for _ in range(n_transactions):
+        animal_id = int(rng.choice(animal_ids))
+        began = time.perf_counter()
+        try:
+            with transaction.atomic():
+                maladie, _ = Maladie.objects.get_or_create(
+                    nom='Pneumonie', defaults={'description': '', 'symptomes_typiques': ''}
+                )
+                symptome = SymptomeObserve.objects.create(
+                    animal_id=animal_id, temperature=round(float(rng.normal(39, 1)), 1)
+                )
+                Diagnostic.objects.create(
+                    animal_id=animal_id, symptome_observe=symptome,
+                    maladie_predite=maladie, probabilite=0.8
+                )
+        except OperationalError:
+            # « database is locked »
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - began)
+    connection.close()
+    results.put(('writer', latencies, errors))
+
+
+def _reader(stop, results):
+    """Lectures concurrentes (compteurs du dashboard)"""
+    reads, errors = 0, 0
+    while not stop.is_set():
+        try:
+            Diagnostic.objects.filter(probabilite__gte=0.5).count()
+            reads += 1
+        except OperationalError:
+            errors += 1
+    connection.close()
+    results.put(('reader', reads, errors))
+
+
+class Command(BaseCommand):
+    help = ("Mesure la contention en écriture (transactions de predict_disease concurrentes) "
+            "pour le profil de base de données courant, sur une base jetable")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=2)
+        parser.add_argument('--transactions', type=int, default=200,
+                            help="Transactions par processus écrivain")
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        tmpdir = None
+        if vendor == 'sqlite':
+            # Base de test sur fichier (et non en mémoire) pour qu'elle soit
+            # partagée par les processus
+            tmpdir = tempfile.TemporaryDirectory()
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir.name, 'bench.sqlite3')
+
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            owner = User.objects.create(username='bench')
+            animal_ids = [
+                animal.id for animal in Animal.objects.bulk_create([
+                    Animal(nom=f'Animal {i}', numero_identification=f'BENCH-{i}', type_animal='bovin',
+                           race='Race', sexe='F', date_naissance=date(2020, 1, 1), proprietaire=owner)
+                    for i in range(100)
+                ])
+            ]
+
+            if vendor == 'sqlite':
+                rounds = [('sqlite défaut', *SQLITE_DEFAULT),
+                          # Base temporaire : profil complet, WAL compris
+                          ('sqlite profil', SQLITE_PRAGMAS, dict(connection.settings_dict['OPTIONS']))]
+            else:
+                rounds = [(settings.DATABASE_PROFILE, settings.SQLITE_PRAGMAS,
+                           dict(connection.settings_dict['OPTIONS']))]
+
+            self.stdout.write(
+                f"{options['writers']} écrivains x {options['transactions']} transactions, "
+                f"{options['readers']} lecteurs"
+            )
+            self.stdout.write(
+                f"{'profil':>14} {'tx/s':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+                f"{'verrouillées':>12} {'lectures/s':>11}"
+            )
+            for name, pragmas, db_options in rounds:
+                connection.settings_dict['OPTIONS'] = db_options
+                with override_settings(SQLITE_PRAGMAS=pragmas):
+                    self._round(name, animal_ids, options)
+        finally:
+            runner.teardown_databases(old_config)
+            if tmpdir is not None:
+                tmpdir.cleanup()
+
+    def _round(self, name, animal_ids, options):
+        # Les connexions ne sont pas partagées avec les processus fils ;
+        # une première connexion applique les PRAGMA persistants (journal)
+        connections.close_all()
+        connection.ensure_connection()
+        connections.close_all()
+
+        context = multiprocessing.get_context('fork')
+        results = context.Queue()
+        stop = context.Event()
+        writers = [
+            context.Process(target=_writer, args=(animal_ids, options['transactions'], seed, results))
+            for seed in range(options['writers'])
+        ]
+        readers = [context.Process(target=_reader, args=(stop, results)) for _ in range(options['readers'])]
+        began = time.perf_counter()
+        for process in readers + writers:
+            process.start()
+
+        latencies, locked, reads = [], 0, 0
+        for _ in writers:
+            _, values, errors = results.get(timeout=600)
+            latencies.extend(values)
+            locked += errors
+        elapsed = time.perf_counter() - began
+        stop.set()
+        for _ in readers:
+            _, count, errors = results.get(timeout=60)
+            reads += count
+            locked += errors
+        for process in readers + writers:
+            process.join()
+
+        latencies = np.array(latencies) * 1000
+        p50, p99 = np.percentile(latencies, [50, 99]) if len(latencies) else (float('nan'),) * 2
+        self.stdout.write(
+            f"{name:>14} {len(latencies) / elapsed:>8.0f} {p50:>9.1f} {p99:>9.1f} "
+            f"{locked:>12} {reads / elapsed:>11.0f}"
+        )
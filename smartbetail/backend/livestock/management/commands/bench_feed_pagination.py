@@ -0,0 +1,97 @@
+import base64
+import time
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.runner import DiscoverRunner
+from django.utils import timezone
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from livestock.models import Animal, SymptomeObserve
+
+PAGE_SIZE = 20
+
+
+def _cursor(position):
+    """Curseur DRF pointant juste après position (même encodage que CursorPagination)"""
+    return base64.b64encode(urlencode({'p': position}).encode('ascii')).decode('ascii')
+
+
+class Command(BaseCommand):
+    help = ("Compare la latence d'une page du flux des symptômes : pagination par "
+            "curseur vs pagination par numéro de page (COUNT + OFFSET)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 500_000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        # Base de test jetable, migrée (index compris) : la base de
+        # développement n'est pas touchée
+        runner = DiscoverRunner(verbosity=0)
+        old_config = runner.setup_databases()
+        try:
+            self._run(options['sizes'], options['repeat'])
+        finally:
+            runner.teardown_databases(old_config)
+
+    def _run(self, sizes, repeat):
+        owner = User.objects.create(username='bench')
+        animal = Animal.objects.create(nom='Bench', numero_identification='BENCH', type_animal='bovin',
+                                       race='Race', sexe='F', date_naissance=date(2020, 1, 1),
+                                       proprietaire=owner)
+        self.stdout.write(
+            f"{'lignes':>9} {'curseur p1':>11} {'curseur 90%':>12} {'offset p1':>10} {'offset 90%':>11}  (ms)"
+        )
+        start_date = timezone.make_aware(datetime(2020, 1, 1))
+        for size in sizes:
+            existing = SymptomeObserve.objects.count()
+            # Dates distinctes et croissantes
+            SymptomeObserve.objects.bulk_create([
+                SymptomeObserve(animal=animal, date_observation=start_date + timedelta(minutes=i))
+                for i in range(existing, size)
+            ], batch_size=10_000)
+
+            # Ligne située à 90 % de profondeur dans le flux (ordre décroissant)
+            depth = int(size * 0.9)
+            position = start_date + timedelta(minutes=size - 1 - depth)
+            timings = [
+                self._time(repeat, lambda: self._cursor_page(None)),
+                self._time(repeat, lambda: self._cursor_page(position)),
+                self._time(repeat, lambda: self._offset_page(1)),
+                self._time(repeat, lambda: self._offset_page(depth // PAGE_SIZE + 1)),
+            ]
+            self.stdout.write(f"{size:>9} " + ' '.join(
+                f"{t * 1000:>{w}.1f}" for t, w in zip(timings, (11, 12, 10, 11))
+            ))
+
+    def _time(self, repeat, func):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)[len(timings) // 2]
+
+    def _cursor_page(self, position):
+        url = f'/api/symptoms/?page_size={PAGE_SIZE}'
+        if position is not None:
+            url += f'&cursor={_cursor(position.isoformat())}'
+        response = Client().get(url)
+        assert response.status_code == 200, response.content[:200]
+        return response
+
+    def _offset_page(self, page):
+        # Ancienne pagination (PageNumberPagination + COUNT) sur la même requête
+        request = Request(APIRequestFactory().get('/api/symptoms/', {'page': page}))
+        paginator = PageNumberPagination()
+        paginator.page_size = PAGE_SIZE
+        queryset = SymptomeObserve.objects.select_related('animal__proprietaire').order_by(
+            '-date_observation', '-id'
+        )
+        return list(paginator.paginate_queryset(queryset, request))
@@ -0,0 +1,55 @@
+import time
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from ml_model.ml_predictor import get_predictor
+
+
+def _reference(predictor, symptoms_data):
+    # Boucle d'origine : un inverse_transform par classe, tri en Python
+    features = np.array([[symptoms_data.get(f, 0) for f in predictor.feature_names]], dtype=np.float64)
+    probabilities = predictor.engine.predict_proba(features)[0]
+    prediction = predictor.engine.predict(features)[0]
+    all_predictions = []
+    for i, probability in enumerate(probabilities):
+        disease = predictor.label_encoder.inverse_transform([i])[0]
+        all_predictions.append({'disease': disease, 'probability': probability})
+    all_predictions.sort(key=lambda x: x['probability'], reverse=True)
+    return predictor.label_encoder.inverse_transform([prediction])[0], all_predictions
+
+
+def _best_of(func, repeat, number):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    help = "Compare la prédiction top-k au classement complet d'origine (µs par animal)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--records', type=int, default=200, help="Taille du lot")
+        parser.add_argument('--top-k', type=int, default=1)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--number', type=int, default=50)
+
+    def handle(self, *args, **options):
+        predictor = get_predictor()
+        df = predictor.generate_training_data(options['records'], seed=3)
+        records = df[predictor.feature_names].to_dict('records')
+        record, top_k = records[0], options['top_k']
+        repeat, number = options['repeat'], options['number']
+        predictor.predict(record)
+
+        reference = _best_of(lambda: _reference(predictor, record), repeat, number)
+        unitaire = _best_of(lambda: predictor.predict(record, top_k=top_k), repeat, number)
+        lot = _best_of(lambda: predictor.predict(records, top_k=top_k), repeat, max(1, number // 10)) / len(records)
+
+        self.stdout.write(f"{'':>12} {'µs/animal':>10} {'gain':>8}")
+        for label, seconds in (('référence', reference), (f'top-{top_k}', unitaire), ('par lot', lot)):
+            self.stdout.write(f"{label:>12} {seconds * 1e6:>10.1f} {reference / seconds:>7.1f}x")
@@ -0,0 +1,45 @@
+import statistics
+import time
+
+import joblib
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ml_model.ml_predictor import LivestockMLPredictor
+from ml_model.tree_engine import CompiledForest
+
+
+def _timeit(func, X, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(X)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Compare la forêt scikit-learn et la forêt compilée (latence de predict_proba)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1, 64, 10000])
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        predictor = LivestockMLPredictor()
+        model = joblib.load(settings.ML_MODEL_PATH)['model']
+        forest = CompiledForest.from_sklearn(model)
+
+        samples = predictor.generate_training_data(max(options['sizes']))
+        X_all = samples[predictor.feature_names].astype(float).to_numpy()
+
+        self.stdout.write(f"{'lot':>8} {'sklearn (ms)':>14} {'compilé (ms)':>14} {'gain':>8}")
+        for size in options['sizes']:
+            X = X_all[:size]
+            if not np.array_equal(model.predict_proba(X), forest.predict_proba(X)):
+                self.stderr.write(f"Écart de probabilités pour un lot de {size}")
+            repeat = max(3, options['repeat'] if size < 1000 else options['repeat'] // 10)
+            sk = _timeit(model.predict_proba, X, repeat)
+            compiled = _timeit(forest.predict_proba, X, repeat)
+            self.stdout.write(f"{size:>8} {sk:>14.3f} {compiled:>14.3f} {sk / compiled:>7.1f}x")
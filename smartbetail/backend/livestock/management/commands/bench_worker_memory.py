@@ -0,0 +1,79 @@
+import multiprocessing
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ml_model.ml_predictor import LivestockMLPredictor
+
+TEST_SYMPTOMS = {
+    'temperature': 40.2, 'frequence_cardiaque': 85, 'frequence_respiratoire': 35,
+    'niveau_activite': 1, 'appetit': 2, 'fievre': True, 'toux': True,
+    'diarrhee': False, 'ecoulement_nasal': True, 'boiterie': False,
+    'abattement': True, 'perte_poids': False,
+}
+
+
+def _memory_kb():
+    """Rss et Pss (ko) du processus courant, d'après /proc (Linux)"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            key, _, rest = line.partition(':')
+            if key in ('Rss', 'Pss'):
+                values[key] = int(rest.split()[0])
+    return values
+
+
+def _worker(predictor, mode, barrier, results, done):
+    if mode == 'pickle':
+        # Ancien comportement : chaque worker désérialise sa propre copie
+        predictor = LivestockMLPredictor()
+        predictor.load_model(artifact_dir=os.devnull)
+    predictor.predict(TEST_SYMPTOMS)
+    # Tous les workers sont vivants au moment de la mesure, pour que le
+    # Pss répartisse correctement les pages partagées
+    barrier.wait()
+    results.put(_memory_kb())
+    # Rester en vie jusqu'à ce que toutes les mesures soient collectées
+    done.wait()
+
+
+class Command(BaseCommand):
+    help = "Mesure la mémoire (Rss/Pss) par worker : pickle par worker vs artefact memory-mappé préchargé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8)
+
+    def handle(self, *args, **options):
+        if not os.path.exists('/proc/self/smaps_rollup'):
+            self.stderr.write("Mesure disponible uniquement sous Linux (/proc/self/smaps_rollup)")
+            return
+
+        context = multiprocessing.get_context('fork')
+        n_workers = options['workers']
+        self.stdout.write(f"{'mode':>8} {'Rss/worker (Mo)':>16} {'Pss/worker (Mo)':>16}")
+        for mode in ('pickle', 'mmap'):
+            predictor = None
+            if mode == 'mmap':
+                # Préchargement dans le processus parent, avant le fork
+                predictor = LivestockMLPredictor()
+                predictor.load_artifact(settings.ML_ARTIFACT_DIR)
+
+            barrier = context.Barrier(n_workers)
+            results = context.Queue()
+            done = context.Event()
+            workers = [
+                context.Process(target=_worker, args=(predictor, mode, barrier, results, done))
+                for _ in range(n_workers)
+            ]
+            for worker in workers:
+                worker.start()
+            measures = [results.get(timeout=300) for _ in workers]
+            done.set()
+            for worker in workers:
+                worker.join()
+
+            rss = sum(m['Rss'] for m in measures) / n_workers / 1024
+            pss = sum(m['Pss'] for m in measures) / n_workers / 1024
+            self.stdout.write(f"{mode:>8} {rss:>16.1f} {pss:>16.1f}")
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ml_model.ml_predictor import LivestockMLPredictor
+
+
+class Command(BaseCommand):
+    help = "Génère un dataset synthétique par blocs et l'écrit en Parquet ou .npy"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Fichier de sortie (.parquet ou .npy)")
+        parser.add_argument('--samples', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--chunk-size', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        try:
+            LivestockMLPredictor().export_training_data(
+                options['output'], options['samples'],
+                seed=options['seed'], chunk_size=options['chunk_size']
+            )
+        except (ImportError, ValueError) as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{options['samples']} échantillons écrits dans {options['output']} en {elapsed:.2f} s")
@@ -0,0 +1,53 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from livestock import telemetry
+
+
+class Command(BaseCommand):
+    help = "Ingère un fichier (ou l'entrée standard) de lectures capteurs NDJSON/CSV"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier .ndjson/.jsonl/.csv, ou - pour l'entrée standard")
+        parser.add_argument('--format', choices=['ndjson', 'csv'],
+                            help="Format (déduit de l'extension par défaut)")
+        parser.add_argument('--fenetre', help="Sous-échantillonnage en observations (ex. 15min)")
+        parser.add_argument('--chunk-size', type=int, default=telemetry.DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            if path.endswith('.csv'):
+                fmt = 'csv'
+            elif path.endswith(('.ndjson', '.jsonl')):
+                fmt = 'ndjson'
+            else:
+                raise CommandError("Format indéterminé : préciser --format")
+        try:
+            window = telemetry.parse_window(options['fenetre'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        try:
+            stats = telemetry.ingest(
+                telemetry.read_chunks(stream, fmt, options['chunk_size']), window=window
+            )
+        except telemetry.IngestionError as e:
+            self._report(e.stats)
+            raise CommandError(str(e))
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+        self._report(stats)
+
+    def _report(self, stats):
+        self.stdout.write(
+            f"{stats['lignes_lues']} lignes lues, {stats['lectures_inserees']} lectures, "
+            f"{stats['observations_creees']} observations en {stats['duree_secondes']} s "
+            f"({stats['lignes_par_seconde']} lignes/s)"
+        )
+        for reason, count in stats['rejets'].items():
+            self.stdout.write(f"  rejet {reason} : {count}")
@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from livestock.features import feature_store
+
+
+class Command(BaseCommand):
+    help = ("Reconstruit les états temporels par animal (EtatTemporel) depuis l'historique "
+            "SymptomeObserve, après un import ou un changement de format")
+
+    def add_arguments(self, parser):
+        parser.add_argument('animal_ids', nargs='*', type=int,
+                            help="Animaux à reconstruire (tous par défaut)")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        count = feature_store.rebuild(options['animal_ids'] or None)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(f"{count} états temporels reconstruits en {elapsed:.2f} s")
@@ -0,0 +1,83 @@
+import multiprocessing
+import os
+import queue
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from livestock import prediction_queue
+from ml_model.ml_predictor import PredictorNotReady, get_predictor, predictor_manager
+
+
+def _worker(stop, options, results):
+    # Le processus parent gère Ctrl-C et demande l'arrêt via stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    processed = 0
+    try:
+        processed = prediction_queue.work(
+            get_predictor,
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+            stop=stop,
+            max_idle=1 if options['drain'] else None,
+        )
+    finally:
+        results.put(processed)
+
+
+class Command(BaseCommand):
+    help = "Lance le pool local de workers qui traite la file des prédictions asynchrones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1))
+        parser.add_argument('--batch-size', type=int, default=prediction_queue.DEFAULT_BATCH_SIZE)
+        parser.add_argument('--poll-interval', type=float, default=prediction_queue.POLL_INTERVAL)
+        parser.add_argument('--drain', action='store_true',
+                            help="S'arrêter dès que la file est vide")
+
+    def handle(self, *args, **options):
+        # Modèle chargé avant le fork : l'artefact memory-mappé est partagé
+        # entre les workers
+        try:
+            predictor_manager.warm_up()
+        except PredictorNotReady as e:
+            self.stderr.write(f"Modèle indisponible, les workers réessaieront : {e}")
+        requeued, failed = prediction_queue.requeue_stale()
+        if requeued or failed:
+            self.stdout.write(f"{requeued} tâches remises en file, {failed} en échec")
+
+        # Les connexions ne doivent pas être partagées avec les processus fils
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        results = context.Queue()
+        workers = [
+            context.Process(target=_worker, args=(stop, options, results))
+            for _ in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"{len(workers)} workers démarrés (lots de {options['batch_size']})")
+
+        signal.signal(signal.SIGTERM, lambda *_: stop.set())
+        # join plutôt qu'attendre un résultat par worker : un worker tué
+        # (OOM, SIGKILL) n'en envoie jamais
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
+
+        processed = 0
+        while True:
+            try:
+                processed += results.get_nowait()
+            except queue.Empty:
+                break
+        for worker in workers:
+            if worker.exitcode:
+                self.stderr.write(f"Worker {worker.pid} arrêté avec le code {worker.exitcode}")
+        self.stdout.write(f"{processed} prédictions traitées")
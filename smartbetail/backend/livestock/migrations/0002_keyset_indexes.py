@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='diagnostic',
+            index=models.Index(fields=['date_diagnostic', 'id'], name='diagnostic_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='diagnostic',
+            index=models.Index(fields=['animal', 'date_diagnostic'], name='diagnostic_animal_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planificationsoin',
+            index=models.Index(fields=['date_prevue', 'id'], name='soin_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='planificationsoin',
+            index=models.Index(fields=['statut', 'date_prevue'], name='soin_statut_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='symptomeobserve',
+            index=models.Index(fields=['date_observation', 'id'], name='symptome_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='symptomeobserve',
+            index=models.Index(fields=['animal', 'date_observation'], name='symptome_animal_date_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='symptomeobserve',
+            name='date_observation',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name="Date d'observation"),
+        ),
+        migrations.CreateModel(
+            name='LectureCapteur',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('horodatage', models.DateTimeField(verbose_name='Horodatage de la mesure')),
+                ('temperature', models.FloatField(blank=True, null=True, verbose_name='Température (°C)')),
+                ('frequence_cardiaque', models.SmallIntegerField(blank=True, null=True, verbose_name='Fréquence cardiaque (bpm)')),
+                ('frequence_respiratoire', models.SmallIntegerField(blank=True, null=True, verbose_name='Fréquence respiratoire')),
+                ('animal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lectures_capteur', to='livestock.animal')),
+            ],
+            options={
+                'verbose_name': 'Lecture capteur',
+                'verbose_name_plural': 'Lectures capteur',
+                'indexes': [models.Index(fields=['animal', 'horodatage'], name='lecture_animal_date_idx')],
+            },
+        ),
+    ]
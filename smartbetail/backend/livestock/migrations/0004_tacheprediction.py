@@ -0,0 +1,35 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0003_lecturecapteur'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TachePrediction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('statut', models.CharField(choices=[('en_attente', 'En attente'), ('en_cours', 'En cours'), ('terminee', 'Terminée'), ('echec', 'Échec')], default='en_attente', max_length=20, verbose_name='Statut')),
+                ('callback_url', models.URLField(blank=True, verbose_name='URL de notification')),
+                ('jeton', models.CharField(blank=True, max_length=32)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('erreur', models.TextField(blank=True)),
+                ('date_creation', models.DateTimeField(auto_now_add=True)),
+                ('date_debut', models.DateTimeField(blank=True, null=True)),
+                ('date_fin', models.DateTimeField(blank=True, null=True)),
+                ('diagnostic', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='livestock.diagnostic')),
+                ('symptome_observe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='tache_prediction', to='livestock.symptomeobserve')),
+            ],
+            options={
+                'verbose_name': 'Tâche de prédiction',
+                'verbose_name_plural': 'Tâches de prédiction',
+                'indexes': [models.Index(fields=['statut', 'id'], name='tache_statut_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.4 on 2026-10-17 17:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('livestock', '0004_tacheprediction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EtatTemporel',
+            fields=[
+                ('animal', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='etat_temporel', serialize=False, to='livestock.animal')),
+                ('etat', models.BinaryField()),
+                ('date_maj', models.DateTimeField(verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'État temporel',
+                'verbose_name_plural': 'États temporels',
+            },
+        ),
+    ]
@@ -116,17 +116,61 @@ class SymptomeObserve(models.Model):
     perte_poids = models.BooleanField(default=False, verbose_name="Perte de poids")
     
     notes_veterinaire = models.TextField(blank=True, verbose_name="Notes vétérinaire")
-    date_observation = models.DateTimeField(auto_now_add=True, verbose_name="Date d'observation")
+    # Par défaut l'heure d'enregistrement ; l'ingestion des capteurs la
+    # fixe à l'heure de la mesure
+    date_observation = models.DateTimeField(default=timezone.now, verbose_name="Date d'observation")
     
     class Meta:
         verbose_name = "Symptôme observé"
         verbose_name_plural = "Symptômes observés"
         ordering = ['-date_observation']
+        # Index de parcours par clé (pagination par curseur) : flux global
+        # et flux d'un animal
+        indexes = [
+            models.Index(fields=['date_observation', 'id'], name='symptome_date_idx'),
+            models.Index(fields=['animal', 'date_observation'], name='symptome_animal_date_idx'),
+        ]
     
     def __str__(self):
         return f"Symptômes de {self.animal.nom} - {self.date_observation.strftime('%d/%m/%Y')}"
 
 
+class LectureCapteur(models.Model):
+    """Mesure brute d'un capteur (collier), stockée sous forme compacte"""
+    animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='lectures_capteur')
+    horodatage = models.DateTimeField(verbose_name="Horodatage de la mesure")
+    temperature = models.FloatField(null=True, blank=True, verbose_name="Température (°C)")
+    frequence_cardiaque = models.SmallIntegerField(null=True, blank=True, verbose_name="Fréquence cardiaque (bpm)")
+    frequence_respiratoire = models.SmallIntegerField(null=True, blank=True, verbose_name="Fréquence respiratoire")
+    
+    class Meta:
+        verbose_name = "Lecture capteur"
+        verbose_name_plural = "Lectures capteur"
+        indexes = [
+            models.Index(fields=['animal', 'horodatage'], name='lecture_animal_date_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Lecture {self.animal_id} - {self.horodatage:%d/%m/%Y %H:%M}"
+
+
+class EtatTemporel(models.Model):
+    """
+    État incrémental des caractéristiques temporelles d'un animal (fenêtres
+    glissantes, voir features.py), sérialisé en un tableau binaire compact
+    """
+    animal = models.OneToOneField(Animal, on_delete=models.CASCADE, primary_key=True, related_name='etat_temporel')
+    etat = models.BinaryField()
+    date_maj = models.DateTimeField(verbose_name="Dernière mise à jour")
+    
+    class Meta:
+        verbose_name = "État temporel"
+        verbose_name_plural = "États temporels"
+    
+    def __str__(self):
+        return f"État temporel {self.animal_id}"
+
+
 class Diagnostic(models.Model):
     """Modèle pour enregistrer les diagnostics (prédictions IA + validation vétérinaire)"""
     animal = models.ForeignKey(Animal, on_delete=models.CASCADE, related_name='diagnostics')
@@ -143,6 +187,10 @@ class Diagnostic(models.Model):
         verbose_name = "Diagnostic"
         verbose_name_plural = "Diagnostics"
         ordering = ['-date_diagnostic']
+        indexes = [
+            models.Index(fields=['date_diagnostic', 'id'], name='diagnostic_date_idx'),
+            models.Index(fields=['animal', 'date_diagnostic'], name='diagnostic_animal_date_idx'),
+        ]
     
     def __str__(self):
         return f"Diagnostic {self.animal.nom} - {self.maladie_predite.nom} ({self.probabilite:.1%})"
@@ -182,6 +230,10 @@ class PlanificationSoin(models.Model):
         verbose_name = "Planification de soin"
         verbose_name_plural = "Planifications de soins"
         ordering = ['date_prevue']
+        indexes = [
+            models.Index(fields=['date_prevue', 'id'], name='soin_date_idx'),
+            models.Index(fields=['statut', 'date_prevue'], name='soin_statut_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nom_soin} - {self.animal.nom} ({self.date_prevue.strftime('%d/%m/%Y')})"
@@ -198,3 +250,36 @@ class PlanificationSoin(models.Model):
             return None
         delta = self.date_prevue - timezone.now()
         return delta.days
+
+
+class TachePrediction(models.Model):
+    """Prédiction en file d'attente, traitée par les workers (voir prediction_queue.py)"""
+    STATUTS = [
+        ('en_attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('terminee', 'Terminée'),
+        ('echec', 'Échec'),
+    ]
+    
+    symptome_observe = models.OneToOneField(SymptomeObserve, on_delete=models.CASCADE, related_name='tache_prediction')
+    statut = models.CharField(max_length=20, choices=STATUTS, default='en_attente', verbose_name="Statut")
+    diagnostic = models.ForeignKey(Diagnostic, on_delete=models.SET_NULL, null=True, blank=True)
+    callback_url = models.URLField(blank=True, verbose_name="URL de notification")
+    # Jeton du lot qui a réservé la tâche
+    jeton = models.CharField(max_length=32, blank=True)
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    erreur = models.TextField(blank=True)
+    date_creation = models.DateTimeField(auto_now_add=True)
+    date_debut = models.DateTimeField(null=True, blank=True)
+    date_fin = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Tâche de prédiction"
+        verbose_name_plural = "Tâches de prédiction"
+        # Réservation des tâches en attente dans l'ordre d'arrivée
+        indexes = [
+            models.Index(fields=['statut', 'id'], name='tache_statut_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Tâche {self.id} ({self.statut})"
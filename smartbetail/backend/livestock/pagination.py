@@ -0,0 +1,134 @@
+from collections import OrderedDict
+
+# _reverse_ordering et le corps de CursorPagination.paginate_queryset
+# (repris dans page_queryset/set_page) sont internes à DRF : vérifiés avec
+# djangorestframework 3.16 (requirements.txt). À chaque montée de version,
+# CursorPaginationTest.test_identique_a_drf compare les pages et les liens
+# à ceux de CursorPagination.
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class FeedCursorPagination(CursorPagination):
+    """
+    Pagination par curseur des flux chronologiques (symptômes, diagnostics,
+    soins) : chaque page est une requête WHERE date < curseur LIMIT n sur
+    un index (voir Meta.indexes), sans OFFSET ni COUNT(*), donc de coût
+    constant quelle que soit la profondeur ou la taille de la table.
+
+    Le total n'est calculé que sur demande explicite (?count=true).
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    count_query_param = 'count'
+
+    def get_ordering(self, request, queryset, view):
+        # Ordre déclaré par la vue (ex. ('-date_diagnostic', '-id')),
+        # couvert par un index composite
+        ordering = getattr(view, 'ordering', None)
+        if ordering:
+            return tuple(ordering)
+        return super().get_ordering(request, queryset, view)
+
+    def wants_count(self, request):
+        return request.query_params.get(self.count_query_param) in ('1', 'true')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = queryset.count() if self.wants_count(request) else None
+        page_queryset = self.page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page(list(page_queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset avec l'ORM asynchrone (vues ASGI)"""
+        self.count = await queryset.acount() if self.wants_count(request) else None
+        page_queryset = self.page_queryset(queryset, request, view)
+        if page_queryset is None:
+            return None
+        return self.set_page([item async for item in page_queryset])
+
+    # CursorPagination.paginate_queryset découpé en deux : construction de
+    # la requête de la page (sans l'exécuter), puis calcul des positions
+    # à partir des résultats, pour pouvoir lire la page en synchrone ou en
+    # asynchrone. Même algorithme que DRF.
+
+    def page_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            # (curseur inversé) XOR (ordre décroissant)
+            if self.cursor.reverse != is_reversed:
+                kwargs = {order_attr + '__lt': current_position}
+            else:
+                kwargs = {order_attr + '__gt': current_position}
+            queryset = queryset.filter(**kwargs)
+
+        # Un élément de plus pour savoir s'il existe une page suivante
+        return queryset[offset:offset + self.page_size + 1]
+
+    def set_page(self, results):
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.count is not None:
+            response.data = OrderedDict([('count', self.count), *response.data.items()])
+        return response
+
+    def get_paginated_response_schema(self, schema):
+        schema = super().get_paginated_response_schema(schema)
+        schema['properties']['count'] = {'type': 'integer', 'example': 123}
+        return schema
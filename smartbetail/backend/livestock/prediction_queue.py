@@ -0,0 +1,194 @@
+import json
+import logging
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .callbacks import notifier
+from .dashboard import invalidate_dashboard
+from .features import feature_store
+from .diagnostics import SERVING_TOP_K, construire_diagnostics, resultat_diagnostic
+from .models import Diagnostic, SymptomeObserve, TachePrediction
+from ml_model.ml_predictor import PredictorNotReady
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale d'un micro-lot : une seule matrice passée au modèle
+DEFAULT_BATCH_SIZE = 64
+# Attente entre deux scrutations lorsque la file est vide (secondes)
+POLL_INTERVAL = 0.5
+# Une tâche réservée depuis plus longtemps (worker tué) est remise en file
+STALE_AFTER = timedelta(minutes=5)
+MAX_TENTATIVES = 3
+
+
+def enqueue(data, callback_url=''):
+    """
+    Enregistre l'observation et la tâche de prédiction associée, sans
+    appeler le modèle. data contient les champs de SymptomeObserve.
+    """
+    with transaction.atomic():
+        symptome = SymptomeObserve.objects.create(**data)
+        return TachePrediction.objects.create(symptome_observe=symptome, callback_url=callback_url)
+
+
+def claim(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Réserve jusqu'à batch_size tâches en attente, les plus anciennes
+    d'abord. La réservation est un UPDATE conditionnel (statut toujours
+    en_attente) marqué d'un jeton : deux workers ne peuvent pas obtenir la
+    même tâche, sans verrou de table ni SELECT ... FOR UPDATE.
+    """
+    ids = list(
+        TachePrediction.objects.filter(statut='en_attente')
+        .order_by('id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    jeton = uuid.uuid4().hex
+    TachePrediction.objects.filter(id__in=ids, statut='en_attente').update(
+        statut='en_cours', jeton=jeton, date_debut=timezone.now(), tentatives=F('tentatives') + 1
+    )
+    return list(
+        TachePrediction.objects.filter(jeton=jeton, statut='en_cours')
+        .select_related('symptome_observe').order_by('id')
+    )
+
+
+def requeue_stale(older_than=STALE_AFTER):
+    """Remet en file les tâches abandonnées ; échec après MAX_TENTATIVES"""
+    limite = timezone.now() - older_than
+    stale = TachePrediction.objects.filter(statut='en_cours', date_debut__lt=limite)
+    echecs = stale.filter(tentatives__gte=MAX_TENTATIVES).update(
+        statut='echec', erreur='Abandonnée par les workers', date_fin=timezone.now()
+    )
+    return stale.update(statut='en_attente', jeton=''), echecs
+
+
+def process(taches, predictor):
+    """
+    Traite un lot de tâches réservées : un seul appel predict_batch, puis
+    les diagnostics et les statuts écrits dans une transaction.
+    """
+    symptomes = [tache.symptome_observe for tache in taches]
+    # Champs de l'observation ; les caractéristiques temporelles sont
+    # ajoutées par le magasin
+    records = [
+        {name: getattr(symptome, name) for name in predictor.snapshot_features}
+        for symptome in symptomes
+    ]
+    records = feature_store.enrich(
+        predictor, records, [symptome.animal_id for symptome in symptomes],
+        [symptome.date_observation for symptome in symptomes]
+    )
+    prediction_results = predictor.predict_batch(records, top_k=SERVING_TOP_K)
+    diagnostics = construire_diagnostics(symptomes, prediction_results)
+
+    fin = timezone.now()
+    with transaction.atomic():
+        # Une tâche remise en file par requeue_stale, puis réservée par un
+        # autre worker, n'appartient plus à ce lot : pas de second diagnostic
+        reservees = set(_reserved(taches).select_for_update().values_list('id', flat=True))
+        termines = [(tache, diagnostic) for tache, diagnostic in zip(taches, diagnostics) if tache.id in reservees]
+        terminees = [tache for tache, _ in termines]
+        Diagnostic.objects.bulk_create([diagnostic for _, diagnostic in termines])
+        for tache, diagnostic in termines:
+            tache.diagnostic = diagnostic
+            tache.statut = 'terminee'
+            tache.date_fin = fin
+        TachePrediction.objects.bulk_update(terminees, ['diagnostic', 'statut', 'date_fin'])
+        # bulk_create n'émet pas de signaux post_save
+        transaction.on_commit(invalidate_dashboard)
+
+    # Seules les tâches finalisées par ce lot sont notifiées, hors du
+    # chemin de réservation (voir callbacks.py)
+    for tache in terminees:
+        if tache.callback_url:
+            notify(tache)
+
+
+def _reserved(taches):
+    """Tâches du lot toujours réservées avec le jeton de claim"""
+    return TachePrediction.objects.filter(
+        id__in=[t.id for t in taches], jeton=taches[0].jeton, statut='en_cours'
+    )
+
+
+def _fail(taches, erreur):
+    _reserved(taches).update(statut='echec', erreur=erreur, date_fin=timezone.now())
+
+
+def _release(taches):
+    _reserved(taches).update(statut='en_attente', jeton='', tentatives=F('tentatives') - 1)
+
+
+def run_once(predictor_getter, batch_size=DEFAULT_BATCH_SIZE):
+    """Réserve et traite un micro-lot ; retourne le nombre de tâches"""
+    taches = claim(batch_size)
+    if not taches:
+        return 0
+    try:
+        process(taches, predictor_getter())
+    except PredictorNotReady:
+        # Modèle pas encore prêt : les tâches restent en file
+        _release(taches)
+        raise
+    except Exception as e:
+        logger.exception("Échec du lot de %d prédictions", len(taches))
+        _fail(taches, str(e))
+    return len(taches)
+
+
+def work(predictor_getter, batch_size=DEFAULT_BATCH_SIZE, poll_interval=POLL_INTERVAL,
+         stop=None, max_idle=None):
+    """
+    Boucle d'un worker : traite les micro-lots tant que la file n'est pas
+    vide, puis scrute toutes les poll_interval secondes. S'arrête quand
+    stop (threading/multiprocessing Event) est levé, ou après max_idle
+    scrutations vides consécutives.
+    """
+    idle = 0
+    processed = 0
+    while stop is None or not stop.is_set():
+        close_old_connections()
+        try:
+            count = run_once(predictor_getter, batch_size)
+        except PredictorNotReady:
+            count = 0
+        processed += count
+        if count:
+            idle = 0
+            continue
+        idle += 1
+        if max_idle is not None and idle >= max_idle:
+            break
+        requeue_stale()
+        time.sleep(poll_interval)
+    # Notifications encore en file : envoyées avant l'arrêt du processus
+    notifier.flush()
+    return processed
+
+
+def job_payload(tache):
+    """Représentation d'une tâche (réponse de suivi et notification)"""
+    payload = {
+        'job_id': tache.id,
+        'statut': tache.statut,
+        'symptome_observe_id': tache.symptome_observe_id,
+        'date_creation': tache.date_creation.isoformat(),
+        'date_fin': tache.date_fin.isoformat() if tache.date_fin else None,
+    }
+    if tache.statut == 'terminee' and tache.diagnostic is not None:
+        payload['resultat'] = resultat_diagnostic(tache.diagnostic)
+    elif tache.statut == 'echec':
+        payload['erreur'] = tache.erreur
+    return payload
+
+
+def notify(tache):
+    """Met en file le POST du résultat sur callback_url (envoyé par callbacks.notifier)"""
+    return notifier.submit(tache.callback_url, json.dumps(job_payload(tache)).encode())
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from .callbacks import callback_allowed
 from .models import Animal, Maladie, Traitement, SymptomeObserve, Diagnostic, PlanificationSoin
 from django.contrib.auth.models import User
 
@@ -95,6 +96,95 @@ class PlanificationSoinSerializer(serializers.ModelSerializer):
         read_only_fields = ['date_creation']
 
 
+def requested_expansions(request):
+    """Champs demandés via ?expand=champ1,champ2"""
+    if request is None:
+        return set()
+    expand = request.query_params.get('expand', '')
+    return {name.strip() for name in expand.split(',') if name.strip()}
+
+
+class ExpandableSerializerMixin:
+    """
+    Serializer compact pour les listes : les relations sont rendues par
+    leur identifiant (plus quelques champs dénormalisés) et remplacées par
+    le serializer imbriqué complet lorsqu'elles sont demandées via ?expand=
+    """
+    expandable_fields = {}
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        expand = requested_expansions(self.context.get('request'))
+        for name in expand & self.expandable_fields.keys():
+            self.fields[name] = self.expandable_fields[name](read_only=True)
+
+
+class SymptomeObserveListSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    """Serializer compact des symptômes observés (listes)"""
+    animal_nom = serializers.CharField(source='animal.nom', read_only=True)
+    
+    expandable_fields = {'animal': AnimalSerializer}
+    
+    class Meta:
+        model = SymptomeObserve
+        fields = [
+            'id', 'animal', 'animal_nom', 'temperature', 'frequence_cardiaque',
+            'frequence_respiratoire', 'niveau_activite', 'appetit', 'fievre',
+            'toux', 'diarrhee', 'ecoulement_nasal', 'boiterie', 'abattement',
+            'perte_poids', 'notes_veterinaire', 'date_observation'
+        ]
+        read_only_fields = fields
+
+
+class DiagnosticListSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    """Serializer compact des diagnostics (listes)"""
+    animal_nom = serializers.CharField(source='animal.nom', read_only=True)
+    maladie_nom = serializers.CharField(source='maladie_predite.nom', read_only=True)
+    maladie_gravite = serializers.CharField(source='maladie_predite.gravite', read_only=True)
+    traitement_nom = serializers.CharField(source='traitement_recommande.nom', read_only=True, default=None)
+    
+    expandable_fields = {
+        'animal': AnimalSerializer,
+        'symptome_observe': SymptomeObserveSerializer,
+        'maladie_predite': MaladieSerializer,
+        'traitement_recommande': TraitementSerializer,
+        'veterinaire': UserSerializer,
+    }
+    
+    class Meta:
+        model = Diagnostic
+        fields = [
+            'id', 'animal', 'animal_nom', 'symptome_observe', 'maladie_predite',
+            'maladie_nom', 'maladie_gravite', 'probabilite', 'confirme_par_veterinaire',
+            'veterinaire', 'traitement_recommande', 'traitement_nom',
+            'notes_diagnostic', 'date_diagnostic'
+        ]
+        read_only_fields = fields
+
+
+class PlanificationSoinListSerializer(ExpandableSerializerMixin, serializers.ModelSerializer):
+    """Serializer compact de la planification des soins (listes)"""
+    animal_nom = serializers.CharField(source='animal.nom', read_only=True)
+    animal_numero_identification = serializers.CharField(source='animal.numero_identification', read_only=True)
+    est_en_retard = serializers.ReadOnlyField()
+    jours_jusqu_echeance = serializers.ReadOnlyField()
+    
+    expandable_fields = {
+        'animal': AnimalSerializer,
+        'veterinaire_responsable': UserSerializer,
+    }
+    
+    class Meta:
+        model = PlanificationSoin
+        fields = [
+            'id', 'animal', 'animal_nom', 'animal_numero_identification', 'type_soin',
+            'nom_soin', 'description', 'date_prevue', 'date_realisation', 'statut',
+            'veterinaire_responsable', 'rappel_envoye', 'notes', 'est_en_retard',
+            'jours_jusqu_echeance', 'date_creation'
+        ]
+        read_only_fields = fields
+
+
 class PredictionInputSerializer(serializers.Serializer):
     """Serializer pour les données d'entrée de prédiction"""
     animal_id = serializers.IntegerField()
@@ -121,6 +211,42 @@ class PredictionInputSerializer(serializers.Serializer):
         return value
 
 
+class AsyncPredictionInputSerializer(PredictionInputSerializer):
+    """Prédiction mise en file (?async=true), avec notification optionnelle"""
+    callback_url = serializers.URLField(required=False, allow_blank=True)
+
+    def validate_callback_url(self, value):
+        """https vers un hôte de settings.PREDICTION_CALLBACK_HOSTS uniquement"""
+        if value and not callback_allowed(value):
+            raise serializers.ValidationError("URL de notification non autorisée (https vers un hôte autorisé)")
+        return value
+
+
+class BatchPredictionItemSerializer(PredictionInputSerializer):
+    """Enregistrement de symptômes d'un lot (animaux vérifiés par le lot)"""
+    
+    def validate_animal_id(self, value):
+        return value
+
+
+class BatchPredictionInputSerializer(serializers.Serializer):
+    """Serializer pour une prédiction par lot (tout un troupeau)"""
+    MAX_SIZE = 1000
+    
+    observations = BatchPredictionItemSerializer(many=True, allow_empty=False, max_length=MAX_SIZE)
+    
+    def validate_observations(self, value):
+        """Valide que tous les animaux existent, en une seule requête"""
+        animal_ids = {item['animal_id'] for item in value}
+        existing = set(Animal.objects.filter(id__in=animal_ids).values_list('id', flat=True))
+        missing = sorted(animal_ids - existing)
+        if missing:
+            raise serializers.ValidationError(
+                f"Animaux non trouvés : {', '.join(str(i) for i in missing)}"
+            )
+        return value
+
+
 class PredictionOutputSerializer(serializers.Serializer):
     """Serializer pour les résultats de prédiction"""
     maladie_predite = MaladieSerializer()
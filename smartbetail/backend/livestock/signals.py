@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from .catalog import disease_catalog
+from .dashboard import invalidate_dashboard
+from .features import feature_store
+from .models import Animal, Diagnostic, Maladie, PlanificationSoin, SymptomeObserve, Traitement
+
+
+@receiver([post_save, post_delete], sender=Animal)
+@receiver([post_save, post_delete], sender=Diagnostic)
+@receiver([post_save, post_delete], sender=PlanificationSoin)
+def invalider_dashboard(sender, **kwargs):
+    """Les compteurs du dashboard dépendent de ces tables"""
+    invalidate_dashboard()
+
+
+@receiver([post_save, post_delete], sender=Maladie)
+@receiver([post_save, post_delete], sender=Traitement)
+@receiver(m2m_changed, sender=Traitement.maladies.through)
+def invalider_catalogue(sender, **kwargs):
+    """Catalogue maladies/traitements utilisé par les prédictions"""
+    disease_catalog.invalidate()
+
+
+@receiver(post_save, sender=SymptomeObserve)
+def mettre_a_jour_etat_temporel(sender, instance, created, raw=False, **kwargs):
+    """Fenêtres glissantes de l'animal (features.py) ; bulk_create les met à jour lui-même"""
+    if created and not raw and feature_store.enabled:
+        feature_store.record([instance])
+
+
+@receiver(connection_created)
+def configurer_sqlite(sender, connection, **kwargs):
+    """PRAGMA du profil SQLite (settings.SQLITE_PRAGMAS), à chaque connexion"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,238 @@
+import codecs
+import io
+import time
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+
+from .features import feature_store
+from .models import Animal, LectureCapteur, SymptomeObserve
+
+# Plages physiologiquement plausibles ; une mesure hors plage fait rejeter
+# la ligne (capteur défaillant)
+VITALS = {
+    'temperature': (30.0, 45.0),
+    'frequence_cardiaque': (20, 250),
+    'frequence_respiratoire': (5, 120),
+}
+COLUMNS = ['animal_id', 'horodatage', *VITALS]
+
+FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/csv': 'csv',
+}
+
+# Décalage horaire en fin d'horodatage ISO 8601 (Z, +01:00, -0500)
+UTC_OFFSET = r'\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?\s*(?:[Zz]|[+-]\d{2}(?::?\d{2})?)$'
+
+DEFAULT_CHUNK_SIZE = 10_000
+BATCH_SIZE = 2_000
+
+
+class IngestionError(ValueError):
+    """Erreur de lecture ou de validation ; stats décrit ce qui a été écrit"""
+
+    def __init__(self, message, stats):
+        super().__init__(message)
+        self.stats = stats
+
+
+def read_chunks(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Lit un flux NDJSON ou CSV par blocs (DataFrames de chunk_size lignes)"""
+    if fmt == 'ndjson':
+        if not isinstance(stream, io.TextIOBase):
+            # Le lecteur JSON par lignes de pandas n'accepte que du texte
+            stream = codecs.getreader('utf-8')(stream)
+        reader = pd.read_json(stream, lines=True, chunksize=chunk_size, dtype=False, convert_dates=False)
+    elif fmt == 'csv':
+        reader = pd.read_csv(stream, chunksize=chunk_size)
+    else:
+        raise ValueError(f"Format non supporté : {fmt} (ndjson ou csv)")
+    with reader:
+        yield from reader
+
+
+def parse_window(value):
+    """Fenêtre de sous-échantillonnage ('15min', '1h'...), ou None"""
+    if not value:
+        return None
+    try:
+        window = pd.Timedelta(value)
+    except ValueError:
+        raise ValueError(f"Fenêtre invalide : {value} (ex. 15min, 1h)")
+    if window <= pd.Timedelta(0):
+        raise ValueError(f"Fenêtre invalide : {value}")
+    return window
+
+
+def _parse_timestamps(values):
+    """Horodatages en UTC ; les heures sans fuseau sont dans TIME_ZONE"""
+    # Heures avec et sans décalage peuvent se mélanger dans un même bloc :
+    # elles sont converties séparément
+    offset = values.astype(str).str.contains(UTC_OFFSET, regex=True)
+    aware = pd.to_datetime(values[offset], errors='coerce', format='ISO8601', utc=True)
+    naive = pd.to_datetime(values[~offset], errors='coerce', format='ISO8601')
+    naive = naive.dt.tz_localize(settings.TIME_ZONE, ambiguous='NaT', nonexistent='NaT').dt.tz_convert('UTC')
+    if not len(aware):
+        return naive
+    if not len(naive):
+        return aware
+    return pd.concat([aware, naive]).reindex(values.index)
+
+
+def validate_chunk(df):
+    """
+    Valide un bloc de lectures en quelques opérations vectorisées.
+
+    Retourne (lectures valides, {motif: nombre de lignes rejetées}). Les
+    colonnes animal_id et horodatage sont obligatoires, chaque ligne doit
+    porter au moins une mesure et toutes ses mesures doivent être plausibles.
+    """
+    missing = [name for name in ('animal_id', 'horodatage') if name not in df.columns]
+    if missing:
+        raise ValueError(f"Colonnes manquantes : {', '.join(missing)}")
+
+    df = df.reindex(columns=COLUMNS)
+    animal_id = pd.to_numeric(df['animal_id'], errors='coerce')
+    horodatage = _parse_timestamps(df['horodatage'])
+    vitals = {name: pd.to_numeric(df[name], errors='coerce') for name in VITALS}
+
+    out_of_range = pd.Series(False, index=df.index)
+    for name, (low, high) in VITALS.items():
+        out_of_range |= vitals[name].notna() & ~vitals[name].between(low, high)
+
+    checks = {
+        'animal_id_invalide': animal_id.isna() | (animal_id % 1 != 0),
+        'horodatage_invalide': horodatage.isna(),
+        'sans_mesure': pd.concat(vitals, axis=1).isna().all(axis=1),
+        'hors_plage': out_of_range,
+    }
+
+    # Animaux inconnus : une requête par bloc
+    candidates = animal_id[~checks['animal_id_invalide']].astype('int64').unique().tolist()
+    known = set(Animal.objects.filter(id__in=candidates).values_list('id', flat=True))
+    checks['animal_inconnu'] = ~checks['animal_id_invalide'] & ~animal_id.isin(known)
+
+    rejected = pd.Series(False, index=df.index)
+    rejets = {}
+    for reason, mask in checks.items():
+        # Chaque ligne n'est comptée que pour son premier motif de rejet
+        new = mask & ~rejected
+        if new.any():
+            rejets[reason] = int(new.sum())
+        rejected |= mask
+
+    valid = pd.DataFrame({'animal_id': animal_id, 'horodatage': horodatage, **vitals})[~rejected]
+    valid['animal_id'] = valid['animal_id'].astype('int64')
+    return valid, rejets
+
+
+def _nullable(series, cast=None):
+    """Liste Python de la colonne, NaN remplacés par None"""
+    values = series.round().astype('Int64') if cast == 'int' else series
+    return [None if pd.isna(v) else v for v in values.tolist()]
+
+
+def _datetimes(series):
+    """Liste de Timestamps (sous-classes de datetime) à la microseconde, précision de la base"""
+    return series.dt.floor('us').tolist()
+
+
+def _lectures(valid):
+    columns = zip(
+        valid['animal_id'].tolist(),
+        _datetimes(valid['horodatage']),
+        _nullable(valid['temperature']),
+        _nullable(valid['frequence_cardiaque'], 'int'),
+        _nullable(valid['frequence_respiratoire'], 'int'),
+    )
+    return [
+        LectureCapteur(animal_id=animal_id, horodatage=horodatage, temperature=temperature,
+                       frequence_cardiaque=fc, frequence_respiratoire=fr)
+        for animal_id, horodatage, temperature, fc, fr in columns
+    ]
+
+
+def _observations(valid, window):
+    """
+    Une observation par animal et par fenêtre : la première mesure de la
+    fenêtre. Les fenêtres qui ont déjà une observation sont ignorées.
+    """
+    first = valid.sort_values(['animal_id', 'horodatage'], kind='stable')
+    first = first.assign(fenetre=first['horodatage'].dt.floor(window))
+    first = first.drop_duplicates(['animal_id', 'fenetre'])
+
+    existing = SymptomeObserve.objects.filter(
+        animal_id__in=first['animal_id'].unique().tolist(),
+        date_observation__gte=first['fenetre'].min().to_pydatetime(),
+        date_observation__lt=(first['fenetre'].max() + window).to_pydatetime(),
+    ).values_list('animal_id', 'date_observation')
+    if existing:
+        existing = pd.DataFrame(list(existing), columns=['animal_id', 'date_observation'])
+        keys = set(zip(
+            existing['animal_id'],
+            pd.to_datetime(existing['date_observation'], utc=True).dt.floor(window)
+        ))
+        first = first[[key not in keys for key in zip(first['animal_id'], first['fenetre'])]]
+
+    columns = zip(
+        first['animal_id'].tolist(),
+        _datetimes(first['horodatage']),
+        _nullable(first['temperature']),
+        _nullable(first['frequence_cardiaque'], 'int'),
+        _nullable(first['frequence_respiratoire'], 'int'),
+    )
+    return [
+        SymptomeObserve(animal_id=animal_id, date_observation=horodatage, temperature=temperature,
+                        frequence_cardiaque=fc, frequence_respiratoire=fr)
+        for animal_id, horodatage, temperature, fc, fr in columns
+    ]
+
+
+def ingest(chunks, window=None, batch_size=BATCH_SIZE):
+    """
+    Ingère des blocs de lectures (voir read_chunks) : validation vectorisée,
+    puis écriture par bulk_create, une transaction par bloc.
+
+    Les lectures valides vont dans LectureCapteur ; si window est donnée,
+    une SymptomeObserve est aussi créée par animal et par fenêtre (et
+    intégrée au magasin de caractéristiques temporelles).
+    Retourne les statistiques d'ingestion (dont le débit en lignes/s). Une
+    erreur en cours de flux lève IngestionError ; les blocs précédents
+    restent écrits.
+    """
+    start = time.perf_counter()
+
+    def finish():
+        elapsed = time.perf_counter() - start
+        stats['duree_secondes'] = round(elapsed, 3)
+        stats['lignes_par_seconde'] = round(stats['lignes_lues'] / elapsed) if elapsed > 0 else None
+        return stats
+
+    stats = {
+        'lignes_lues': 0,
+        'lectures_inserees': 0,
+        'observations_creees': 0,
+        'rejets': {},
+    }
+    try:
+        for chunk in chunks:
+            stats['lignes_lues'] += len(chunk)
+            valid, rejets = validate_chunk(chunk)
+            for reason, count in rejets.items():
+                stats['rejets'][reason] = stats['rejets'].get(reason, 0) + count
+            if valid.empty:
+                continue
+            with transaction.atomic():
+                LectureCapteur.objects.bulk_create(_lectures(valid), batch_size=batch_size)
+                stats['lectures_inserees'] += len(valid)
+                if window is not None:
+                    observations = _observations(valid, window)
+                    SymptomeObserve.objects.bulk_create(observations, batch_size=batch_size)
+                    feature_store.record(observations)
+                    stats['observations_creees'] += len(observations)
+    except ValueError as e:
+        raise IngestionError(str(e), finish()) from e
+    return finish()
@@ -1,3 +1,974 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from rest_framework.pagination import CursorPagination
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder
+
+from livestock import async_views, prediction_queue
+from livestock.callbacks import notifier
+from livestock.catalog import disease_catalog
+from livestock.dashboard import compute_dashboard
+from livestock.features import BUCKET_HOURS, N_BUCKETS, TemporalState, feature_store
+from livestock.models import (
+    Animal, Diagnostic, EtatTemporel, LectureCapteur, Maladie, PlanificationSoin, SymptomeObserve, TachePrediction,
+    Traitement
+)
+from livestock.pagination import FeedCursorPagination
+from livestock.views import SymptomeObserveViewSet
+from ml_model.ml_predictor import (
+    TEMPORAL_FEATURES, LivestockMLPredictor, PredictorManager, PredictorNotReady, get_predictor
+)
+from ml_model.tree_engine import CompiledForest
+from smartbetail_project.database import database_settings
+
+# Symptômes d'un animal malade, envoyés à /api/predict/ par les tests d'API
+SYMPTOMES = {
+    'temperature': 40.2, 'frequence_cardiaque': 85, 'frequence_respiratoire': 35,
+    'niveau_activite': 1, 'appetit': 2, 'fievre': True, 'toux': True,
+    'ecoulement_nasal': True, 'abattement': True,
+}
+
+
+def make_herd(n, owner=None, start=0, **fields):
+    """Crée n animaux d'un même éleveur (vaches Holstein, sauf fields)"""
+    owner = owner or User.objects.create(username='eleveur')
+    return Animal.objects.bulk_create([
+        Animal(**{
+            'nom': f'Vache {i}', 'numero_identification': f'FR-{i:04d}', 'type_animal': 'bovin',
+            'race': 'Holstein', 'sexe': 'F', 'date_naissance': date(2020, 1, 1), 'proprietaire': owner,
+            **fields,
+        })
+        for i in range(start, start + n)
+    ])
+
+
+class CompiledForestTest(SimpleTestCase):
+    """Tests de la forêt compilée face à scikit-learn"""
+
+    def setUp(self):
+        predictor = LivestockMLPredictor()
+        df = predictor.generate_training_data(400)
+        self.X = df[predictor.feature_names].astype(float).to_numpy()
+        self.y = df['maladie'].to_numpy()
+
+    def test_predict_proba_identique(self):
+        model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0)
+        model.fit(self.X, self.y)
+        forest = CompiledForest.from_sklearn(model)
+        np.testing.assert_array_equal(forest.predict_proba(self.X), model.predict_proba(self.X))
+        np.testing.assert_array_equal(forest.predict(self.X), model.predict(self.X))
+
+    def test_export_puis_rechargement(self):
+        model = RandomForestClassifier(n_estimators=5, random_state=0)
+        model.fit(self.X, np.unique(self.y, return_inverse=True)[1])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            CompiledForest.from_sklearn(model).save(tmpdir)
+            forest = CompiledForest.load(tmpdir, mmap_mode='r')
+            np.testing.assert_array_equal(forest.predict_proba(self.X), model.predict_proba(self.X))
+
+    def test_reexport_sans_toucher_aux_tableaux_mappes(self):
+        y = np.unique(self.y, return_inverse=True)[1]
+        ancien = RandomForestClassifier(n_estimators=3, max_depth=3, random_state=0).fit(self.X, y)
+        nouveau = RandomForestClassifier(n_estimators=10, random_state=1).fit(self.X, y)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            artifact_dir = os.path.join(tmpdir, 'model_artifact')
+            CompiledForest.from_sklearn(ancien).save(artifact_dir)
+            servi = CompiledForest.load(artifact_dir, mmap_mode='r')
+            CompiledForest.from_sklearn(nouveau).save(artifact_dir)
+            # Le worker qui sert l'ancienne version lit toujours ses propres fichiers
+            np.testing.assert_array_equal(servi.predict_proba(self.X), ancien.predict_proba(self.X))
+            recharge = CompiledForest.load(artifact_dir, mmap_mode='r')
+            np.testing.assert_array_equal(recharge.predict_proba(self.X), nouveau.predict_proba(self.X))
+            self.assertEqual(os.listdir(tmpdir), ['model_artifact'])
+
+
+class PredictTopKTest(SimpleTestCase):
+    """Prédiction top-k face au classement complet de l'implémentation d'origine"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.predictor = get_predictor()
+        df = cls.predictor.generate_training_data(200, seed=3)
+        cls.records = df[cls.predictor.feature_names].to_dict('records')
+
+    def reference(self, symptoms_data):
+        # Boucle d'origine : un inverse_transform par classe, tri en Python
+        predictor = self.predictor
+        features = np.array([[symptoms_data.get(f, 0) for f in predictor.feature_names]], dtype=np.float64)
+        probabilities = predictor.engine.predict_proba(features)[0]
+        prediction = predictor.engine.predict(features)[0]
+        all_predictions = []
+        for i, probability in enumerate(probabilities):
+            disease = predictor.label_encoder.inverse_transform([i])[0]
+            all_predictions.append({'disease': disease, 'probability': probability})
+        all_predictions.sort(key=lambda x: x['probability'], reverse=True)
+        return predictor.label_encoder.inverse_transform([prediction])[0], all_predictions
+
+    def test_classement_identique(self):
+        results = self.predictor.predict(self.records)
+        for record, result in zip(self.records, results):
+            disease, all_predictions = self.reference(record)
+            self.assertEqual(result['predicted_disease'], disease)
+            self.assertEqual(
+                [p['probability'] for p in result['all_predictions']],
+                [p['probability'] for p in all_predictions]
+            )
+            self.assertEqual(result['confidence'], all_predictions[0]['probability'])
+
+    def test_top_k(self):
+        complet = self.predictor.predict(self.records)
+        for k in (1, 3):
+            for full, result in zip(complet, self.predictor.predict(self.records, top_k=k)):
+                # À égalité de probabilité en k-ième position, la classe retenue peut différer
+                probabilites = {p['disease']: p['probability'] for p in full['all_predictions']}
+                self.assertEqual(
+                    [p['probability'] for p in result['all_predictions']],
+                    [p['probability'] for p in full['all_predictions'][:k]]
+                )
+                for p in result['all_predictions']:
+                    self.assertEqual(p['probability'], probabilites[p['disease']])
+                self.assertEqual(result['predicted_disease'], full['predicted_disease'])
+        with self.assertRaises(ValueError):
+            self.predictor.predict(self.records[0], top_k=0)
+
+
+class PredictorManagerTest(SimpleTestCase):
+    """Tests du cycle de vie du prédicteur (chargement unique, amorçage)"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.tmpdir = tempfile.TemporaryDirectory()
+        predictor = LivestockMLPredictor()
+        df = predictor.generate_training_data(200)
+        predictor.label_encoder = LabelEncoder()
+        y = predictor.label_encoder.fit_transform(df['maladie'])
+        model = RandomForestClassifier(n_estimators=3, max_depth=4, random_state=0)
+        model.fit(df[predictor.feature_names], y)
+        predictor.engine = CompiledForest.from_sklearn(model)
+        predictor.feature_importances = model.feature_importances_
+        cls.model_path = os.path.join(cls.tmpdir.name, 'model.pkl')
+        cls.artifact_dir = os.path.join(cls.tmpdir.name, 'artifact')
+        with open(cls.model_path, 'wb') as f:
+            f.write(b'pickle')
+        predictor.export_artifact(cls.model_path, cls.artifact_dir)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmpdir.cleanup()
+        super().tearDownClass()
+
+    def test_chargement_unique_concurrent(self):
+        manager = PredictorManager(self.model_path, self.artifact_dir)
+        with mock.patch.object(LivestockMLPredictor, 'load_artifact',
+                               autospec=True, side_effect=LivestockMLPredictor.load_artifact) as load:
+            threads = [threading.Thread(target=manager.get) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(load.call_count, 1)
+        self.assertTrue(manager.status()['ready'])
+        self.assertEqual(manager.state, PredictorManager.READY)
+
+    def test_modele_absent_sans_entrainement(self):
+        manager = PredictorManager(
+            os.path.join(self.tmpdir.name, 'absent.pkl'),
+            os.path.join(self.tmpdir.name, 'absent')
+        )
+        with mock.patch.object(LivestockMLPredictor, 'train_model') as train:
+            with self.assertRaises(PredictorNotReady):
+                manager.get()
+        train.assert_not_called()
+        self.assertFalse(manager.is_ready)
+        self.assertEqual(manager.state, PredictorManager.FAILED)
+
+    def test_health_non_pret(self):
+        manager = PredictorManager(
+            os.path.join(self.tmpdir.name, 'absent.pkl'),
+            os.path.join(self.tmpdir.name, 'absent')
+        )
+        with mock.patch('livestock.views.predictor_manager', manager), \
+                mock.patch.object(manager, 'start_warm_up') as start, \
+                mock.patch('livestock.views.Animal.objects.count', return_value=0), \
+                mock.patch('livestock.views.Maladie.objects.count', return_value=0), \
+                mock.patch('livestock.views.Traitement.objects.count', return_value=0), \
+                mock.patch('livestock.views.Diagnostic.objects.count', return_value=0):
+            response = self.client.get('/api/health/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['ready'])
+        start.assert_called_once()
+
+
+class TrainingDataTest(SimpleTestCase):
+    """Tests du générateur vectorisé de données d'entraînement"""
+
+    def setUp(self):
+        self.predictor = LivestockMLPredictor()
+
+    def test_deterministe(self):
+        a = self.predictor.generate_training_data(500, seed=7)
+        b = self.predictor.generate_training_data(500, seed=7)
+        pd.testing.assert_frame_equal(a, b)
+        self.assertEqual(list(a.columns), self.predictor.feature_names + ['maladie'])
+
+    def test_effectifs_et_bornes(self):
+        df = self.predictor.generate_training_data(20_000)
+        counts = df['maladie'].value_counts()
+        self.assertEqual(len(df), 20_000)
+        self.assertTrue((counts >= 20_000 // len(self.predictor.disease_mapping)).all())
+        self.assertTrue(df['temperature'].between(36.0, 45.0).all())
+        self.assertTrue(df['frequence_cardiaque'].between(40, 120).all())
+        self.assertTrue(df['frequence_respiratoire'].between(10, 60).all())
+        pneumonie = df[df['maladie'] == 'pneumonie']
+        self.assertAlmostEqual(pneumonie['toux'].mean(), 0.9, delta=0.03)
+        self.assertTrue(df.loc[df['maladie'] == 'diarrhee_infectieuse', 'diarrhee'].all())
+        self.assertFalse(df.loc[df['maladie'] == 'bonne_sante', 'fievre'].any())
+
+    def test_export_npy_par_blocs(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'data.npy')
+            self.predictor.export_training_data(path, 1000, seed=3, chunk_size=300)
+            data = np.load(path)
+        expected = pd.concat(self.predictor.iter_training_data(1000, seed=3, chunk_size=300))
+        self.assertEqual(len(data), 1000)
+        np.testing.assert_array_equal(data['temperature'], expected['temperature'].to_numpy())
+        np.testing.assert_array_equal(data['maladie'], expected['maladie'].to_numpy().astype(str))
+
+
+class BatchPredictAPITest(TestCase):
+    """Tests de /api/predict/batch/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animals = make_herd(20)
+        pneumonie = Maladie.objects.create(nom='Pneumonie', description='', symptomes_typiques='', gravite='élevée')
+        for nom in ('Antibiotique B', 'Antibiotique A'):
+            Traitement.objects.create(nom=nom, description='', dosage='', duree_jours=7).maladies.add(pneumonie)
+
+    def setUp(self):
+        # Le catalogue en mémoire survit au rollback de chaque test
+        disease_catalog.invalidate()
+
+    def post(self, n):
+        observations = [dict(SYMPTOMES, animal_id=animal.id) for animal in self.animals[:n]]
+        return self.client.post('/api/predict/batch/', {'observations': observations}, content_type='application/json')
+
+    def test_resultats_par_animal(self):
+        response = self.post(3)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['count'], 3)
+        self.assertEqual([r['animal_id'] for r in data['resultats']], [a.id for a in self.animals[:3]])
+        first = data['resultats'][0]
+        self.assertEqual(first['maladie_predite']['nom'], 'Pneumonie')
+        self.assertEqual(first['traitement_recommande']['nom'], 'Antibiotique A')
+        self.assertEqual(SymptomeObserve.objects.count(), 3)
+        diagnostic = Diagnostic.objects.get(id=first['diagnostic_id'])
+        self.assertEqual(diagnostic.symptome_observe_id, first['symptome_observe_id'])
+
+    def test_requetes_constantes(self):
+        self.post(1)
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.post(2).status_code, 200)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.post(20).status_code, 200)
+        self.assertEqual(len(small), len(large))
+
+    def test_animal_inconnu(self):
+        response = self.client.post(
+            '/api/predict/batch/', {'observations': [dict(SYMPTOMES, animal_id=999999)]},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(SymptomeObserve.objects.count(), 0)
+
+
+class DiseaseCatalogTest(TestCase):
+    """Tests du catalogue maladies/traitements de /api/predict/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animal, = make_herd(1)
+        cls.pneumonie = Maladie.objects.create(nom='Pneumonie', description='', symptomes_typiques='',
+                                               gravite='élevée')
+        Traitement.objects.create(nom='Antibiotique B', description='', dosage='', duree_jours=7) \
+            .maladies.add(cls.pneumonie)
+
+    def setUp(self):
+        disease_catalog.invalidate()
+
+    # Prédiction fixée : la réponse ne dépend pas du modèle livré
+    PNEUMONIE = {
+        'predicted_disease': 'pneumonie', 'confidence': 0.9, 'all_predictions': [],
+        'disease_info': {'nom': 'Pneumonie', 'description': '', 'symptomes_typiques': '', 'gravite': 'élevée'},
+    }
+
+    def predict(self):
+        data = dict(SYMPTOMES, animal_id=self.animal.id)
+        with mock.patch.object(LivestockMLPredictor, 'predict', return_value=self.PNEUMONIE):
+            response = self.client.post('/api/predict/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_deux_insertions_par_prediction(self):
+        self.predict()
+        with CaptureQueriesContext(connection) as queries:
+            data = self.predict()
+        statements = [q['sql'] for q in queries if 'SAVEPOINT' not in q['sql']]
+        # Vérification de l'animal, puis l'observation et le diagnostic
+        self.assertEqual(len(statements), 3, statements)
+        self.assertEqual(sum(sql.startswith('INSERT') for sql in statements), 2)
+        diagnostic = Diagnostic.objects.get(id=data['diagnostic_id'])
+        self.assertEqual(data['maladie_predite']['nom'], 'Pneumonie')
+        self.assertEqual(diagnostic.maladie_predite, self.pneumonie)
+        self.assertEqual(diagnostic.traitement_recommande.nom, 'Antibiotique B')
+        self.assertEqual(data['traitement_recommande']['maladies'][0]['nom'], 'Pneumonie')
+
+    def test_invalidation_par_signaux(self):
+        result = {'predicted_disease': 'pneumonie', 'disease_info': {'nom': 'Pneumonie'}}
+        self.assertEqual(disease_catalog.entry(result).traitement.nom, 'Antibiotique B')
+        with self.assertNumQueries(0):
+            disease_catalog.entry(result)
+        # Ajout d'un traitement (m2m) : premier par nom désormais
+        Traitement.objects.create(nom='Antibiotique A', description='', dosage='', duree_jours=5) \
+            .maladies.add(self.pneumonie)
+        self.assertEqual(disease_catalog.entry(result).traitement.nom, 'Antibiotique A')
+        self.pneumonie.gravite = 'critique'
+        self.pneumonie.save()
+        self.assertEqual(disease_catalog.entry(result).maladie_data['gravite'], 'critique')
+
+    def test_maladie_absente_creee(self):
+        result = {'predicted_disease': 'boiterie',
+                  'disease_info': {'nom': 'Boiterie', 'description': 'Atteinte du pied', 'gravite': 'faible'}}
+        entry = disease_catalog.entry(result)
+        self.assertEqual(Maladie.objects.get(nom='Boiterie').description, 'Atteinte du pied')
+        self.assertIsNone(entry.traitement)
+
+
+class PredictionQueueTest(TestCase):
+    """Tests des prédictions asynchrones (file TachePrediction)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animals = make_herd(5)
+
+    def setUp(self):
+        disease_catalog.invalidate()
+
+    def enqueue(self, animal, **extra):
+        data = dict(SYMPTOMES, animal_id=animal.id, **extra)
+        return self.client.post('/api/predict/?async=true', data, content_type='application/json')
+
+    def test_mise_en_file_puis_micro_lot(self):
+        jobs = []
+        for animal in self.animals:
+            response = self.enqueue(animal)
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json()['statut'], 'en_attente')
+            jobs.append(response.json()['job_id'])
+        self.assertEqual(SymptomeObserve.objects.count(), 5)
+        self.assertEqual(Diagnostic.objects.count(), 0)
+
+        predictor = get_predictor()
+        with mock.patch.object(predictor, 'predict_batch', wraps=predictor.predict_batch) as spy:
+            self.assertEqual(prediction_queue.run_once(lambda: predictor), 5)
+        # Un seul appel au modèle pour tout le micro-lot
+        self.assertEqual(spy.call_count, 1)
+        self.assertEqual(prediction_queue.run_once(lambda: predictor), 0)
+
+        data = self.client.get(f'/api/predict/jobs/{jobs[0]}/').json()
+        self.assertEqual(data['statut'], 'terminee')
+        diagnostic = Diagnostic.objects.get(id=data['resultat']['diagnostic_id'])
+        self.assertEqual(diagnostic.symptome_observe_id, data['symptome_observe_id'])
+        self.assertEqual(data['resultat']['maladie_predite']['nom'], diagnostic.maladie_predite.nom)
+
+    def test_reservation_exclusive(self):
+        for animal in self.animals:
+            self.enqueue(animal)
+        first = prediction_queue.claim(batch_size=3)
+        second = prediction_queue.claim(batch_size=3)
+        self.assertEqual(len(first), 3)
+        self.assertEqual(len(second), 2)
+        self.assertFalse({t.id for t in first} & {t.id for t in second})
+        self.assertEqual(prediction_queue.claim(), [])
+
+    @override_settings(PREDICTION_CALLBACK_HOSTS=['ferme.example'])
+    def test_lot_repris_par_un_autre_worker(self):
+        self.enqueue(self.animals[0], callback_url='https://ferme.example/hook')
+        lent = prediction_queue.claim()
+        # Le premier worker dépasse STALE_AFTER : la tâche est remise en file et reprise
+        TachePrediction.objects.update(date_debut=timezone.now() - timedelta(hours=1))
+        self.assertEqual(prediction_queue.requeue_stale(), (1, 0))
+        repris = prediction_queue.claim()
+        with mock.patch.object(prediction_queue, 'notify') as notify:
+            prediction_queue.process(lent, get_predictor())
+        # Ni diagnostic ni notification pour une réservation perdue
+        notify.assert_not_called()
+        self.assertEqual(Diagnostic.objects.count(), 0)
+        self.assertEqual(TachePrediction.objects.get().statut, 'en_cours')
+        with mock.patch.object(prediction_queue, 'notify') as notify:
+            prediction_queue.process(repris, get_predictor())
+        self.assertEqual(notify.call_count, 1)
+        tache = TachePrediction.objects.get()
+        self.assertEqual(tache.statut, 'terminee')
+        self.assertEqual(Diagnostic.objects.get(), tache.diagnostic)
+
+    def test_modele_indisponible(self):
+        self.enqueue(self.animals[0])
+
+        def not_ready():
+            raise PredictorNotReady('chargement en cours')
+
+        with self.assertRaises(PredictorNotReady):
+            prediction_queue.run_once(not_ready)
+        tache = TachePrediction.objects.get()
+        self.assertEqual((tache.statut, tache.tentatives), ('en_attente', 0))
+
+    @override_settings(PREDICTION_CALLBACK_HOSTS=['ferme.example'])
+    def test_notification(self):
+        job_id = self.enqueue(self.animals[0], callback_url='https://ferme.example/hook').json()['job_id']
+        with mock.patch('livestock.callbacks.urllib.request.urlopen',
+                        side_effect=[OSError('refusé'), mock.MagicMock()]) as urlopen, \
+                mock.patch.object(notifier, 'retry_delays', (0,)):
+            prediction_queue.run_once(get_predictor)
+            self.assertTrue(notifier.flush())
+        # Un échec, puis un nouvel essai réussi
+        self.assertEqual(urlopen.call_count, 2)
+        request = urlopen.call_args.args[0]
+        self.assertEqual(request.full_url, 'https://ferme.example/hook')
+        payload = json.loads(request.data)
+        self.assertEqual((payload['job_id'], payload['statut']), (job_id, 'terminee'))
+
+    @override_settings(PREDICTION_CALLBACK_HOSTS=['ferme.example'])
+    def test_notification_hotes_autorises(self):
+        for url in ('http://ferme.example/hook', 'https://169.254.169.254/latest', 'ftp://ferme.example/hook'):
+            response = self.enqueue(self.animals[0], callback_url=url)
+            self.assertEqual(response.status_code, 400, url)
+            self.assertIn('callback_url', response.json()['errors'])
+        self.assertEqual(TachePrediction.objects.count(), 0)
+
+    def test_modele_avec_colonnes_temporelles(self):
+        predictor = LivestockMLPredictor()
+        df = predictor.generate_training_data(400)
+        rng = np.random.default_rng(0)
+        for name in TEMPORAL_FEATURES:
+            df[name] = rng.normal(size=len(df))
+        with mock.patch('builtins.print'):
+            predictor.train_model(df)
+        job_id = self.enqueue(self.animals[0]).json()['job_id']
+        self.assertEqual(prediction_queue.run_once(lambda: predictor), 1)
+        data = self.client.get(f'/api/predict/jobs/{job_id}/').json()
+        self.assertEqual(data['statut'], 'terminee', data.get('erreur'))
+
+
+class DashboardTest(TestCase):
+    """Tests du résumé du dashboard et de son cache"""
+
+    @classmethod
+    def setUpTestData(cls):
+        animals = make_herd(2)
+        cls.owner = animals[0].proprietaire
+        animals += make_herd(1, cls.owner, start=2, type_animal='ovin')
+        maladie = Maladie.objects.create(nom='Mastite', description='', symptomes_typiques='')
+        traitement = Traitement.objects.create(nom='Anti-inflammatoire', description='', dosage='', duree_jours=5)
+        traitement.maladies.add(maladie)
+        for animal in animals[:2]:
+            symptome = SymptomeObserve.objects.create(animal=animal)
+            Diagnostic.objects.create(animal=animal, symptome_observe=symptome, maladie_predite=maladie,
+                                      probabilite=0.7, traitement_recommande=traitement)
+        now = timezone.now()
+        for jours in (-2, 2, 20):
+            PlanificationSoin.objects.create(animal=animals[0], type_soin='controle', nom_soin='Contrôle',
+                                             date_prevue=now + timedelta(days=jours))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_compteurs(self):
+        data = compute_dashboard()
+        self.assertEqual(data['total_animaux'], 3)
+        self.assertEqual(data['animaux_malades'], 2)
+        self.assertEqual(data['soins_en_retard'], 1)
+        self.assertEqual(data['soins_cette_semaine'], 1)
+        self.assertEqual(data['repartition_types_animaux'], {'bovin': 2, 'ovin': 1})
+        self.assertEqual(data['repartition_maladies'], {'Mastite': 2})
+        self.assertEqual(len(data['diagnostics_recents']), 2)
+        self.assertEqual(len(data['soins_urgents']), 2)
+
+    def test_nombre_de_requetes(self):
+        # Indépendant du nombre de diagnostics et de soins listés
+        with self.assertNumQueries(7):
+            self.assertEqual(self.client.get('/api/dashboard/').status_code, 200)
+        with self.assertNumQueries(0):
+            self.client.get('/api/dashboard/')
+
+    def test_invalidation_par_signal(self):
+        self.assertEqual(self.client.get('/api/dashboard/').json()['total_animaux'], 3)
+        Animal.objects.create(nom='Nouveau', numero_identification='FR-99', type_animal='caprin',
+                              race='Alpine', sexe='F', date_naissance=date(2021, 1, 1), proprietaire=self.owner)
+        self.assertEqual(self.client.get('/api/dashboard/').json()['total_animaux'], 4)
+
+
+class ViewSetQueryCountTest(TestCase):
+    """Nombre de requêtes des listes, indépendant du nombre de lignes"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create(username='eleveur')
+        cls.maladie = Maladie.objects.create(nom='Mastite', description='', symptomes_typiques='')
+        cls.traitement = Traitement.objects.create(nom='Anti-inflammatoire', description='', dosage='', duree_jours=5)
+        cls.traitement.maladies.add(cls.maladie)
+        cls.add_rows(2)
+
+    @classmethod
+    def add_rows(cls, n):
+        start = Animal.objects.count()
+        for i, animal in enumerate(make_herd(n, cls.owner, start=start), start):
+            symptome = SymptomeObserve.objects.create(animal=animal)
+            Diagnostic.objects.create(animal=animal, symptome_observe=symptome, maladie_predite=cls.maladie,
+                                      probabilite=0.5, traitement_recommande=cls.traitement, veterinaire=cls.owner)
+            PlanificationSoin.objects.create(animal=animal, type_soin='controle', nom_soin='Contrôle',
+                                             date_prevue=timezone.now() - timedelta(days=1),
+                                             veterinaire_responsable=cls.owner)
+            traitement = Traitement.objects.create(nom=f'Traitement {i}', description='', dosage='', duree_jours=1)
+            traitement.maladies.add(cls.maladie)
+
+    def assertConstantQueries(self, url, expected):
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.add_rows(8)
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(len(small), expected, [q['sql'] for q in small.captured_queries])
+        self.assertEqual(len(large), expected)
+
+    def test_animaux(self):
+        self.assertConstantQueries('/api/animals/', 2)
+
+    def test_maladies(self):
+        self.assertConstantQueries('/api/diseases/', 2)
+
+    def test_traitements(self):
+        self.assertConstantQueries('/api/treatments/', 3)
+
+    # Flux paginés par curseur : pas de COUNT(*)
+    def test_symptomes(self):
+        self.assertConstantQueries('/api/symptoms/', 1)
+
+    def test_diagnostics(self):
+        self.assertConstantQueries('/api/diagnostics/', 1)
+
+    def test_diagnostics_expand(self):
+        self.assertConstantQueries(
+            '/api/diagnostics/?expand=animal,symptome_observe,maladie_predite,traitement_recommande,veterinaire', 2
+        )
+
+    def test_diagnostic_detail(self):
+        diagnostic = Diagnostic.objects.first()
+        with self.assertNumQueries(2):
+            response = self.client.get(f'/api/diagnostics/{diagnostic.id}/')
+        self.assertEqual(response.json()['symptome_observe']['animal']['proprietaire']['username'], 'eleveur')
+
+    def test_soins(self):
+        self.assertConstantQueries('/api/schedule/', 1)
+        self.assertConstantQueries('/api/schedule/en_retard/', 1)
+
+    def test_liste_compacte(self):
+        diagnostic = self.client.get('/api/diagnostics/').json()['results'][0]
+        self.assertIsInstance(diagnostic['animal'], int)
+        self.assertEqual(diagnostic['maladie_nom'], 'Mastite')
+        self.assertEqual(diagnostic['traitement_nom'], 'Anti-inflammatoire')
+        expanded = self.client.get('/api/diagnostics/?expand=animal').json()['results'][0]
+        self.assertEqual(expanded['animal']['proprietaire']['username'], 'eleveur')
+        self.assertIsInstance(expanded['maladie_predite'], int)
+
+
+class CursorPaginationTest(TestCase):
+    """Tests de la pagination par curseur des flux"""
+
+    @classmethod
+    def setUpTestData(cls):
+        animal, = make_herd(1)
+        # Dates identiques : l'ordre est départagé par l'identifiant
+        SymptomeObserve.objects.bulk_create([SymptomeObserve(animal=animal) for _ in range(25)])
+        SymptomeObserve.objects.update(date_observation=timezone.now())
+
+    def test_parcours_complet(self):
+        ids = []
+        url = '/api/symptoms/?page_size=10'
+        while url:
+            data = self.client.get(url).json()
+            self.assertNotIn('count', data)
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        self.assertEqual(ids, sorted(SymptomeObserve.objects.values_list('id', flat=True), reverse=True))
+
+    def test_total_sur_demande(self):
+        with self.assertNumQueries(2):
+            data = self.client.get('/api/symptoms/?count=true').json()
+        self.assertEqual(data['count'], 25)
+        self.assertEqual(len(data['results']), 20)
+
+    def test_identique_a_drf(self):
+        class Reference(CursorPagination):
+            page_size_query_param = 'page_size'
+            ordering = SymptomeObserveViewSet.ordering
+
+        factory = APIRequestFactory()
+
+        def parcours(pagination_class):
+            # Pages suivantes jusqu'à la dernière, puis retour par les pages précédentes
+            pages, url, lien = [], 'http://testserver/api/symptoms/?page_size=10', 1
+            while url:
+                pagination = pagination_class()
+                page = pagination.paginate_queryset(SymptomeObserve.objects.all(), Request(factory.get(url)),
+                                                    view=SymptomeObserveViewSet())
+                pages.append(([item.id for item in page], pagination.get_next_link(),
+                              pagination.get_previous_link()))
+                url = pages[-1][lien]
+                if url is None and lien == 1:
+                    url, lien = pages[-1][2], 2
+            return pages
+
+        pages = parcours(FeedCursorPagination)
+        self.assertEqual(len(pages), 5)
+        self.assertEqual(pages, parcours(Reference))
+
+
+# Vues asynchrones (ASGI) et vues DRF synchrones côte à côte
+urlpatterns = [
+    path('api/', include('livestock.async_urls')),
+    path('sync/', include('livestock.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewsTest(TestCase):
+    """Tests des vues asynchrones : mêmes réponses que les vues DRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animal, = make_herd(1)
+        SymptomeObserve.objects.bulk_create([SymptomeObserve(animal=cls.animal) for _ in range(25)])
+        maladie = Maladie.objects.create(nom='Pneumonie', description='', symptomes_typiques='', gravite='élevée')
+        traitement = Traitement.objects.create(nom='Antibiotique', description='', dosage='', duree_jours=7)
+        traitement.maladies.add(maladie)
+        symptome = SymptomeObserve.objects.first()
+        Diagnostic.objects.create(animal=cls.animal, symptome_observe=symptome, maladie_predite=maladie,
+                                  probabilite=0.9, traitement_recommande=traitement)
+
+    def setUp(self):
+        cache.clear()
+        disease_catalog.invalidate()
+
+    async def test_flux_identiques(self):
+        for url in ('symptoms/?page_size=10', 'diagnostics/?expand=traitement_recommande,symptome_observe',
+                    'schedule/?count=true'):
+            expected = (await self.async_client.get(f'/sync/{url}')).json()
+            response = await self.async_client.get(f'/api/{url}')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json(), json.loads(json.dumps(expected).replace('/sync/', '/api/')))
+
+    async def test_parcours_par_curseur(self):
+        ids = []
+        url = '/api/symptoms/?page_size=10'
+        while url:
+            data = (await self.async_client.get(url)).json()
+            ids.extend(item['id'] for item in data['results'])
+            url = data['next']
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+    async def test_dashboard_et_sante(self):
+        get_predictor()
+        dashboard = (await self.async_client.get('/api/dashboard/')).json()
+        self.assertEqual(dashboard['total_animaux'], 1)
+        health = await self.async_client.get('/api/health/')
+        self.assertEqual(health.status_code, 200)
+        self.assertEqual(health.json()['total_diagnostics'], 1)
+
+    async def test_prediction(self):
+        data = dict(SYMPTOMES, animal_id=self.animal.id)
+        response = await self.async_client.post('/api/predict/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        result = response.json()
+        diagnostic = await Diagnostic.objects.select_related('maladie_predite').aget(id=result['diagnostic_id'])
+        self.assertEqual(diagnostic.symptome_observe_id, result['symptome_observe_id'])
+        self.assertEqual(result['maladie_predite']['nom'], diagnostic.maladie_predite.nom)
+
+        invalid = await self.async_client.post('/api/predict/', {'animal_id': 999999},
+                                               content_type='application/json')
+        self.assertEqual(invalid.status_code, 400)
+
+    async def test_prediction_atomique(self):
+        data = dict(SYMPTOMES, animal_id=self.animal.id)
+        avant = await SymptomeObserve.objects.acount()
+        with mock.patch.object(Diagnostic.objects, 'create', side_effect=DatabaseError('panne')):
+            response = await self.async_client.post('/api/predict/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 500)
+        # Pas d'observation sans diagnostic
+        self.assertEqual(await SymptomeObserve.objects.acount(), avant)
+
+    async def test_inference_saturee(self):
+        executor = async_views.InferenceExecutor(max_workers=1, max_pending=1)
+        executor._slots.acquire()
+        data = dict(SYMPTOMES, animal_id=self.animal.id)
+        with mock.patch.object(async_views, 'inference_executor', executor):
+            response = await self.async_client.post('/api/predict/', data, content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(await SymptomeObserve.objects.acount(), 25)
+
+
+class TelemetryIngestTest(TestCase):
+    """Tests de l'ingestion des lectures capteurs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animal, = make_herd(1)
+
+    def lines(self, n, start='2026-01-01T08:00:00+00:00'):
+        base = pd.Timestamp(start)
+        return [
+            {'animal_id': self.animal.id, 'horodatage': (base + pd.Timedelta(minutes=i)).isoformat(),
+             'temperature': 38.5, 'frequence_cardiaque': 70, 'frequence_respiratoire': 25}
+            for i in range(n)
+        ]
+
+    def post_ndjson(self, rows, query=''):
+        body = '\n'.join(json.dumps(row) for row in rows)
+        return self.client.post(f'/api/telemetry/{query}', body, content_type='application/x-ndjson')
+
+    def test_ndjson_et_rejets(self):
+        rows = self.lines(5) + [
+            {'animal_id': 999999, 'horodatage': '2026-01-01T09:00:00', 'temperature': 38.0},
+            {'animal_id': self.animal.id, 'horodatage': 'pas une date', 'temperature': 38.0},
+            {'animal_id': self.animal.id, 'horodatage': '2026-01-01T09:00:00', 'temperature': 80.0},
+            {'animal_id': self.animal.id, 'horodatage': '2026-01-01T09:00:00'},
+        ]
+        response = self.post_ndjson(rows)
+        self.assertEqual(response.status_code, 201)
+        data = response.json()
+        self.assertEqual(data['lignes_lues'], 9)
+        self.assertEqual(data['lectures_inserees'], 5)
+        self.assertEqual(data['observations_creees'], 0)
+        self.assertEqual(data['rejets'], {
+            'animal_inconnu': 1, 'horodatage_invalide': 1, 'hors_plage': 1, 'sans_mesure': 1
+        })
+        self.assertEqual(LectureCapteur.objects.count(), 5)
+        self.assertEqual(SymptomeObserve.objects.count(), 0)
+
+    def test_csv(self):
+        body = 'animal_id,horodatage,temperature,frequence_cardiaque\n'
+        body += f'{self.animal.id},2026-01-01 08:00,39.1,\n{self.animal.id},2026-01-01 08:01,,82\n'
+        response = self.client.post('/api/telemetry/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 201)
+        lectures = list(LectureCapteur.objects.order_by('horodatage'))
+        self.assertEqual([(l.temperature, l.frequence_cardiaque) for l in lectures], [(39.1, None), (None, 82)])
+        # Heure sans fuseau : interprétée dans TIME_ZONE (Europe/Paris, UTC+1 en janvier)
+        self.assertEqual(lectures[0].horodatage.astimezone(dt_timezone.utc).hour, 7)
+
+    def test_fuseaux_melanges(self):
+        rows = [
+            {'animal_id': self.animal.id, 'horodatage': horodatage, 'temperature': 38.5}
+            for horodatage in ('2026-01-01T08:00:00+00:00', '2026-01-01T10:00:00', '2026-01-01T12:00:00+02:00',
+                               '2026-01-01T11:00:00Z')
+        ]
+        self.assertEqual(self.post_ndjson(rows).json()['lectures_inserees'], 4)
+        heures = LectureCapteur.objects.order_by('id').values_list('horodatage', flat=True)
+        # L'heure sans fuseau reste dans TIME_ZONE même à côté d'heures avec décalage
+        self.assertEqual([h.astimezone(dt_timezone.utc).hour for h in heures], [8, 9, 10, 11])
+
+    def test_sous_echantillonnage(self):
+        # 40 minutes de mesures, en deux envois : 3 fenêtres de 15 minutes
+        self.assertEqual(self.post_ndjson(self.lines(20), '?fenetre=15min').status_code, 201)
+        rows = self.lines(20, start='2026-01-01T08:20:00+00:00')
+        self.assertEqual(self.post_ndjson(rows, '?fenetre=15min').json()['observations_creees'], 1)
+        self.assertEqual(LectureCapteur.objects.count(), 40)
+        dates = list(SymptomeObserve.objects.order_by('date_observation').values_list('date_observation', flat=True))
+        self.assertEqual([d.astimezone(dt_timezone.utc).strftime('%H:%M') for d in dates], ['08:00', '08:15', '08:30'])
+
+    def test_erreurs(self):
+        self.assertEqual(self.client.post('/api/telemetry/', '{}', content_type='application/json').status_code, 415)
+        self.assertEqual(self.post_ndjson(self.lines(1), '?fenetre=abc').status_code, 400)
+        response = self.client.post('/api/telemetry/', 'x,y\n1,2\n', content_type='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Colonnes manquantes', response.json()['error'])
+
+
+@override_settings(FEATURE_STORE_ENABLED=True)
+class FeatureStoreTest(TestCase):
+    """Tests du magasin incrémental de caractéristiques temporelles"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.animal, = make_herd(1)
+
+    def setUp(self):
+        cache.clear()
+
+    def observations(self, n, seed=0):
+        rng = np.random.default_rng(seed)
+        debut = timezone.now() - timedelta(days=5)
+        heures = np.cumsum(rng.exponential(3.0, n))
+        return [
+            {'date': debut + timedelta(hours=float(h)), 'temperature': float(rng.normal(39.3, 0.8)),
+             'appetit': int(rng.integers(1, 6)), 'fievre': bool(rng.random() < 0.2)}
+            for h in heures
+        ]
+
+    def reference(self, observations, date):
+        # Recalcul complet sur les observations des seaux de la fenêtre
+        courant = int(date.timestamp() / 3600 // BUCKET_HOURS)
+        fenetre, episodes, fievre = [], 0, False
+        for obs in observations:
+            en_fievre = obs['fievre'] or obs['temperature'] >= 39.5
+            dans_fenetre = int(obs['date'].timestamp() / 3600 // BUCKET_HOURS) > courant - N_BUCKETS
+            if dans_fenetre:
+                fenetre.append(obs)
+                episodes += en_fievre and not fievre
+            fievre = en_fievre
+        heures = np.array([obs['date'].timestamp() / 3600 for obs in fenetre])
+        temperatures = np.array([obs['temperature'] for obs in fenetre])
+        return {
+            'temperature_moyenne_48h': temperatures.mean(),
+            'temperature_pente_48h': np.polyfit(heures - heures[0], temperatures, 1)[0] if len(fenetre) >= 2 else 0.0,
+            'temperature_max_48h': temperatures.max(),
+            'episodes_fievre_48h': episodes,
+            'observations_48h': len(fenetre),
+            'delta_appetit': observations[-1]['appetit'] - observations[-2]['appetit'] if len(observations) > 1 else 0,
+        }
+
+    def assertFeatures(self, features, attendu):
+        self.assertEqual(set(features), set(TEMPORAL_FEATURES))
+        for name, value in attendu.items():
+            self.assertAlmostEqual(features[name], value, places=6, msg=name)
+
+    def test_incremental_identique_au_recalcul(self):
+        observations = self.observations(60)
+        state = TemporalState()
+        for i, obs in enumerate(observations):
+            state.update(obs['date'], obs['temperature'], obs['appetit'], obs['fievre'])
+            self.assertFeatures(state.features(obs['date']), self.reference(observations[:i + 1], obs['date']))
+        # Persistance compacte
+        blob = state.to_bytes()
+        self.assertLess(len(blob), 1024)
+        self.assertEqual(TemporalState.from_bytes(blob).features(observations[-1]['date']),
+                         state.features(observations[-1]['date']))
+
+    def test_mise_a_jour_par_observation(self):
+        observations = self.observations(10, seed=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            for obs in observations:
+                SymptomeObserve.objects.create(
+                    animal=self.animal, date_observation=obs['date'], temperature=obs['temperature'],
+                    appetit=obs['appetit'], fievre=obs['fievre']
+                )
+        etat = TemporalState.from_bytes(EtatTemporel.objects.get(animal=self.animal).etat)
+        date = observations[-1]['date']
+        self.assertFeatures(etat.features(date), self.reference(observations, date))
+
+        # Lecture au moment de la prédiction : depuis le cache, sans requête
+        record = {'temperature': 40.5, 'appetit': 1, 'fievre': True}
+        with self.assertNumQueries(0):
+            features = feature_store.features([self.animal.id], [record])[0]
+        maintenant = timezone.now()
+        self.assertFeatures(features, self.reference(observations + [dict(record, date=maintenant)], maintenant))
+
+        # Reconstruction depuis l'historique : même état
+        EtatTemporel.objects.all().delete()
+        cache.clear()
+        self.assertEqual(feature_store.rebuild(), 1)
+        etat = TemporalState.from_bytes(EtatTemporel.objects.get(animal=self.animal).etat)
+        self.assertFeatures(etat.features(date), self.reference(observations, date))
+
+    def test_ingestion_par_lot(self):
+        rows = [
+            {'animal_id': self.animal.id, 'horodatage': f'2026-01-01T{h:02d}:00:00+00:00', 'temperature': 38.5 + h / 4}
+            for h in range(6)
+        ]
+        body = '\n'.join(json.dumps(row) for row in rows)
+        response = self.client.post('/api/telemetry/?fenetre=1h', body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 201)
+        etat = TemporalState.from_bytes(EtatTemporel.objects.get(animal=self.animal).etat)
+        features = etat.features(pd.Timestamp('2026-01-01T05:00:00+00:00').to_pydatetime())
+        self.assertEqual(features['observations_48h'], 6)
+        self.assertAlmostEqual(features['temperature_pente_48h'], 0.25)
+        self.assertEqual(features['episodes_fievre_48h'], 1)
+
+    def test_modele_avec_colonnes_temporelles(self):
+        predictor = LivestockMLPredictor()
+        df = predictor.generate_training_data(400)
+        rng = np.random.default_rng(0)
+        for name in TEMPORAL_FEATURES:
+            df[name] = rng.normal(size=len(df))
+        with mock.patch('builtins.print'):
+            predictor.train_model(df)
+        self.assertEqual(predictor.temporal_features, list(TEMPORAL_FEATURES))
+        record = dict(SYMPTOMES)
+        enrichi = feature_store.enrich(predictor, [record], [self.animal.id])[0]
+        self.assertEqual(set(enrichi) - set(record), set(TEMPORAL_FEATURES))
+        self.assertIn(predictor.predict(enrichi)['predicted_disease'], predictor.class_names)
+        # Modèle de service sans colonnes temporelles : enregistrements inchangés
+        self.assertIs(feature_store.enrich(get_predictor(), [record], [self.animal.id])[0], record)
+
+
+class DatabaseProfileTest(TestCase):
+    """Tests des profils de base de données"""
+
+    def test_pragmas_sqlite(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA busy_timeout')
+            self.assertEqual(cursor.fetchone()[0], 5000)
+            cursor.execute('PRAGMA synchronous')
+            # 1 = NORMAL
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_profil_sqlite(self):
+        databases, pragmas = database_settings('sqlite', {}, settings.BASE_DIR)
+        self.assertEqual(databases['default']['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        # Le db.sqlite3 suivi par git n'est pas converti en WAL
+        self.assertNotIn('journal_mode', pragmas)
+        self.assertEqual(pragmas['busy_timeout'], 5000)
+        databases, pragmas = database_settings('sqlite', {'SMARTBETAIL_SQLITE_PATH': '/srv/smartbetail.sqlite3'},
+                                               settings.BASE_DIR)
+        self.assertEqual(databases['default']['NAME'], '/srv/smartbetail.sqlite3')
+        self.assertEqual(pragmas['journal_mode'], 'wal')
+
+    def test_profil_postgres(self):
+        databases, pragmas = database_settings('postgres', {'SMARTBETAIL_DB_HOST': 'db'}, settings.BASE_DIR)
+        default = databases['default']
+        self.assertEqual((default['HOST'], default['CONN_MAX_AGE']), ('db', 60))
+        self.assertTrue(default['CONN_HEALTH_CHECKS'])
+        self.assertEqual(pragmas, {})
+
+        # Le pool remplace les connexions persistantes
+        databases, _ = database_settings(
+            'postgres', {'SMARTBETAIL_DB_POOL': '1', 'SMARTBETAIL_DB_POOL_MAX': '20'}, settings.BASE_DIR
+        )
+        default = databases['default']
+        self.assertEqual(default['CONN_MAX_AGE'], 0)
+        self.assertEqual(default['OPTIONS']['pool']['max_size'], 20)
+
+        with self.assertRaises(ImproperlyConfigured):
+            database_settings('mysql', {}, settings.BASE_DIR)
@@ -17,6 +17,9 @@ urlpatterns = [
     
     # Endpoints spéciaux pour l'IA
     path('predict/', views.predict_disease, name='predict-disease'),
+    path('predict/batch/', views.predict_disease_batch, name='predict-disease-batch'),
+    path('predict/jobs/<int:job_id>/', views.prediction_job, name='prediction-job'),
+    path('telemetry/', views.telemetry_ingest, name='telemetry-ingest'),
     path('recommend/', views.recommend_treatment, name='recommend-treatment'),
     path('dashboard/', views.dashboard_data, name='dashboard-data'),
     path('health/', views.health_check, name='health-check'),
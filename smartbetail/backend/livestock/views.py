@@ -3,22 +3,56 @@ from rest_framework.decorators import api_view, action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
-from django.db.models import Count, Q
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.contrib.auth.models import User
 
 from .models import (
     Animal, Maladie, Traitement, SymptomeObserve, 
-    Diagnostic, PlanificationSoin
+    Diagnostic, PlanificationSoin, TachePrediction
 )
 from .serializers import (
     AnimalSerializer, MaladieSerializer, TraitementSerializer,
     SymptomeObserveSerializer, DiagnosticSerializer, PlanificationSoinSerializer,
+    SymptomeObserveListSerializer, DiagnosticListSerializer, PlanificationSoinListSerializer,
+    requested_expansions,
     PredictionInputSerializer, PredictionOutputSerializer, RecommendationInputSerializer,
-    DashboardSerializer, UserSerializer
+    AsyncPredictionInputSerializer, BatchPredictionInputSerializer, DashboardSerializer, UserSerializer
 )
-from ml_model.ml_predictor import get_predictor
+from .pagination import FeedCursorPagination
+from . import prediction_queue, telemetry
+from .dashboard import get_dashboard, invalidate_dashboard
+from .catalog import disease_catalog
+from .features import feature_store
+from .diagnostics import (
+    SERVING_TOP_K, construire_diagnostics, generer_recommandations, niveau_de_confiance,
+    resultat_diagnostic
+)
+from ml_model.ml_predictor import PredictorNotReady, get_predictor, predictor_manager
+
+
+class CompactListMixin:
+    """
+    Serializer compact pour les actions de liste (list_actions), le
+    serializer complet restant utilisé pour le détail et l'écriture.
+    Les relations imbriquées sont disponibles à la demande via ?expand=.
+    """
+    list_serializer_class = None
+    list_actions = ('list',)
+    
+    @property
+    def is_compact(self):
+        return self.action in self.list_actions
+    
+    def wants(self, field):
+        """Vrai si le serializer utilisé imbrique ce champ"""
+        return not self.is_compact or field in requested_expansions(self.request)
+    
+    def get_serializer_class(self):
+        if self.is_compact and self.list_serializer_class is not None:
+            return self.list_serializer_class
+        return super().get_serializer_class()
 
 
 class AnimalViewSet(viewsets.ModelViewSet):
@@ -66,54 +100,69 @@ class TraitementViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = []
 
 
-class SymptomeObserveViewSet(viewsets.ModelViewSet):
+class SymptomeObserveViewSet(CompactListMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les observations de symptômes
     """
     serializer_class = SymptomeObserveSerializer
+    list_serializer_class = SymptomeObserveListSerializer
+    pagination_class = FeedCursorPagination
+    ordering = ('-date_observation', '-id')
     permission_classes = []
     
     def get_queryset(self):
-        queryset = SymptomeObserve.objects.all().select_related('animal')
+        queryset = SymptomeObserve.objects.all().select_related('animal__proprietaire')
         
         # Filtrer par animal si spécifié
         animal_id = self.request.query_params.get('animal_id')
         if animal_id:
             queryset = queryset.filter(animal_id=animal_id)
         
-        return queryset.order_by('-date_observation')
+        return queryset.order_by(*self.ordering)
 
 
-class DiagnosticViewSet(viewsets.ModelViewSet):
+class DiagnosticViewSet(CompactListMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer les diagnostics
     """
     serializer_class = DiagnosticSerializer
+    list_serializer_class = DiagnosticListSerializer
+    pagination_class = FeedCursorPagination
+    ordering = ('-date_diagnostic', '-id')
     permission_classes = []
     
     def get_queryset(self):
         queryset = Diagnostic.objects.all().select_related(
-            'animal', 'maladie_predite', 'traitement_recommande', 'veterinaire'
+            'animal__proprietaire', 'maladie_predite', 'traitement_recommande', 'veterinaire'
         )
+        # Relations imbriquées uniquement chargées si elles sont sérialisées
+        if self.wants('symptome_observe'):
+            queryset = queryset.select_related('symptome_observe__animal__proprietaire')
+        if self.wants('traitement_recommande'):
+            queryset = queryset.prefetch_related('traitement_recommande__maladies')
         
         # Filtrer par animal si spécifié
         animal_id = self.request.query_params.get('animal_id')
         if animal_id:
             queryset = queryset.filter(animal_id=animal_id)
         
-        return queryset.order_by('-date_diagnostic')
+        return queryset.order_by(*self.ordering)
 
 
-class PlanificationSoinViewSet(viewsets.ModelViewSet):
+class PlanificationSoinViewSet(CompactListMixin, viewsets.ModelViewSet):
     """
     ViewSet pour gérer la planification des soins
     """
     serializer_class = PlanificationSoinSerializer
+    list_serializer_class = PlanificationSoinListSerializer
+    list_actions = ('list', 'en_retard', 'cette_semaine')
+    pagination_class = FeedCursorPagination
+    ordering = ('date_prevue', 'id')
     permission_classes = []
     
     def get_queryset(self):
         queryset = PlanificationSoin.objects.all().select_related(
-            'animal', 'veterinaire_responsable'
+            'animal__proprietaire', 'veterinaire_responsable'
         )
         
         # Filtrer par animal si spécifié
@@ -134,7 +183,7 @@ class PlanificationSoinViewSet(viewsets.ModelViewSet):
                 date_prevue__lt=timezone.now()
             )
         
-        return queryset.order_by('date_prevue')
+        return queryset.order_by(*self.ordering)
     
     @action(detail=False, methods=['get'])
     def en_retard(self, request):
@@ -169,7 +218,13 @@ def predict_disease(request):
     """
     Endpoint pour prédire une maladie basée sur les symptômes
     URL: /api/predict/
+    
+    Avec ?async=true, l'observation est enregistrée et la prédiction mise
+    en file (réponse 202 avec l'identifiant de la tâche).
     """
+    if request.query_params.get('async') in ('1', 'true'):
+        return mettre_en_file(request)
+    
     serializer = PredictionInputSerializer(data=request.data)
     
     if not serializer.is_valid():
@@ -179,99 +234,145 @@ def predict_disease(request):
         )
     
     try:
-        # Récupérer les données validées
-        validated_data = serializer.validated_data
+        # Récupérer les données validées (l'existence de l'animal est
+        # vérifiée par le serializer)
+        validated_data = dict(serializer.validated_data)
         animal_id = validated_data.pop('animal_id')
         notes_veterinaire = validated_data.pop('notes_veterinaire', '')
         
-        # Récupérer l'animal
-        animal = get_object_or_404(Animal, id=animal_id)
-        
-        # Créer l'observation de symptômes
-        symptome_data = validated_data.copy()
-        symptome_data['animal_id'] = animal_id
-        symptome_data['notes_veterinaire'] = notes_veterinaire
-        
-        symptome_serializer = SymptomeObserveSerializer(data=symptome_data)
-        if symptome_serializer.is_valid():
-            symptome_observe = symptome_serializer.save()
-        else:
-            return Response(
-                {'errors': symptome_serializer.errors},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Utiliser le modèle ML pour la prédiction
+        # Modèle ML (chargé une seule fois, jamais entraîné ici) : obtenu
+        # avant toute écriture pour ne pas laisser d'observation orpheline
         predictor = get_predictor()
-        prediction_result = predictor.predict(validated_data)
-        
-        # Récupérer ou créer la maladie prédite
-        disease_name = prediction_result['predicted_disease']
-        disease_info = prediction_result['disease_info']
-        
-        maladie, created = Maladie.objects.get_or_create(
-            nom=disease_info.get('nom', disease_name),
-            defaults={
-                'description': disease_info.get('description', ''),
-                'symptomes_typiques': disease_info.get('symptomes_typiques', ''),
-                'gravite': disease_info.get('gravite', 'modérée')
-            }
-        )
-        
-        # Créer le diagnostic
-        diagnostic = Diagnostic.objects.create(
-            animal=animal,
-            symptome_observe=symptome_observe,
-            maladie_predite=maladie,
-            probabilite=prediction_result['confidence']
-        )
-        
-        # Chercher un traitement recommandé
-        traitement_recommande = None
-        if maladie.traitements.exists():
-            traitement_recommande = maladie.traitements.first()
-            diagnostic.traitement_recommande = traitement_recommande
-            diagnostic.save()
+        # Caractéristiques temporelles de l'animal (en cache, si le modèle
+        # les utilise)
+        record = feature_store.enrich(predictor, [validated_data], [animal_id])[0]
+        prediction_result = predictor.predict(record, top_k=SERVING_TOP_K)
+        
+        # Maladie prédite et traitement recommandé : catalogue en mémoire,
+        # sans requête (voir catalog.py)
+        entry = disease_catalog.entry(prediction_result)
+        
+        # Deux écritures : l'observation et le diagnostic complet
+        with transaction.atomic():
+            symptome_observe = SymptomeObserve.objects.create(
+                animal_id=animal_id, notes_veterinaire=notes_veterinaire, **validated_data
+            )
+            diagnostic = Diagnostic.objects.create(
+                animal_id=animal_id,
+                symptome_observe=symptome_observe,
+                maladie_predite=entry.maladie,
+                probabilite=prediction_result['confidence'],
+                traitement_recommande=entry.traitement
+            )
         
-        # Déterminer le niveau de confiance
+        # Déterminer le niveau de confiance et les recommandations
         confidence = prediction_result['confidence']
-        if confidence >= 0.8:
-            niveau_confiance = 'Très élevé'
-        elif confidence >= 0.6:
-            niveau_confiance = 'Élevé'
-        elif confidence >= 0.4:
-            niveau_confiance = 'Modéré'
-        else:
-            niveau_confiance = 'Faible'
-        
-        # Générer des recommandations
-        recommandations = []
-        if confidence < 0.6:
-            recommandations.append("Consulter un vétérinaire pour confirmation")
-        
-        if maladie.gravite in ['élevée', 'critique']:
-            recommandations.append("Isoler l'animal si nécessaire")
-            recommandations.append("Surveillance rapprochée recommandée")
-        
-        if traitement_recommande:
-            recommandations.append(f"Traitement suggéré : {traitement_recommande.nom}")
-        
-        if not recommandations:
-            recommandations.append("Continuer la surveillance régulière")
         
         # Préparer la réponse
         response_data = {
-            'maladie_predite': MaladieSerializer(maladie).data,
+            'maladie_predite': entry.maladie_data,
             'probabilite': confidence,
-            'traitement_recommande': TraitementSerializer(traitement_recommande).data if traitement_recommande else None,
-            'niveau_confiance': niveau_confiance,
-            'recommandations': recommandations,
+            'traitement_recommande': entry.traitement_data,
+            'niveau_confiance': niveau_de_confiance(confidence),
+            'recommandations': generer_recommandations(confidence, entry.maladie, entry.traitement),
             'diagnostic_id': diagnostic.id,
             'symptome_observe_id': symptome_observe.id
         }
         
         return Response(response_data, status=status.HTTP_200_OK)
         
+    except PredictorNotReady as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    except Exception as e:
+        return Response(
+            {'error': f'Erreur lors de la prédiction : {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+def mettre_en_file(request):
+    """Mode asynchrone de /api/predict/ : observation et tâche enregistrées"""
+    serializer = AsyncPredictionInputSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            {'errors': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    data = dict(serializer.validated_data)
+    callback_url = data.pop('callback_url', '')
+    tache = prediction_queue.enqueue(data, callback_url=callback_url)
+    
+    response = Response(prediction_queue.job_payload(tache), status=status.HTTP_202_ACCEPTED)
+    response['Location'] = f'/api/predict/jobs/{tache.id}/'
+    return response
+
+
+@api_view(['GET'])
+def prediction_job(request, job_id):
+    """
+    Suivi d'une prédiction asynchrone
+    URL: /api/predict/jobs/<id>/
+    
+    Le résultat (même contenu que /api/predict/) est présent une fois la
+    tâche terminée.
+    """
+    tache = get_object_or_404(
+        TachePrediction.objects.select_related(
+            'diagnostic__maladie_predite', 'diagnostic__traitement_recommande'
+        ).prefetch_related('diagnostic__traitement_recommande__maladies'),
+        id=job_id
+    )
+    return Response(prediction_queue.job_payload(tache))
+
+
+@api_view(['POST'])
+def predict_disease_batch(request):
+    """
+    Endpoint pour prédire les maladies de tout un troupeau en un appel
+    URL: /api/predict/batch/
+    
+    Corps : {"observations": [{animal_id, temperature, ...}, ...]}
+    """
+    serializer = BatchPredictionInputSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            {'errors': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        observations = serializer.validated_data['observations']
+        predictor = get_predictor()
+        
+        # Une seule prédiction matricielle pour tout le lot
+        records = feature_store.enrich(predictor, observations, [data['animal_id'] for data in observations])
+        prediction_results = predictor.predict_batch(records, top_k=SERVING_TOP_K)
+        
+        symptomes = [SymptomeObserve(**data) for data in observations]
+        diagnostics = construire_diagnostics(symptomes, prediction_results)
+        
+        with transaction.atomic():
+            SymptomeObserve.objects.bulk_create(symptomes)
+            Diagnostic.objects.bulk_create(diagnostics)
+            # bulk_create n'émet pas de signaux post_save
+            feature_store.record(symptomes)
+            transaction.on_commit(invalidate_dashboard)
+        
+        resultats = [resultat_diagnostic(diagnostic) for diagnostic in diagnostics]
+        
+        return Response({'count': len(resultats), 'resultats': resultats}, status=status.HTTP_200_OK)
+        
+    except PredictorNotReady as e:
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
     except Exception as e:
         return Response(
             {'error': f'Erreur lors de la prédiction : {str(e)}'},
@@ -279,6 +380,40 @@ def predict_disease(request):
         )
 
 
+@api_view(['POST'])
+def telemetry_ingest(request):
+    """
+    Endpoint d'ingestion des lectures capteurs par lot
+    URL: /api/telemetry/
+    
+    Corps NDJSON (application/x-ndjson) ou CSV (text/csv), une lecture par
+    ligne : animal_id, horodatage, temperature, frequence_cardiaque,
+    frequence_respiratoire. Le corps est lu en flux, par blocs.
+    ?fenetre=15min crée aussi une observation par animal et par fenêtre.
+    """
+    fmt = telemetry.FORMATS.get(request.content_type.split(';')[0].strip())
+    if fmt is None:
+        return Response(
+            {'error': f"Type de contenu non supporté : {request.content_type} "
+                      f"({', '.join(telemetry.FORMATS)})"},
+            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    try:
+        window = telemetry.parse_window(request.query_params.get('fenetre'))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if request.stream is None:
+        return Response({'error': 'Corps de requête vide'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        stats = telemetry.ingest(telemetry.read_chunks(request.stream, fmt), window=window)
+    except telemetry.IngestionError as e:
+        return Response({'error': str(e), **e.stats}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(stats, status=status.HTTP_201_CREATED)
+
+
 @api_view(['POST'])
 def recommend_treatment(request):
     """
@@ -376,75 +511,8 @@ def dashboard_data(request):
     URL: /api/dashboard/
     """
     try:
-        # Statistiques générales
-        total_animaux = Animal.objects.count()
-        
-        # Animaux avec diagnostics récents (dernières 30 jours)
-        date_limite = timezone.now() - timedelta(days=30)
-        animaux_malades = Diagnostic.objects.filter(
-            date_diagnostic__gte=date_limite,
-            confirme_par_veterinaire=False
-        ).values('animal').distinct().count()
-        
-        # Soins en retard
-        soins_en_retard = PlanificationSoin.objects.filter(
-            statut='planifie',
-            date_prevue__lt=timezone.now()
-        ).count()
-        
-        # Soins cette semaine
-        aujourd_hui = timezone.now().date()
-        fin_semaine = aujourd_hui + timedelta(days=7)
-        soins_cette_semaine = PlanificationSoin.objects.filter(
-            statut='planifie',
-            date_prevue__date__range=[aujourd_hui, fin_semaine]
-        ).count()
-        
-        # Diagnostics récents (5 derniers)
-        diagnostics_recents = Diagnostic.objects.select_related(
-            'animal', 'maladie_predite', 'traitement_recommande'
-        ).order_by('-date_diagnostic')[:5]
-        
-        # Soins urgents (en retard + prochains 3 jours)
-        date_limite_urgence = aujourd_hui + timedelta(days=3)
-        soins_urgents = PlanificationSoin.objects.filter(
-            statut='planifie',
-            date_prevue__date__lte=date_limite_urgence
-        ).select_related('animal').order_by('date_prevue')[:10]
-        
-        # Répartition des maladies (30 derniers jours)
-        repartition_maladies = {}
-        maladies_stats = Diagnostic.objects.filter(
-            date_diagnostic__gte=date_limite
-        ).values('maladie_predite__nom').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        for stat in maladies_stats:
-            repartition_maladies[stat['maladie_predite__nom']] = stat['count']
-        
-        # Répartition par type d'animal
-        repartition_types_animaux = {}
-        types_stats = Animal.objects.values('type_animal').annotate(
-            count=Count('id')
-        ).order_by('-count')
-        
-        for stat in types_stats:
-            repartition_types_animaux[stat['type_animal']] = stat['count']
-        
-        # Préparer les données de réponse
-        dashboard_data = {
-            'total_animaux': total_animaux,
-            'animaux_malades': animaux_malades,
-            'soins_en_retard': soins_en_retard,
-            'soins_cette_semaine': soins_cette_semaine,
-            'diagnostics_recents': DiagnosticSerializer(diagnostics_recents, many=True).data,
-            'soins_urgents': PlanificationSoinSerializer(soins_urgents, many=True).data,
-            'repartition_maladies': repartition_maladies,
-            'repartition_types_animaux': repartition_types_animaux
-        }
-        
-        return Response(dashboard_data, status=status.HTTP_200_OK)
+        # Résumé calculé par livestock.dashboard, mis en cache
+        return Response(get_dashboard(), status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response(
@@ -459,14 +527,18 @@ def health_check(request):
     Endpoint de vérification de santé de l'API
     """
     try:
-        # Vérifier que le modèle ML est chargé
-        predictor = get_predictor()
-        model_loaded = predictor.model is not None
+        # État du modèle ML, sans bloquer sur son chargement : s'il n'est
+        # pas prêt, l'amorçage est lancé en arrière-plan
+        model_status = predictor_manager.status()
+        if not model_status['ready']:
+            predictor_manager.start_warm_up()
         
         # Statistiques de base
         stats = {
-            'api_status': 'OK',
-            'model_loaded': model_loaded,
+            'api_status': 'OK' if model_status['ready'] else 'STARTING',
+            'ready': model_status['ready'],
+            'model_loaded': model_status['ready'],
+            'model_status': model_status,
             'total_animals': Animal.objects.count(),
             'total_diseases': Maladie.objects.count(),
             'total_treatments': Traitement.objects.count(),
@@ -474,7 +546,9 @@ def health_check(request):
             'timestamp': timezone.now().isoformat()
         }
         
-        return Response(stats, status=status.HTTP_200_OK)
+        # 503 tant que le modèle n'est pas prêt (sonde de disponibilité)
+        http_status = status.HTTP_200_OK if model_status['ready'] else status.HTTP_503_SERVICE_UNAVAILABLE
+        return Response(stats, status=http_status)
         
     except Exception as e:
         return Response(
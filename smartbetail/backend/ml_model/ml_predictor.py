@@ -5,9 +5,105 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report
 import joblib
+import hashlib
 import os
+import threading
+import time
 from django.conf import settings
 
+from ml_model.tree_engine import CompiledForest, read_meta
+
+
+BOOLEAN_SYMPTOMS = (
+    'fievre', 'toux', 'diarrhee', 'ecoulement_nasal', 'boiterie', 'abattement', 'perte_poids'
+)
+
+# Caractéristiques temporelles calculées par le magasin incrémental de
+# livestock (features.py). Elles ne sont utilisées que par un modèle
+# entraîné avec ces colonnes.
+TEMPORAL_FEATURES = (
+    'temperature_moyenne_48h', 'temperature_pente_48h', 'temperature_max_48h',
+    'episodes_fievre_48h', 'observations_48h', 'delta_appetit',
+)
+
+# Lois des symptômes pour un animal sans maladie particulière. Une loi est
+# ('normal', moyenne, écart-type), ('choice', valeurs, probabilités) ou une
+# constante.
+BASE_PROFILE = {
+    'temperature': ('normal', 38.5, 0.5),  # Température normale bovine
+    'frequence_respiratoire': ('normal', 25, 5),
+    'niveau_activite': 3,
+    'appetit': 3,
+    **{name: False for name in BOOLEAN_SYMPTOMS},
+}
+
+# Écarts au profil de base, par maladie
+DISEASE_PROFILES = {
+    'pneumonie': {
+        'temperature': ('normal', 40.0, 1.0),
+        'frequence_respiratoire': ('normal', 35, 8),
+        'toux': ('choice', [True, False], [0.9, 0.1]),
+        'fievre': ('choice', [True, False], [0.8, 0.2]),
+        'niveau_activite': ('choice', [1, 2, 3], [0.6, 0.3, 0.1]),
+        'appetit': ('choice', [1, 2, 3], [0.5, 0.3, 0.2]),
+        'ecoulement_nasal': ('choice', [True, False], [0.7, 0.3]),
+    },
+    'diarrhee_infectieuse': {
+        'temperature': ('normal', 39.2, 0.8),
+        'diarrhee': True,
+        'appetit': ('choice', [1, 2, 3], [0.7, 0.2, 0.1]),
+        'abattement': ('choice', [True, False], [0.8, 0.2]),
+        'niveau_activite': ('choice', [1, 2, 3], [0.5, 0.4, 0.1]),
+    },
+    'fievre_aphteuse': {
+        'temperature': ('normal', 41.0, 1.2),
+        'fievre': True,
+        'boiterie': ('choice', [True, False], [0.9, 0.1]),
+        'appetit': ('choice', [1, 2], [0.8, 0.2]),
+        'niveau_activite': ('choice', [1, 2], [0.7, 0.3]),
+        'abattement': ('choice', [True, False], [0.9, 0.1]),
+    },
+    'mastite': {
+        'temperature': ('normal', 39.8, 0.8),
+        'fievre': ('choice', [True, False], [0.7, 0.3]),
+        'appetit': ('choice', [2, 3, 4], [0.5, 0.3, 0.2]),
+        'abattement': ('choice', [True, False], [0.6, 0.4]),
+    },
+    'parasitisme': {
+        'perte_poids': ('choice', [True, False], [0.8, 0.2]),
+        'abattement': ('choice', [True, False], [0.7, 0.3]),
+        'diarrhee': ('choice', [True, False], [0.6, 0.4]),
+        'appetit': ('choice', [1, 2, 3], [0.4, 0.4, 0.2]),
+        'niveau_activite': ('choice', [1, 2, 3], [0.3, 0.5, 0.2]),
+    },
+    'acidose_ruminale': {
+        'appetit': ('choice', [1, 2], [0.8, 0.2]),
+        'abattement': ('choice', [True, False], [0.8, 0.2]),
+        'diarrhee': ('choice', [True, False], [0.7, 0.3]),
+        'niveau_activite': ('choice', [1, 2, 3], [0.6, 0.3, 0.1]),
+    },
+    'metrite': {
+        'temperature': ('normal', 40.2, 1.0),
+        'fievre': ('choice', [True, False], [0.8, 0.2]),
+        'appetit': ('choice', [1, 2, 3], [0.6, 0.3, 0.1]),
+        'abattement': ('choice', [True, False], [0.7, 0.3]),
+    },
+    'bonne_sante': {
+        # Garder les valeurs normales avec peu de variations
+        'niveau_activite': ('choice', [3, 4, 5], [0.4, 0.4, 0.2]),
+        'appetit': ('choice', [3, 4, 5], [0.4, 0.4, 0.2]),
+    },
+}
+
+
+def _draw(law, size, rng):
+    """Tire size valeurs selon une loi de BASE_PROFILE/DISEASE_PROFILES"""
+    if not isinstance(law, tuple):
+        return law
+    if law[0] == 'normal':
+        return rng.normal(law[1], law[2], size)
+    return rng.choice(np.asarray(law[1]), size=size, p=law[2])
+
 
 class LivestockMLPredictor:
     """
@@ -17,7 +113,13 @@ class LivestockMLPredictor:
     
     def __init__(self):
         self.model = None
+        # Forêt compilée en tableaux NumPy, utilisée pour l'inférence
+        self.engine = None
+        self.feature_importances = None
         self.label_encoder = None
+        # Noms des maladies par colonne de predict_proba (voir _index_classes)
+        self.class_names = None
+        self._class_infos = None
         self.feature_names = [
             'temperature', 'frequence_cardiaque', 'frequence_respiratoire',
             'niveau_activite', 'appetit', 'fievre', 'toux', 'diarrhee',
@@ -74,115 +176,115 @@ class LivestockMLPredictor:
             }
         }
     
-    def generate_training_data(self, n_samples=1000):
+    def generate_training_data(self, n_samples=1000, seed=42):
         """
         Génère un dataset fictif mais réaliste pour l'entraînement
         """
-        np.random.seed(42)  # Pour la reproductibilité
-        
-        data = []
+        return pd.concat(
+            self.iter_training_data(n_samples, seed=seed, chunk_size=None),
+            ignore_index=True
+        )
+    
+    def iter_training_data(self, n_samples, seed=42, chunk_size=100_000):
+        """
+        Génère le dataset par blocs de chunk_size lignes (DataFrames).
         
-        # Générer des données pour chaque maladie
+        Chaque colonne d'un bloc est tirée maladie par maladie en quelques
+        opérations vectorisées (voir DISEASE_PROFILES), avec les mêmes lois
+        que l'échantillonnage ligne à ligne d'origine. Le résultat est
+        déterministe pour un couple (seed, chunk_size) donné.
+        """
+        rng = np.random.default_rng(seed)
         diseases = list(self.disease_mapping.keys())
         samples_per_disease = n_samples // len(diseases)
         
-        for disease in diseases:
-            for _ in range(samples_per_disease):
-                sample = self._generate_sample_for_disease(disease)
-                sample['maladie'] = disease
-                data.append(sample)
+        # Un bloc par maladie, puis quelques échantillons de maladie aléatoire
+        labels = np.concatenate([
+            np.repeat(np.arange(len(diseases), dtype=np.int8), samples_per_disease),
+            rng.integers(len(diseases), size=n_samples - samples_per_disease * len(diseases), dtype=np.int8),
+        ])
         
-        # Ajouter quelques échantillons aléatoires
-        remaining_samples = n_samples - len(data)
-        for _ in range(remaining_samples):
-            disease = np.random.choice(diseases)
-            sample = self._generate_sample_for_disease(disease)
-            sample['maladie'] = disease
-            data.append(sample)
-        
-        return pd.DataFrame(data)
+        chunk_size = chunk_size or max(n_samples, 1)
+        for start in range(0, n_samples, chunk_size):
+            chunk = labels[start:start + chunk_size]
+            yield self._generate_block(chunk, diseases, rng)
     
-    def _generate_sample_for_disease(self, disease):
+    def _generate_block(self, labels, diseases, rng):
         """
-        Génère un échantillon de données pour une maladie spécifique
+        Génère les échantillons d'un bloc, labels étant les indices des
+        maladies dans diseases
         """
-        # Valeurs de base normales
-        sample = {
-            'temperature': np.random.normal(38.5, 0.5),  # Température normale bovine
-            'frequence_cardiaque': np.random.normal(70, 10),
-            'frequence_respiratoire': np.random.normal(25, 5),
-            'niveau_activite': 3,
-            'appetit': 3,
-            'fievre': False,
-            'toux': False,
-            'diarrhee': False,
-            'ecoulement_nasal': False,
-            'boiterie': False,
-            'abattement': False,
-            'perte_poids': False
+        n = len(labels)
+        columns = {
+            'temperature': np.empty(n),
+            'frequence_cardiaque': rng.normal(70, 10, n),
+            'frequence_respiratoire': np.empty(n),
+            'niveau_activite': np.empty(n, dtype=np.int64),
+            'appetit': np.empty(n, dtype=np.int64),
         }
+        for name in BOOLEAN_SYMPTOMS:
+            columns[name] = np.empty(n, dtype=bool)
         
-        # Modifier les valeurs selon la maladie
-        if disease == 'pneumonie':
-            sample['temperature'] = np.random.normal(40.0, 1.0)
-            sample['frequence_respiratoire'] = np.random.normal(35, 8)
-            sample['toux'] = np.random.choice([True, False], p=[0.9, 0.1])
-            sample['fievre'] = np.random.choice([True, False], p=[0.8, 0.2])
-            sample['niveau_activite'] = np.random.choice([1, 2, 3], p=[0.6, 0.3, 0.1])
-            sample['appetit'] = np.random.choice([1, 2, 3], p=[0.5, 0.3, 0.2])
-            sample['ecoulement_nasal'] = np.random.choice([True, False], p=[0.7, 0.3])
-            
-        elif disease == 'diarrhee_infectieuse':
-            sample['temperature'] = np.random.normal(39.2, 0.8)
-            sample['diarrhee'] = True
-            sample['appetit'] = np.random.choice([1, 2, 3], p=[0.7, 0.2, 0.1])
-            sample['abattement'] = np.random.choice([True, False], p=[0.8, 0.2])
-            sample['niveau_activite'] = np.random.choice([1, 2, 3], p=[0.5, 0.4, 0.1])
-            
-        elif disease == 'fievre_aphteuse':
-            sample['temperature'] = np.random.normal(41.0, 1.2)
-            sample['fievre'] = True
-            sample['boiterie'] = np.random.choice([True, False], p=[0.9, 0.1])
-            sample['appetit'] = np.random.choice([1, 2], p=[0.8, 0.2])
-            sample['niveau_activite'] = np.random.choice([1, 2], p=[0.7, 0.3])
-            sample['abattement'] = np.random.choice([True, False], p=[0.9, 0.1])
-            
-        elif disease == 'mastite':
-            sample['temperature'] = np.random.normal(39.8, 0.8)
-            sample['fievre'] = np.random.choice([True, False], p=[0.7, 0.3])
-            sample['appetit'] = np.random.choice([2, 3, 4], p=[0.5, 0.3, 0.2])
-            sample['abattement'] = np.random.choice([True, False], p=[0.6, 0.4])
-            
-        elif disease == 'parasitisme':
-            sample['perte_poids'] = np.random.choice([True, False], p=[0.8, 0.2])
-            sample['abattement'] = np.random.choice([True, False], p=[0.7, 0.3])
-            sample['diarrhee'] = np.random.choice([True, False], p=[0.6, 0.4])
-            sample['appetit'] = np.random.choice([1, 2, 3], p=[0.4, 0.4, 0.2])
-            sample['niveau_activite'] = np.random.choice([1, 2, 3], p=[0.3, 0.5, 0.2])
-            
-        elif disease == 'acidose_ruminale':
-            sample['appetit'] = np.random.choice([1, 2], p=[0.8, 0.2])
-            sample['abattement'] = np.random.choice([True, False], p=[0.8, 0.2])
-            sample['diarrhee'] = np.random.choice([True, False], p=[0.7, 0.3])
-            sample['niveau_activite'] = np.random.choice([1, 2, 3], p=[0.6, 0.3, 0.1])
-            
-        elif disease == 'metrite':
-            sample['temperature'] = np.random.normal(40.2, 1.0)
-            sample['fievre'] = np.random.choice([True, False], p=[0.8, 0.2])
-            sample['appetit'] = np.random.choice([1, 2, 3], p=[0.6, 0.3, 0.1])
-            sample['abattement'] = np.random.choice([True, False], p=[0.7, 0.3])
-            
-        elif disease == 'bonne_sante':
-            # Garder les valeurs normales avec peu de variations
-            sample['niveau_activite'] = np.random.choice([3, 4, 5], p=[0.4, 0.4, 0.2])
-            sample['appetit'] = np.random.choice([3, 4, 5], p=[0.4, 0.4, 0.2])
+        for code, disease in enumerate(diseases):
+            rows = np.flatnonzero(labels == code)
+            if len(rows) == 0:
+                continue
+            profile = dict(BASE_PROFILE, **DISEASE_PROFILES.get(disease, {}))
+            for name, law in profile.items():
+                columns[name][rows] = _draw(law, len(rows), rng)
         
-        # Limiter les valeurs dans des plages réalistes
-        sample['temperature'] = max(36.0, min(45.0, sample['temperature']))
-        sample['frequence_cardiaque'] = max(40, min(120, int(sample['frequence_cardiaque'])))
-        sample['frequence_respiratoire'] = max(10, min(60, int(sample['frequence_respiratoire'])))
+        # Limiter les valeurs dans des plages réalistes (troncature int()
+        # comme dans la version ligne à ligne)
+        columns['temperature'] = np.clip(columns['temperature'], 36.0, 45.0)
+        columns['frequence_cardiaque'] = np.clip(columns['frequence_cardiaque'].astype(np.int64), 40, 120)
+        columns['frequence_respiratoire'] = np.clip(columns['frequence_respiratoire'].astype(np.int64), 10, 60)
         
-        return sample
+        df = pd.DataFrame(columns, columns=self.feature_names)
+        df['maladie'] = np.asarray(diseases, dtype=object)[labels]
+        return df
+    
+    def export_training_data(self, path, n_samples, seed=42, chunk_size=100_000):
+        """
+        Écrit le dataset bloc par bloc, sans jamais le matérialiser en
+        entier : Parquet (.parquet, nécessite pyarrow) ou tableau structuré
+        NumPy (.npy, rempli via memory-map)
+        """
+        chunks = self.iter_training_data(n_samples, seed=seed, chunk_size=chunk_size)
+        if path.endswith('.parquet'):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                raise ImportError("L'export Parquet nécessite pyarrow (pip install pyarrow)")
+            writer = None
+            try:
+                for df in chunks:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    if writer is None:
+                        writer = pq.ParquetWriter(path, table.schema)
+                    writer.write_table(table)
+            finally:
+                if writer is not None:
+                    writer.close()
+        elif path.endswith('.npy'):
+            dtype = np.dtype(
+                [('temperature', 'f8'), ('frequence_cardiaque', 'i8'),
+                 ('frequence_respiratoire', 'i8'), ('niveau_activite', 'i8'), ('appetit', 'i8')]
+                + [(name, '?') for name in BOOLEAN_SYMPTOMS]
+                + [('maladie', f'U{max(len(d) for d in self.disease_mapping)}')]
+            )
+            out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(n_samples,))
+            start = 0
+            for df in chunks:
+                block = out[start:start + len(df)]
+                for name in dtype.names:
+                    block[name] = df[name].to_numpy()
+                start += len(df)
+            out.flush()
+            del out
+        else:
+            raise ValueError(f"Format non supporté : {path} (.parquet ou .npy)")
+        return path
     
     def train_model(self, df=None):
         """
@@ -191,7 +293,11 @@ class LivestockMLPredictor:
         if df is None:
             df = self.generate_training_data()
         
-        # Préparer les features
+        # Préparer les features (plus les colonnes temporelles présentes
+        # dans df)
+        self.feature_names = [
+            name for name in self.feature_names if name not in TEMPORAL_FEATURES
+        ] + [name for name in TEMPORAL_FEATURES if name in df.columns]
         X = df[self.feature_names].copy()
         y = df['maladie']
         
@@ -214,6 +320,9 @@ class LivestockMLPredictor:
         )
         
         self.model.fit(X_train, y_train)
+        self.engine = CompiledForest.from_sklearn(self.model)
+        self.feature_importances = self.model.feature_importances_
+        self._index_classes()
         
         # Évaluer le modèle
         y_pred = self.model.predict(X_test)
@@ -225,52 +334,99 @@ class LivestockMLPredictor:
         
         return accuracy
     
-    def predict(self, symptoms_data):
+    def predict(self, symptoms_data, top_k=None):
         """
         Prédit la maladie basée sur les symptômes
+
+        symptoms_data est un dictionnaire de symptômes, ou une liste de
+        dictionnaires (voir predict_batch). all_predictions ne garde que les
+        top_k maladies les plus probables (toutes par défaut).
         """
-        if self.model is None:
+        if isinstance(symptoms_data, (list, tuple)):
+            return self.predict_batch(symptoms_data, top_k=top_k)
+        return self.predict_batch([symptoms_data], top_k=top_k)[0]
+    
+    def predict_batch(self, records, top_k=None):
+        """
+        Prédit la maladie de plusieurs animaux en un seul appel au moteur
+        (une matrice n × n_features), dans l'ordre des enregistrements
+        """
+        if not self.is_loaded:
             raise ValueError("Le modèle n'est pas entraîné")
+        if self.class_names is None:
+            self._index_classes()
         
-        # Préparer les données d'entrée
-        features = []
-        for feature in self.feature_names:
-            value = symptoms_data.get(feature, 0)
-            if isinstance(value, bool):
-                value = int(value)
-            features.append(value)
-        
-        features_array = np.array(features).reshape(1, -1)
+        # Préparer les données d'entrée (booléens -> 0/1, absents -> 0)
+        features_array = np.array(
+            [[symptoms_data.get(feature, 0) for feature in self.feature_names]
+             for symptoms_data in records],
+            dtype=np.float64
+        ).reshape(len(records), len(self.feature_names))
         
-        # Prédiction
-        prediction = self.model.predict(features_array)[0]
-        probabilities = self.model.predict_proba(features_array)[0]
+        # Un seul parcours de la forêt (compilée, sans la validation ni le
+        # dispatch joblib de scikit-learn) : la classe prédite est l'argmax
+        # des probabilités
+        probabilities = self.engine.predict_proba(features_array)
+        best = np.argmax(probabilities, axis=1)
+        ranking = self._top_k(probabilities, top_k)
+        ranked_probabilities = np.take_along_axis(probabilities, ranking, axis=1)
         
-        # Récupérer le nom de la maladie
-        disease_name = self.label_encoder.inverse_transform([prediction])[0]
-        confidence = probabilities[prediction]
-        
-        # Obtenir toutes les probabilités
-        all_predictions = []
-        for i, prob in enumerate(probabilities):
-            disease = self.label_encoder.inverse_transform([i])[0]
-            all_predictions.append({
-                'disease': disease,
-                'probability': prob,
-                'disease_info': self.disease_mapping.get(disease, {})
+        names, infos = self.class_names, self._class_infos
+        results = []
+        for i, (index, ranks, probas) in enumerate(
+            zip(best.tolist(), ranking.tolist(), ranked_probabilities.tolist())
+        ):
+            results.append({
+                'predicted_disease': names[index],
+                'confidence': probabilities[i, index],
+                'disease_info': infos[index],
+                'all_predictions': [
+                    {'disease': names[j], 'probability': p, 'disease_info': infos[j]}
+                    for j, p in zip(ranks, probas)
+                ]
             })
-        
-        # Trier par probabilité décroissante
-        all_predictions.sort(key=lambda x: x['probability'], reverse=True)
-        
-        return {
-            'predicted_disease': disease_name,
-            'confidence': confidence,
-            'disease_info': self.disease_mapping.get(disease_name, {}),
-            'all_predictions': all_predictions
-        }
+        return results
+    
+    @staticmethod
+    def _top_k(probabilities, top_k):
+        """
+        Indices des top_k classes de chaque ligne, par probabilité
+        décroissante (à égalité, l'ordre des classes)
+        """
+        n_classes = probabilities.shape[1]
+        if top_k is None or top_k >= n_classes:
+            return np.argsort(-probabilities, axis=1, kind='stable')
+        if top_k < 1:
+            raise ValueError(f"top_k doit être positif : {top_k}")
+        # Sélection partielle en O(n_classes), puis tri des k retenues
+        candidates = np.sort(np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k], axis=1)
+        order = np.argsort(-np.take_along_axis(probabilities, candidates, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(candidates, order, axis=1)
+    
+    def _index_classes(self):
+        """
+        Noms des maladies et leurs informations, dans l'ordre des colonnes
+        de predict_proba (un seul inverse_transform par chargement)
+        """
+        self.class_names = np.asarray(self.label_encoder.inverse_transform(self.engine.classes_), dtype=object)
+        self._class_infos = [self.disease_mapping.get(name, {}) for name in self.class_names]
+    
+    @property
+    def temporal_features(self):
+        """Caractéristiques temporelles utilisées par le modèle chargé"""
+        return [name for name in self.feature_names if name in TEMPORAL_FEATURES]
     
-    def save_model(self, filepath=None):
+    @property
+    def snapshot_features(self):
+        """Caractéristiques lues sur l'observation elle-même (hors temporelles)"""
+        return [name for name in self.feature_names if name not in TEMPORAL_FEATURES]
+    
+    @property
+    def is_loaded(self):
+        """Vrai lorsque le moteur d'inférence est prêt"""
+        return self.engine is not None
+    
+    def save_model(self, filepath=None, artifact_dir=None):
         """
         Sauvegarde le modèle entraîné
         """
@@ -287,16 +443,73 @@ class LivestockMLPredictor:
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         joblib.dump(model_data, filepath)
         print(f"Modèle sauvegardé dans {filepath}")
+        
+        self.export_artifact(filepath, artifact_dir)
     
-    def load_model(self, filepath=None):
+    def export_artifact(self, filepath=None, artifact_dir=None):
+        """
+        Exporte l'artefact de service : tableaux de la forêt compilée en
+        .npy non compressés (ouverts en memory-map au chargement) et
+        métadonnées JSON, liés au pickle source par son empreinte
+        """
+        if filepath is None:
+            filepath = getattr(settings, 'ML_MODEL_PATH', 'ml_model/model.pkl')
+        if artifact_dir is None:
+            artifact_dir = getattr(settings, 'ML_ARTIFACT_DIR', 'ml_model/model_artifact')
+        
+        self.engine.save(
+            artifact_dir,
+            source_checksum=file_checksum(filepath),
+            feature_names=list(self.feature_names),
+            disease_mapping=self.disease_mapping,
+            label_classes=[str(c) for c in self.label_encoder.classes_],
+            feature_importances=[float(v) for v in self.feature_importances],
+        )
+        print(f"Artefact de service exporté dans {artifact_dir}")
+    
+    def load_artifact(self, artifact_dir):
+        """
+        Charge l'artefact de service en memory-map (lecture seule) : les
+        pages sont partagées entre tous les workers d'une même machine
+        """
+        self.engine = CompiledForest.load(artifact_dir, mmap_mode='r')
+        meta = self.engine.meta
+        self.label_encoder = LabelEncoder()
+        self.label_encoder.classes_ = np.array(meta['label_classes'])
+        self.feature_names = meta['feature_names']
+        self.disease_mapping = meta['disease_mapping']
+        self.feature_importances = np.array(meta['feature_importances'])
+        self._index_classes()
+    
+    def load_model(self, filepath=None, artifact_dir=None, train_if_missing=False):
         """
         Charge un modèle pré-entraîné
+
+        Par défaut, un modèle absent ou illisible lève une exception : le
+        réentraînement (train_if_missing=True) est réservé aux scripts
+        hors ligne et ne doit jamais avoir lieu pendant une requête.
         """
         if filepath is None:
             filepath = getattr(settings, 'ML_MODEL_PATH', 'ml_model/model.pkl')
+        if artifact_dir is None:
+            artifact_dir = getattr(settings, 'ML_ARTIFACT_DIR', 'ml_model/model_artifact')
+        
+        # Artefact memory-mappé s'il correspond au pickle (ou si le pickle
+        # n'est pas déployé)
+        meta = read_meta(artifact_dir)
+        if meta is not None and (
+            not os.path.exists(filepath) or meta.get('source_checksum') == file_checksum(filepath)
+        ):
+            self.load_artifact(artifact_dir)
+            print(f"Modèle chargé depuis {artifact_dir} (memory-map)")
+            return
         
         if not os.path.exists(filepath):
             print(f"Fichier de modèle non trouvé : {filepath}")
+            if not train_if_missing:
+                raise FileNotFoundError(
+                    f"Modèle introuvable : {filepath} (lancer train_model.py)"
+                )
             print("Entraînement d'un nouveau modèle...")
             self.train_model()
             self.save_model(filepath)
@@ -308,9 +521,14 @@ class LivestockMLPredictor:
             self.label_encoder = model_data['label_encoder']
             self.feature_names = model_data['feature_names']
             self.disease_mapping = model_data['disease_mapping']
+            self.engine = CompiledForest.from_sklearn(self.model)
+            self.feature_importances = self.model.feature_importances_
+            self._index_classes()
             print(f"Modèle chargé depuis {filepath}")
         except Exception as e:
             print(f"Erreur lors du chargement du modèle : {e}")
+            if not train_if_missing:
+                raise
             print("Entraînement d'un nouveau modèle...")
             self.train_model()
             self.save_model(filepath)
@@ -319,10 +537,10 @@ class LivestockMLPredictor:
         """
         Retourne l'importance des features
         """
-        if self.model is None:
+        if self.feature_importances is None:
             return None
         
-        importance = self.model.feature_importances_
+        importance = self.feature_importances
         feature_importance = dict(zip(self.feature_names, importance))
         
         # Trier par importance décroissante
@@ -331,18 +549,130 @@ class LivestockMLPredictor:
         return sorted_features
 
 
-# Instance globale du prédicteur
-predictor = LivestockMLPredictor()
+def file_checksum(filepath):
+    """
+    Empreinte SHA-256 d'un fichier
+    """
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+# Symptômes fictifs utilisés pour amorcer le moteur au démarrage
+WARMUP_SYMPTOMS = {
+    'temperature': 38.5, 'frequence_cardiaque': 70, 'frequence_respiratoire': 25,
+    'niveau_activite': 4, 'appetit': 4, 'fievre': False, 'toux': False,
+    'diarrhee': False, 'ecoulement_nasal': False, 'boiterie': False,
+    'abattement': False, 'perte_poids': False,
+}
+
+
+class PredictorNotReady(Exception):
+    """Le modèle n'a pas pu être chargé (artefacts absents ou illisibles)"""
+
+
+class PredictorManager:
+    """
+    Cycle de vie du prédicteur partagé par le processus.
+
+    Le chargement est protégé par un verrou : quel que soit le nombre de
+    requêtes concurrentes, le modèle n'est chargé qu'une fois, puis amorcé
+    par une prédiction fictive avant d'être publié. Aucun entraînement
+    n'a lieu ici ; un modèle absent laisse le gestionnaire dans l'état
+    'failed' jusqu'à la prochaine tentative.
+    """
+
+    NOT_LOADED = 'not_loaded'
+    LOADING = 'loading'
+    READY = 'ready'
+    FAILED = 'failed'
+
+    def __init__(self, filepath=None, artifact_dir=None, predictor_class=LivestockMLPredictor):
+        self.filepath = filepath
+        self.artifact_dir = artifact_dir
+        self.predictor_class = predictor_class
+        self.state = self.NOT_LOADED
+        self.error = None
+        self.warmup_seconds = None
+        self._predictor = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def is_ready(self):
+        return self._predictor is not None
+
+    def get(self):
+        """Retourne le prédicteur prêt, en le chargeant au premier appel"""
+        predictor = self._predictor
+        if predictor is not None:
+            return predictor
+        return self.warm_up()
+
+    def warm_up(self):
+        """
+        Charge le modèle et l'amorce ; les appels concurrents attendent le
+        premier chargement au lieu d'en lancer un autre
+        """
+        with self._lock:
+            if self._predictor is not None:
+                return self._predictor
+            self.state = self.LOADING
+            start = time.perf_counter()
+            try:
+                predictor = self.predictor_class()
+                predictor.load_model(self.filepath, self.artifact_dir)
+                predictor.predict(WARMUP_SYMPTOMS)
+            except Exception as e:
+                self.state = self.FAILED
+                self.error = str(e)
+                raise PredictorNotReady(f"Modèle indisponible : {e}") from e
+            self.warmup_seconds = time.perf_counter() - start
+            self.error = None
+            self.state = self.READY
+            self._predictor = predictor
+            return predictor
+
+    def start_warm_up(self):
+        """Lance l'amorçage dans un thread d'arrière-plan (idempotent)"""
+        with self._lock:
+            if self._predictor is not None or (self._thread and self._thread.is_alive()):
+                return
+            self._thread = threading.Thread(
+                target=self._warm_up_quietly, name='predictor-warmup', daemon=True
+            )
+            self._thread.start()
+
+    def _warm_up_quietly(self):
+        try:
+            self.warm_up()
+        except PredictorNotReady as e:
+            print(e)
+
+    def status(self):
+        """État exposé par /api/health/"""
+        return {
+            'ready': self.is_ready,
+            'state': self.state,
+            'error': self.error,
+            'warmup_seconds': round(self.warmup_seconds, 4) if self.warmup_seconds is not None else None,
+        }
+
+
+# Gestionnaire global du prédicteur
+predictor_manager = PredictorManager()
 
 
 def get_predictor():
     """
     Fonction pour obtenir l'instance du prédicteur
+
+    Lève PredictorNotReady si le modèle ne peut pas être chargé.
     """
-    global predictor
-    if predictor.model is None:
-        predictor.load_model()
-    return predictor
+    return predictor_manager.get()
+
 
 
 if __name__ == "__main__":
@@ -378,4 +708,4 @@ if __name__ == "__main__":
     
     print("\nImportance des features :")
     for feature, importance in predictor.get_feature_importance():
-        print(f"{feature}: {importance:.3f}")
\ No newline at end of file
+        print(f"{feature}: {importance:.3f}")
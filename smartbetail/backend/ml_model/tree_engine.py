@@ -0,0 +1,205 @@
+import json
+import os
+import shutil
+
+import numpy as np
+
+# Tableaux exportés pour chaque forêt, chacun de forme (n_arbres, n_noeuds_max[, ...])
+ARRAY_NAMES = ('feature', 'threshold', 'children', 'value')
+META_FILE = 'meta.json'
+
+
+class CompiledForest:
+    """
+    Forêt aléatoire scikit-learn aplatie en tableaux NumPy contigus.
+
+    Chaque arbre est stocké sur une ligne (complétée jusqu'au nombre de
+    noeuds du plus grand arbre). Les enfants (gauche, droite) sont des
+    indices de noeud globaux et les feuilles pointent sur elles-mêmes, ce
+    qui permet de descendre tous les arbres en même temps sur tout un lot
+    d'échantillons, pendant max_depth itérations vectorisées.
+
+    Les tableaux sont utilisés tels quels (sans copie), ce qui permet de
+    les ouvrir en memory-map et de partager leurs pages entre processus.
+    """
+
+    def __init__(self, feature, threshold, children, value, kind,
+                 n_features, max_depth, classes=None, n_outputs=1, meta=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.value = value
+        self.kind = kind
+        self.n_features = n_features
+        self.max_depth = max_depth
+        self.classes_ = classes
+        self.n_outputs = n_outputs
+        self.meta = meta or {}
+
+    @property
+    def n_trees(self):
+        return self.feature.shape[0]
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Exporte un RandomForestRegressor/RandomForestClassifier entraîné"""
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        is_classifier = hasattr(model, 'classes_')
+        n_trees = len(trees)
+        max_nodes = max(tree.node_count for tree in trees)
+        n_values = trees[0].value.shape[1] * trees[0].value.shape[2]
+
+        feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        threshold = np.zeros((n_trees, max_nodes), dtype=np.float64)
+        # Les noeuds de remplissage pointent sur eux-mêmes
+        children = np.repeat(np.arange(n_trees * max_nodes, dtype=np.intp), 2)
+        children = children.reshape(n_trees, max_nodes, 2)
+        value = np.zeros((n_trees, max_nodes, n_values), dtype=np.float64)
+
+        for t, tree in enumerate(trees):
+            n = tree.node_count
+            offset = t * max_nodes
+            nodes = np.arange(n, dtype=np.intp)
+            is_leaf = tree.children_left[:n] == -1
+            feature[t, :n] = np.where(is_leaf, 0, tree.feature[:n])
+            threshold[t, :n] = tree.threshold[:n]
+            children[t, :n, 0] = offset + np.where(is_leaf, nodes, tree.children_left[:n])
+            children[t, :n, 1] = offset + np.where(is_leaf, nodes, tree.children_right[:n])
+            tree_value = tree.value[:n].reshape(n, -1)
+            if is_classifier:
+                # scikit-learn < 1.4 stocke des effectifs pondérés et les
+                # normalise dans predict_proba ; les versions récentes
+                # stockent directement les fractions.
+                normalizer = tree_value.sum(axis=1, keepdims=True)
+                if not np.allclose(normalizer, 1.0):
+                    normalizer[normalizer == 0.0] = 1.0
+                    tree_value = tree_value / normalizer
+            value[t, :n] = tree_value
+
+        return cls(
+            feature, threshold, children, value,
+            kind='classifier' if is_classifier else 'regressor',
+            n_features=model.n_features_in_,
+            max_depth=max(tree.max_depth for tree in trees),
+            classes=model.classes_ if is_classifier else None,
+            n_outputs=model.n_outputs_,
+        )
+
+    def _flat(self):
+        """Vues aplaties des tableaux, indexées par numéro de noeud global"""
+        n_trees, max_nodes = self.feature.shape
+        offsets = (np.arange(n_trees, dtype=np.intp) * max_nodes)[:, None]
+        return (
+            offsets,
+            self.feature.reshape(-1),
+            self.threshold.reshape(-1),
+            self.children.reshape(-1),
+            self.value.reshape(n_trees * max_nodes, -1),
+        )
+
+    def _apply_flat(self, X):
+        # Les arbres scikit-learn comparent des float32 aux seuils float64
+        X = np.asarray(X, dtype=np.float32)
+        offsets, feature, threshold, children, _ = self._flat()
+        samples = np.arange(X.shape[0])[None, :]
+        nodes = np.repeat(offsets, X.shape[0], axis=1)
+        for _ in range(self.max_depth):
+            go_right = X[samples, feature[nodes]] > threshold[nodes]
+            nodes = children[2 * nodes + go_right]
+        return nodes
+
+    def apply(self, X):
+        """Indice de la feuille atteinte, pour chaque arbre et échantillon"""
+        offsets = self._flat()[0]
+        return self._apply_flat(X) - offsets
+
+    def _accumulate(self, X):
+        nodes = self._apply_flat(X)
+        value = self._flat()[4]
+        out = np.zeros((nodes.shape[1], value.shape[1]), dtype=np.float64)
+        # Somme arbre par arbre, dans le même ordre que scikit-learn
+        for t in range(self.n_trees):
+            out += value[nodes[t]]
+        out /= self.n_trees
+        return out
+
+    def predict_proba(self, X):
+        if self.kind != 'classifier':
+            raise AttributeError("predict_proba n'est disponible que pour une classification")
+        return self._accumulate(X)
+
+    def predict(self, X):
+        if self.kind == 'classifier':
+            return self.classes_[np.argmax(self._accumulate(X), axis=1)]
+        out = self._accumulate(X)
+        return out[:, 0] if self.n_outputs == 1 else out
+
+    def save(self, directory, **meta):
+        """
+        Écrit les tableaux (.npy non compressés) et les métadonnées dans un
+        répertoire neuf, substitué ensuite à directory : les fichiers déjà
+        ouverts en memory-map par d'autres processus ne sont jamais
+        tronqués ni réécrits sur place.
+        """
+        tmp_dir = directory.rstrip(os.sep) + '.tmp'
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), getattr(self, name))
+        if self.classes_ is not None:
+            np.save(os.path.join(tmp_dir, 'classes.npy'), self.classes_)
+        meta = dict(self.meta, **meta)
+        meta.update({
+            'kind': self.kind,
+            'n_features': int(self.n_features),
+            'max_depth': int(self.max_depth),
+            'n_outputs': int(self.n_outputs),
+        })
+        with open(os.path.join(tmp_dir, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        replace_directory(tmp_dir, directory)
+
+    @classmethod
+    def load(cls, directory, mmap_mode=None):
+        """Recharge une forêt exportée par save()"""
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+        classes_path = os.path.join(directory, 'classes.npy')
+        classes = np.load(classes_path) if os.path.exists(classes_path) else None
+        return cls(
+            **arrays,
+            kind=meta['kind'],
+            n_features=meta['n_features'],
+            max_depth=meta['max_depth'],
+            classes=classes,
+            n_outputs=meta['n_outputs'],
+            meta=meta,
+        )
+
+
+def replace_directory(tmp_dir, directory):
+    """
+    Remplace directory par tmp_dir, entièrement écrit. L'ancien répertoire
+    est renommé puis supprimé : ses fichiers restent lisibles par les
+    processus qui les ont en memory-map jusqu'à ce qu'ils les ferment.
+    """
+    directory = directory.rstrip(os.sep)
+    old_dir = directory + '.old'
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.exists(directory):
+        os.replace(directory, old_dir)
+    os.replace(tmp_dir, directory)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_meta(directory):
+    """Métadonnées d'une forêt exportée, ou None si elle n'existe pas"""
+    path = os.path.join(directory, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
@@ -5,6 +5,8 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
+
+    uvicorn smartbetail_project.asgi:application --workers 4
 """
 
 import os
@@ -12,5 +14,22 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartbetail_project.settings')
+# Sous ASGI, les endpoints les plus sollicités sont servis par des vues
+# asynchrones natives (voir livestock/async_urls.py)
+os.environ.setdefault('SMARTBETAIL_ASYNC_API', '1')
 
 application = get_asgi_application()
+
+# Chaque processus uvicorn importe ce module : le modèle y est chargé et
+# amorcé avant la première requête (voir wsgi.py)
+from django.conf import settings
+
+from ml_model.ml_predictor import PredictorNotReady, predictor_manager
+
+if settings.ML_PRELOAD:
+    try:
+        predictor_manager.warm_up()
+    except PredictorNotReady as e:
+        print(e)
+else:
+    predictor_manager.start_warm_up()
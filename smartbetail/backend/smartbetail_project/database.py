@@ -0,0 +1,85 @@
+"""
+Profils de base de données, choisis par la variable d'environnement
+SMARTBETAIL_DB_PROFILE (voir settings.py).
+
+- sqlite (défaut) : fichier local réglé pour les écritures concurrentes.
+  Les PRAGMA (WAL, synchronous=NORMAL, busy_timeout, mmap) sont appliqués
+  à chaque connexion par livestock.signals.configurer_sqlite. Le mode WAL
+  est enregistré dans le fichier : il n'est activé que pour une base
+  désignée par SMARTBETAIL_SQLITE_PATH, jamais pour le db.sqlite3 suivi
+  par git (données de démonstration), qu'il réécrirait. Les
+  transactions prennent le verrou d'écriture dès BEGIN (IMMEDIATE), ce qui
+  évite les « database is locked » immédiats lors de la promotion d'un
+  verrou de lecture en verrou d'écriture.
+- postgres : connexions persistantes (CONN_MAX_AGE) vérifiées avant
+  réutilisation, ou pool de connexions psycopg (Django 5.1+) avec
+  SMARTBETAIL_DB_POOL=1. Nécessite psycopg[binary,pool] :
+  pip install -r requirements-postgres.txt
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ('sqlite', 'postgres')
+
+# PRAGMA appliqués à chaque nouvelle connexion SQLite
+SQLITE_PRAGMAS = {
+    # Les lecteurs ne bloquent plus l'écrivain (et inversement) ; persistant
+    'journal_mode': 'wal',
+    # En WAL, fsync au checkpoint seulement : durable face à un arrêt du
+    # processus, pas forcément à une coupure de courant
+    'synchronous': 'normal',
+    # Attente (ms) d'un verrou avant l'erreur « database is locked »
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Cache de pages (valeur négative : en kio)
+    'cache_size': -20000,
+    'temp_store': 'memory',
+}
+
+
+def database_settings(profile, environ, base_dir):
+    """Retourne (DATABASES, SQLITE_PRAGMAS) pour le profil demandé"""
+    if profile == 'sqlite':
+        pragmas = dict(SQLITE_PRAGMAS)
+        if 'SMARTBETAIL_SQLITE_PATH' not in environ:
+            pragmas.pop('journal_mode')
+        return {
+            'default': {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': environ.get('SMARTBETAIL_SQLITE_PATH', base_dir / 'db.sqlite3'),
+                'OPTIONS': {
+                    # Attente du verrou côté module sqlite3 (secondes)
+                    'timeout': 20,
+                    'transaction_mode': 'IMMEDIATE',
+                },
+            }
+        }, pragmas
+
+    if profile == 'postgres':
+        default = {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': environ.get('SMARTBETAIL_DB_NAME', 'smartbetail_db'),
+            'USER': environ.get('SMARTBETAIL_DB_USER', 'smartbetail_user'),
+            'PASSWORD': environ.get('SMARTBETAIL_DB_PASSWORD', ''),
+            'HOST': environ.get('SMARTBETAIL_DB_HOST', 'localhost'),
+            'PORT': environ.get('SMARTBETAIL_DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(environ.get('SMARTBETAIL_DB_CONN_MAX_AGE', '60')),
+            # Connexion persistante testée avant réutilisation (redémarrage
+            # du serveur, coupure réseau)
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+        if environ.get('SMARTBETAIL_DB_POOL', '0') == '1':
+            # Le pool remplace les connexions persistantes (Django refuse
+            # CONN_MAX_AGE avec un pool)
+            default['CONN_MAX_AGE'] = 0
+            default['OPTIONS']['pool'] = {
+                'min_size': int(environ.get('SMARTBETAIL_DB_POOL_MIN', '2')),
+                'max_size': int(environ.get('SMARTBETAIL_DB_POOL_MAX', '10')),
+                'timeout': int(environ.get('SMARTBETAIL_DB_POOL_TIMEOUT', '10')),
+            }
+        return {'default': default}, {}
+
+    raise ImproperlyConfigured(
+        f"SMARTBETAIL_DB_PROFILE inconnu : {profile} ({', '.join(PROFILES)})"
+    )
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 import os
 from pathlib import Path
 
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -78,12 +80,10 @@ WSGI_APPLICATION = 'smartbetail_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Profil choisi par SMARTBETAIL_DB_PROFILE : sqlite (défaut, réglé pour la
+# concurrence) ou postgres (voir smartbetail_project/database.py)
+DATABASE_PROFILE = os.environ.get('SMARTBETAIL_DB_PROFILE', 'sqlite')
+DATABASES, SQLITE_PRAGMAS = database_settings(DATABASE_PROFILE, os.environ, BASE_DIR)
 
 
 # Password validation
@@ -151,3 +151,28 @@ CORS_ALLOW_ALL_ORIGINS = True  # Pour le développement uniquement
 
 # Chemin vers le modèle ML
 ML_MODEL_PATH = os.path.join(BASE_DIR, 'ml_model', 'model.pkl')
+
+# Artefact de service (tableaux .npy ouverts en memory-map, partagés entre workers)
+ML_ARTIFACT_DIR = os.path.join(BASE_DIR, 'ml_model', 'model_artifact')
+
+# Charger le modèle au démarrage du serveur, avant le fork des workers
+ML_PRELOAD = os.environ.get('SMARTBETAIL_ML_PRELOAD', '1') == '1'
+
+# Vues asynchrones natives (livestock/async_urls.py) ; activées par asgi.py
+ASYNC_API = os.environ.get('SMARTBETAIL_ASYNC_API', '0') == '1'
+
+# Pool de threads d'inférence des vues asynchrones, et nombre maximal de
+# prédictions en cours ou en attente avant de répondre 503
+ML_INFERENCE_THREADS = int(os.environ.get('SMARTBETAIL_ML_INFERENCE_THREADS', '2'))
+ML_INFERENCE_QUEUE = int(os.environ.get('SMARTBETAIL_ML_INFERENCE_QUEUE', '256'))
+
+# Mise à jour des états temporels par animal (livestock/features.py) à chaque
+# observation enregistrée. À activer avec un modèle entraîné sur les
+# colonnes temporelles, après un rebuild_feature_store
+FEATURE_STORE_ENABLED = os.environ.get('SMARTBETAIL_FEATURE_STORE', '0') == '1'
+
+# Hôtes autorisés pour les callback_url des prédictions asynchrones (https
+# uniquement), séparés par des virgules ; aucun par défaut
+PREDICTION_CALLBACK_HOSTS = [
+    host.strip() for host in os.environ.get('SMARTBETAIL_CALLBACK_HOSTS', '').split(',') if host.strip()
+]
@@ -14,6 +14,7 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from django.http import JsonResponse
@@ -41,6 +42,7 @@ def api_root(request):
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('api/', include('livestock.urls')),
+    # Sous ASGI, vues asynchrones pour les endpoints les plus sollicités
+    path('api/', include('livestock.async_urls' if settings.ASYNC_API else 'livestock.urls')),
     path('', api_root, name='api-root'),
 ]
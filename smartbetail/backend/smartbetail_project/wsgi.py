@@ -14,3 +14,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'smartbetail_project.settings')
 
 application = get_wsgi_application()
+
+# Avec gunicorn --preload (voir gunicorn.conf.py), ce module est importé
+# dans le processus maître : le modèle y est chargé et amorcé une seule
+# fois et ses tableaux memory-mappés sont partagés par tous les workers.
+# Sans préchargement, chaque worker l'amorce en arrière-plan ; /api/health/
+# reste "non prêt" jusqu'à la fin de l'amorçage.
+from django.conf import settings
+
+from ml_model.ml_predictor import PredictorNotReady, predictor_manager
+
+if settings.ML_PRELOAD:
+    try:
+        predictor_manager.warm_up()
+    except PredictorNotReady as e:
+        print(e)
+else:
+    predictor_manager.start_warm_up()
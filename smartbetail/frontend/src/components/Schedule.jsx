@@ -243,7 +243,7 @@ function CareCard({ soin, onEdit, onDelete }) {
           </div>
           
           <p className="text-sm text-gray-600 mb-2">
-            <strong>Animal:</strong> {soin.animal.nom} ({soin.animal.numero_identification})
+            <strong>Animal:</strong> {soin.animal_nom} ({soin.animal_numero_identification})
           </p>
           
           <p className="text-sm text-gray-600 mb-2">